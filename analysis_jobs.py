@@ -0,0 +1,333 @@
+"""
+Hintergrund-Jobs für die Analyse hochgeladener Dateien
+
+Große Uploads brauchen für Parsen und Analyse länger als übliche
+Proxy-Timeouts. JobManager nimmt solche Analysen als Job an und liefert
+sofort eine Job-ID; ausgeführt wird in einer lokalen Warteschlange im
+Server-Prozess (Worker-Threads aus dem WorkerPool).
+
+- Fortschritt (geparste Zeilen, analysierte Kunden, geschätzte Restlaufzeit)
+  meldet die Job-Funktion über ihren JobContext.
+- Abbruch: Jobs in der Warteschlange werden sofort verworfen, laufende Jobs
+  brechen bei der nächsten Fortschrittsmeldung ab (JobCancelled).
+- Registry auf Disk: pro Job <job_id>.json (Status, Fortschritt,
+  Zusammenfassung) und <job_id>_flagged.json (auffällige Kunden). Nach einem
+  Neustart bleiben abgeschlossene Jobs abrufbar; unterbrochene Jobs werden
+  als fehlgeschlagen markiert.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+from models import AnalysisJob, CustomerRiskProfile, JobFlaggedPage, JobStatus
+from worker_pool import WorkerPool
+
+
+FINISHED_STATES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Job wurde während der Ausführung abgebrochen"""
+    pass
+
+
+class JobContext:
+    """
+    Fortschrittsmeldung und Abbruchprüfung für eine laufende Job-Funktion
+    """
+
+    def __init__(self, manager: "JobManager", job: AnalysisJob):
+        self._manager = manager
+        self.job = job
+        self._analysis_started: Optional[float] = None
+
+    def check_cancelled(self):
+        """Wirft JobCancelled, wenn der Job abgebrochen wurde"""
+        if self._manager._is_cancel_requested(self.job.job_id):
+            raise JobCancelled(self.job.job_id)
+
+    def rows_parsed(self, rows: int):
+        """Fortschritt beim Parsen (Anzahl verarbeiteter Zeilen)"""
+        self.check_cancelled()
+        self.job.rows_parsed = rows
+        self._manager._save(self.job, throttle=True)
+
+    def customers_analyzed(self, done: int, total: int):
+        """Fortschritt der Analyse (analysierte Kunden von gesamt) inkl. Restlaufzeit"""
+        self.check_cancelled()
+        now = time.monotonic()
+        if self._analysis_started is None:
+            self._analysis_started = now
+        self.job.customers_analyzed = done
+        self.job.customers_total = total
+        elapsed = now - self._analysis_started
+        if done and elapsed > 0:
+            self.job.eta_seconds = round(elapsed / done * (total - done), 1)
+        self._manager._save(self.job, throttle=True)
+
+
+class JobManager:
+    """
+    Warteschlange und Registry für Analyse-Jobs
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        worker_pool: WorkerPool,
+        max_concurrent: int = 1,
+        max_finished_jobs: int = 200,
+        save_interval_seconds: float = 1.0
+    ):
+        """
+        Args:
+            directory: Verzeichnis der Job-Registry
+            worker_pool: Pool, in dessen Threads die Jobs laufen
+            max_concurrent: Gleichzeitig laufende Jobs
+            max_finished_jobs: Aufbewahrte abgeschlossene Jobs (älteste werden gelöscht)
+            save_interval_seconds: Mindestabstand zwischen Fortschritts-Schreibvorgängen
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.worker_pool = worker_pool
+        self.max_concurrent = max_concurrent
+        self.max_finished_jobs = max_finished_jobs
+        self.save_interval_seconds = save_interval_seconds
+
+        self._jobs: Dict[str, AnalysisJob] = {}
+        # Job-ID → (Funktion, Argumente) für noch nicht gestartete Jobs
+        self._pending: Dict[str, tuple] = {}
+        self._cancel_requested: Set[str] = set()
+        # Job-ID → Aufräumfunktion (siehe submit)
+        self._cleanups: Dict[str, Callable[[], None]] = {}
+        self._last_saved: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        self._load()
+
+    # ---- Registry ----
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _flagged_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}_flagged.json"
+
+    def _load(self):
+        """Liest die Registry; beim Neustart unterbrochene Jobs gelten als fehlgeschlagen"""
+        for path in self.directory.glob("*.json"):
+            if path.stem.endswith("_flagged"):
+                continue
+            try:
+                job = AnalysisJob.model_validate_json(path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"[WARN] Job-Datei {path.name} nicht lesbar: {e}")
+                continue
+            if job.status not in FINISHED_STATES:
+                job.status = JobStatus.FAILED
+                job.error = "Durch Neustart des Servers unterbrochen"
+                job.finished_at = datetime.now()
+                self._save(job)
+            self._jobs[job.job_id] = job
+
+    def _save(self, job: AnalysisJob, throttle: bool = False):
+        """Schreibt den Job atomar (bei throttle höchstens alle save_interval_seconds)"""
+        now = time.monotonic()
+        with self._lock:
+            if throttle and now - self._last_saved.get(job.job_id, 0.0) < self.save_interval_seconds:
+                return
+            self._last_saved[job.job_id] = now
+            path = self._job_path(job.job_id)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(job.model_dump_json(), encoding="utf-8")
+            tmp_path.replace(path)
+
+    def _save_flagged(self, job_id: str, flagged: List[CustomerRiskProfile]):
+        path = self._flagged_path(job_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            "[" + ",".join(profile.model_dump_json() for profile in flagged) + "]",
+            encoding="utf-8"
+        )
+        tmp_path.replace(path)
+
+    def _prune(self):
+        """Löscht die ältesten abgeschlossenen Jobs über max_finished_jobs"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in FINISHED_STATES),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.job_id]
+            self._last_saved.pop(job.job_id, None)
+            for path in (self._job_path(job.job_id), self._flagged_path(job.job_id)):
+                if path.exists():
+                    path.unlink()
+
+    # ---- Warteschlange ----
+
+    def start(self):
+        """Startet die Worker der Warteschlange (im Startup-Event aufrufen)"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.max_concurrent)]
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[..., Dict[str, Any]],
+        *args,
+        filename: Optional[str] = None,
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> AnalysisJob:
+        """
+        Reiht einen Job ein
+
+        Args:
+            kind: Art des Jobs (csv, csv-upload)
+            fn: Job-Funktion fn(context, *args) → Ergebnis-Dict (message,
+                analyzed_customers, summary, optional flagged_customers,
+                csv_filename, excel_filename); läuft in einem Worker-Thread
+            filename: Name der hochgeladenen Datei
+            cleanup: Wird nach Ende bzw. Abbruch des Jobs aufgerufen (z.B.
+                     zwischengespeicherten Upload löschen)
+
+        Returns:
+            AnalysisJob (Status queued)
+        """
+        if self._queue is None:
+            raise RuntimeError("JobManager nicht gestartet")
+        job = AnalysisJob(job_id=uuid.uuid4().hex, kind=kind, filename=filename)
+        self._jobs[job.job_id] = job
+        self._pending[job.job_id] = (fn, args)
+        if cleanup is not None:
+            self._cleanups[job.job_id] = cleanup
+        self._save(job)
+        self._queue.put_nowait(job.job_id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        entry = self._pending.pop(job_id, None)
+        job = self._jobs.get(job_id)
+        if entry is None or job is None or job.status != JobStatus.QUEUED:
+            # Bereits abgebrochen
+            return
+        fn, args = entry
+
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        self._save(job)
+
+        try:
+            result = await self.worker_pool.run(fn, JobContext(self, job), *args)
+        except JobCancelled:
+            job.status = JobStatus.CANCELLED
+            job.message = "Abgebrochen"
+        except Exception as e:
+            print(f"[ERROR] Job {job_id} fehlgeschlagen: {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        else:
+            flagged = result.get("flagged_customers") or []
+            self._save_flagged(job_id, flagged)
+            job.message = result.get("message")
+            job.analyzed_customers = result.get("analyzed_customers", 0)
+            job.summary = result.get("summary", {})
+            job.flagged_count = len(flagged)
+            job.csv_filename = result.get("csv_filename")
+            job.excel_filename = result.get("excel_filename")
+            job.customers_analyzed = job.customers_total
+            job.eta_seconds = 0.0
+            job.status = JobStatus.COMPLETED
+        finally:
+            self._cancel_requested.discard(job_id)
+            self._cleanup(job_id)
+
+        job.finished_at = datetime.now()
+        self._save(job)
+        self._prune()
+
+    def _cleanup(self, job_id: str):
+        cleanup = self._cleanups.pop(job_id, None)
+        if cleanup is None:
+            return
+        try:
+            cleanup()
+        except Exception as e:
+            print(f"[WARN] Aufräumen für Job {job_id} fehlgeschlagen: {e}")
+
+    # ---- Abfragen ----
+
+    def _is_cancel_requested(self, job_id: str) -> bool:
+        return job_id in self._cancel_requested
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """Job nach ID (None, wenn unbekannt)"""
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[AnalysisJob]:
+        """Alle Jobs, neueste zuerst"""
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        """
+        Bricht einen Job ab
+
+        Wartende Jobs werden sofort als abgebrochen markiert, laufende bei
+        ihrer nächsten Fortschrittsmeldung; abgeschlossene bleiben unverändert.
+
+        Returns:
+            AnalysisJob (None, wenn unbekannt)
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == JobStatus.QUEUED:
+            self._pending.pop(job_id, None)
+            self._cleanup(job_id)
+            job.status = JobStatus.CANCELLED
+            job.message = "Abgebrochen"
+            job.finished_at = datetime.now()
+            self._save(job)
+        elif job.status == JobStatus.RUNNING:
+            self._cancel_requested.add(job_id)
+        return job
+
+    def flagged(self, job_id: str, offset: int = 0, limit: int = 50) -> JobFlaggedPage:
+        """
+        Seite der auffälligen Kunden eines abgeschlossenen Jobs
+
+        Args:
+            job_id: Job-ID
+            offset: Anzahl zu überspringender Kunden
+            limit: Maximale Anzahl Kunden
+
+        Returns:
+            JobFlaggedPage
+        """
+        path = self._flagged_path(job_id)
+        flagged = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+        return JobFlaggedPage(
+            job_id=job_id,
+            total=len(flagged),
+            offset=offset,
+            limit=limit,
+            flagged_customers=[CustomerRiskProfile.model_validate(item) for item in flagged[offset:offset + limit]]
+        )
@@ -10,12 +10,16 @@ Koordiniert alle Analyse-Komponenten:
 Berechnet finalen Suspicion Score und Risiko-Level
 """
 
+import copy
+import heapq
+import threading
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Callable, FrozenSet
 from models import (
-    Transaction, CustomerRiskProfile, RiskLevel, CustomerInfo,
+    Transaction, CustomerRiskProfile, RiskLevel, CustomerInfo, BudgetedAnalysisResult,
     WeightAnalysis, EntropyAnalysis, PredictabilityAnalysis, TrustScoreAnalysis, StatisticalAnalysis,
     ModulePoints
 )
@@ -24,6 +28,77 @@ from entropy_detector import EntropyDetector
 from predictability_detector import PredictabilityDetector
 from trust_score import TrustScoreCalculator
 from statistical_methods import StatisticalAnalyzer
+from score_store import ScoreStateStore
+from prescreen import PreScreener
+from profile_record import CustomerScoreRecord, compute_flag_mask, format_flags
+from population_context import PopulationContext, CustomerTimeline
+from expiry_scheduler import ExpiryScheduler
+from cost_model import CustomerCostModel
+from history_store import TransactionStore, HistorySnapshot
+from retention import RetentionPolicy
+from dedup import TransactionDeduplicator
+from baseline_store import BaselineStore
+from result_memo import ResultMemo, DetectorResults
+from streaming_weight import StreamingWeightTracker
+from streaming_entropy import StreamingEntropyTracker
+from streaming_activity import StreamingActivityTracker
+import evaluation_plan
+
+
+class LiveScoringBase:
+    """
+    Fensterunabhängige Teile der letzten Vollanalyse eines Kunden für die
+    Echtzeit-Bewertung (analyze_customer_live)
+    
+    Baselines als (Mittelwert, Standardabweichung) der historischen Werte
+    (None = Z-Score 0) und historische Predictability. Die Transaktionen
+    beider Fenster (Einfügereihenfolge) dienen den fensterabhängigen
+    Detektoren; add_transactions ergänzt das aktuelle Fenster.
+    Die Basis gilt, bis eine Transaktion das aktuelle oder das historische
+    Fenster verlässt (valid_until) bzw. ins historische Fenster
+    nachgeliefert wird.
+    """
+    
+    __slots__ = (
+        'population_sequence', 'valid_until', 'weight_baselines', 'entropy_baseline',
+        'historical_predictability', 'recent_transactions', 'historical_transactions',
+        'approximated'
+    )
+    
+    def __init__(
+        self,
+        population_sequence: int,
+        valid_until: datetime,
+        weight_baselines: Tuple[Optional[Tuple[float, float]], ...],
+        entropy_baseline: Optional[Tuple[float, float]],
+        historical_predictability: Optional[float],
+        recent_transactions: List[Transaction],
+        historical_transactions: List[Transaction],
+        approximated: bool
+    ):
+        self.population_sequence = population_sequence
+        self.valid_until = valid_until
+        self.weight_baselines = weight_baselines
+        self.entropy_baseline = entropy_baseline
+        self.historical_predictability = historical_predictability
+        self.recent_transactions = recent_transactions
+        self.historical_transactions = historical_transactions
+        self.approximated = approximated
+    
+    @staticmethod
+    def moments(values: Optional[List[float]]) -> Optional[Tuple[float, float]]:
+        """(Mittelwert, Standardabweichung) der Baseline (None bei weniger als 2 Werten)"""
+        if not values or len(values) < 2:
+            return None
+        return float(np.mean(values)), float(np.std(values))
+    
+    @staticmethod
+    def z_score(value: float, moments: Optional[Tuple[float, float]]) -> float:
+        """Z-Score gegen die Baseline (wie calculate_z_score der Detektoren)"""
+        if moments is None:
+            return 0.0
+        mu, sigma = moments
+        return (value - mu) / max(sigma, 0.01)
 
 
 class TransactionAnalyzer:
@@ -31,12 +106,22 @@ class TransactionAnalyzer:
     Hauptanalyse-Engine - koordiniert alle Detektoren
     """
     
+    # Zeitfenster der laufend aktualisierten Datensätze (tick)
+    REFRESH_RECENT_DAYS = 30
+    
     def __init__(
         self,
         alpha: float = 0.6,
         beta: float = 0.4,
         historical_days: int = 365,
-        use_tp_sp_system: bool = True
+        use_tp_sp_system: bool = True,
+        score_store: Optional[ScoreStateStore] = None,
+        cost_model: Optional[CustomerCostModel] = None,
+        retention_policy: Optional[RetentionPolicy] = None,
+        deduplicator: Optional[TransactionDeduplicator] = None,
+        baseline_store: Optional[BaselineStore] = None,
+        result_memo: Optional[ResultMemo] = None,
+        live_state: bool = True
     ):
         """
         Args:
@@ -44,39 +129,164 @@ class TransactionAnalyzer:
             beta: Gewicht für Entropy-Z-Score im Suspicion Score
             historical_days: Anzahl Tage für historische Baseline
             use_tp_sp_system: Verwende neues TP/SP-System (True) oder alte Berechnung (False)
+            score_store: Persistenter Store für Trust-Score-Glättung über Läufe hinweg
+                         (None = Glättung nur innerhalb dieser Analyse-Session)
+            cost_model: Kostenmodell pro Kunde (Kappung bei sehr vielen Transaktionen)
+            retention_policy: Entfernt/archiviert Transaktionen außerhalb des
+                              längsten Fensters (None = Historie wächst unbegrenzt)
+            deduplicator: Verwirft bereits aufgenommene transaction_ids
+                          (None = jede Transaktion wird aufgenommen)
+            baseline_store: Persistente historische Baselines (Weight/Entropie/
+                            Predictability) pro Kunde (None = immer neu berechnen)
+            result_memo: Inhaltsadressierter Cache der Detektor-Ergebnisse, kann
+                         von mehreren Analyzern geteilt werden (None = kein Cache)
+            live_state: Zeitrad und Streaming-Zustände beim Einfügen fortschreiben
+                        (False für einmalige Auswertungen wie CSV-Uploads: ohne
+                        tick() und Echtzeit-Bewertung, dafür ohne zusätzlichen
+                        Speicher pro Transaktion)
         """
         self.alpha = alpha
         self.beta = beta
         self.historical_days = historical_days
         self.use_tp_sp_system = use_tp_sp_system
+        self.score_store = score_store
+        self.cost_model = cost_model or CustomerCostModel()
+        self.retention_policy = retention_policy
+        self.deduplicator = deduplicator
+        self.baseline_store = baseline_store
+        self.result_memo = result_memo
+        self.live_state = live_state
         
         # Initialisiere Detektoren
         self.weight_detector = WeightDetector()
         self.entropy_detector = EntropyDetector()
         self.predictability_detector = PredictabilityDetector()
-        self.trust_calculator = TrustScoreCalculator()
+        self.trust_calculator = TrustScoreCalculator(score_store=score_store)
         self.statistical_analyzer = StatisticalAnalyzer()
+        self.prescreener = PreScreener(self.weight_detector, self.entropy_detector)
         
         # WICHTIG: Cache zurücksetzen bei jeder neuen Analyse-Session
         # Damit Trust_Score-Anpassungen sofort wirksam werden
-        self.trust_calculator.previous_scores = {}
+        # (außer bei persistentem Store - dort soll die Glättung erhalten bleiben)
+        if score_store is None:
+            self.trust_calculator.previous_scores = {}
         
         # In-Memory Datenspeicher (in Produktion: Datenbank)
-        self.transaction_history: Dict[str, List[Transaction]] = {}
+        # Versioniert: transaction_history ist der aktuelle, unveränderliche Snapshot
+        self.history_store = TransactionStore()
+        self.transaction_history: HistorySnapshot = self.history_store.current
         self.customer_info: Dict[str, CustomerInfo] = {}  # CustomerInfo Cache
+        self.customer_info_revision = 0  # Erhöht bei jeder CustomerInfo-Änderung
+        
+        # Kunden, die im letzten zeitbegrenzten Lauf nicht mehr analysiert wurden
+        self.deferred_customers: List[str] = []
+        
+        # Geteilte Populations-Statistiken pro Snapshot-Version; Cache und
+        # Sperre werden von allen Sichten (snapshot()) mitbenutzt
+        self._population_cache: Dict[int, PopulationContext] = {}
+        self._population_lock = threading.Lock()
+        
+        # Laufend aktualisierte Datensätze: Zeitrad markiert Kunden, deren
+        # Zeitfenster sich ändern; tick() bewertet nur diese neu
+        self.expiry_scheduler = ExpiryScheduler(
+            window_days=(self.REFRESH_RECENT_DAYS, historical_days)
+        )
+        self.current_records: Dict[str, CustomerScoreRecord] = {}
+        # Lesern wird eine Kopie übergeben (published_records); Änderungen an
+        # current_records nur über set_current_record/drop_current_record
+        self._records_lock = threading.Lock()
+        self._records_version = 0
+        self._published_records: Tuple[int, Dict[str, CustomerScoreRecord]] = (0, {})
+        
+        # Laufend fortgeschriebenes Weight und Entropie-Zähler (aktuelles Fenster) pro Kunde
+        self.live_weights = StreamingWeightTracker(
+            self.weight_detector,
+            window_days=self.REFRESH_RECENT_DAYS
+        )
+        self.live_entropies = StreamingEntropyTracker(
+            self.entropy_detector,
+            window_days=self.REFRESH_RECENT_DAYS
+        )
+        # Velocity-, Layering- und Weight-Kennzahlen (aktuelles Fenster) pro Kunde
+        self.live_activity = StreamingActivityTracker(
+            self.weight_detector,
+            self.statistical_analyzer,
+            window_days=self.REFRESH_RECENT_DAYS
+        )
+        # Kunden-ID → LiveScoringBase der letzten Vollanalyse (analyze_customer_live)
+        self.live_bases: Dict[str, LiveScoringBase] = {}
     
-    def add_transactions(self, transactions: List[Transaction]):
+    def add_transactions(self, transactions: List[Transaction]) -> List[Transaction]:
         """
         Fügt Transaktionen zum History-Store hinzu
         
+        Mit Deduplicator werden bereits aufgenommene transaction_ids verworfen
+        (wiederholte Zustellung ändert Historie und Scores nicht).
+        
         Args:
             transactions: Liste von Transaktionen
+            
+        Returns:
+            Tatsächlich aufgenommene Transaktionen
         """
+        if self.deduplicator is not None:
+            transactions = self.deduplicator.filter(transactions)
+        
+        # Neue Version; laufende Leser behalten ihren Snapshot
+        self.transaction_history = self.history_store.append(transactions)
+        
+        if not self.live_state:
+            return transactions
+        
         for txn in transactions:
-            if txn.customer_id not in self.transaction_history:
-                self.transaction_history[txn.customer_id] = []
-            
-            self.transaction_history[txn.customer_id].append(txn)
+            self.expiry_scheduler.schedule(txn.customer_id, txn.timestamp)
+        
+        reference = self.get_reference_time()
+        self.live_weights.add(transactions, reference)
+        self.live_entropies.add(transactions, reference)
+        self.live_activity.add(transactions, reference)
+        
+        if self.live_bases:
+            recent_start = reference - timedelta(days=self.REFRESH_RECENT_DAYS)
+            for txn in transactions:
+                base = self.live_bases.get(txn.customer_id)
+                if base is None or not txn.timestamp:
+                    continue
+                if txn.timestamp < recent_start:
+                    # Nachgeliefert ins historische Fenster: Baselines veraltet
+                    del self.live_bases[txn.customer_id]
+                else:
+                    base.recent_transactions.append(txn)
+                    base.valid_until = min(
+                        base.valid_until, txn.timestamp + timedelta(days=self.REFRESH_RECENT_DAYS)
+                    )
+        
+        return transactions
+    
+    def snapshot(self) -> 'TransactionAnalyzer':
+        """
+        Leser-Sicht auf den aktuellen Datenstand
+        
+        Die Sicht teilt Detektoren, Trust-Zustand und Kunden-Infos mit diesem
+        Analyzer, ist aber an die aktuelle Snapshot-Version gebunden: parallel
+        eingehende Transaktionen verändern ihre Ergebnisse nicht. Nur lesend
+        verwenden (keine add_transactions/tick auf der Sicht).
+        
+        Returns:
+            TransactionAnalyzer auf festem Datenstand
+        """
+        view = copy.copy(self)
+        view.transaction_history = self.history_store.current
+        return view
+    
+    def data_version(self) -> Tuple[int, int]:
+        """
+        Version des Datenstands dieser Sicht (für Ergebnis-Caches)
+        
+        Returns:
+            Tuple (Snapshot-Version, CustomerInfo-Revision)
+        """
+        return self.transaction_history.version, self.customer_info_revision
     
     def get_latest_timestamp(self) -> Optional[datetime]:
         """
@@ -85,13 +295,8 @@ class TransactionAnalyzer:
         Returns:
             Neuester Timestamp oder None
         """
-        latest = None
-        for txns in self.transaction_history.values():
-            for txn in txns:
-                if txn.timestamp:
-                    if latest is None or txn.timestamp > latest:
-                        latest = txn.timestamp
-        return latest
+        # Wird beim Schreiben einer Version mitgeführt
+        return self.transaction_history.latest_timestamp
     
     def is_historical_data(self, threshold_days: int = 90) -> bool:
         """
@@ -110,6 +315,92 @@ class TransactionAnalyzer:
         days_ago = (datetime.now() - latest).days
         return days_ago > threshold_days
     
+    def get_reference_time(self) -> datetime:
+        """
+        Bestimmt den Referenzzeitpunkt für Zeitfenster wie analyze_customer:
+        Ende der Daten bei historischen Daten, sonst "jetzt"
+        
+        Returns:
+            Referenzzeitpunkt
+        """
+        if self.is_historical_data():
+            latest = self.get_latest_timestamp()
+            if latest is not None:
+                return latest
+        return datetime.now()
+    
+    def live_weight(self, customer_id: str) -> float:
+        """
+        Weight des Kunden im aktuellen Fenster (REFRESH_RECENT_DAYS) ohne
+        Zugriff auf die Historie (siehe streaming_weight)
+        
+        Args:
+            customer_id: Kunden-ID
+            
+        Returns:
+            Weight (entspricht weight_30d der Vollanalyse)
+        """
+        reference = self.get_reference_time()
+        weight = self.live_weights.weight(customer_id, reference)
+        if weight is None:
+            # Fenster beginnt vor bereits entfernten Transaktionen (Referenz
+            # zurückgesprungen): einmalig aus der Historie berechnen
+            timeline = CustomerTimeline(self.transaction_history.get(customer_id, []))
+            lo, hi = timeline.index_range(reference - timedelta(days=self.REFRESH_RECENT_DAYS))
+            weight = timeline.daily_index(self.weight_detector).weight(lo, hi)
+        return weight
+    
+    def live_entropy(self, customer_id: str) -> Dict[str, float]:
+        """
+        Entropien des Kunden im aktuellen Fenster (REFRESH_RECENT_DAYS) aus
+        den laufend geführten Zählern (siehe streaming_entropy)
+        
+        Args:
+            customer_id: Kunden-ID
+            
+        Returns:
+            Dict mit entropy_amount, entropy_payment_method,
+            entropy_transaction_type, entropy_time, entropy_aggregate
+        """
+        reference = self.get_reference_time()
+        entropies = self.live_entropies.entropies(customer_id, reference)
+        if entropies is None:
+            # Fenster beginnt vor bereits entfernten Transaktionen: aus der Historie
+            timeline = CustomerTimeline(self.transaction_history.get(customer_id, []))
+            analysis = self.entropy_detector.analyze(
+                timeline.between(reference - timedelta(days=self.REFRESH_RECENT_DAYS))
+            )
+            entropies = {
+                'entropy_amount': analysis.entropy_amount,
+                'entropy_payment_method': analysis.entropy_payment_method,
+                'entropy_transaction_type': analysis.entropy_transaction_type,
+                'entropy_time': analysis.entropy_time,
+                'entropy_aggregate': analysis.entropy_aggregate
+            }
+        return entropies
+    
+    def get_population_context(self) -> PopulationContext:
+        """
+        Liefert die geteilten Populations-Statistiken (Peer-Vergleich, Clustering)
+        
+        Wird einmal pro Snapshot-Version berechnet und von diesem Analyzer und
+        allen seinen Sichten bis zu neuen Transaktionen wiederverwendet.
+        Gehalten wird nur die neueste Version; Sichten auf ältere Versionen
+        berechnen ihren Kontext ohne ihn abzulegen.
+        
+        Returns:
+            PopulationContext
+        """
+        snapshot = self.transaction_history
+        with self._population_lock:
+            population = self._population_cache.get(snapshot.version)
+            if population is None:
+                population = PopulationContext(snapshot, self.statistical_analyzer)
+                if all(version < snapshot.version for version in self._population_cache):
+                    self._population_cache.clear()
+                    self._population_cache[snapshot.version] = population
+            return population
+    
     def get_customer_transactions(
         self,
         customer_id: str,
@@ -163,8 +454,8 @@ class TransactionAnalyzer:
         self,
         weight_analysis: WeightAnalysis,
         entropy_analysis: EntropyAnalysis,
-        predictability_analysis: PredictabilityAnalysis,
-        trust_analysis: TrustScoreAnalysis,
+        predictability_analysis: Optional[PredictabilityAnalysis],
+        trust_analysis: Optional[TrustScoreAnalysis],
         statistical_analysis: StatisticalAnalysis
     ) -> float:
         """
@@ -179,8 +470,8 @@ class TransactionAnalyzer:
         Args:
             weight_analysis: Weight-Analyse
             entropy_analysis: Entropie-Analyse
-            predictability_analysis: Predictability-Analyse
-            trust_analysis: Trust Score Analyse
+            predictability_analysis: Predictability-Analyse (None nur im Legacy-System)
+            trust_analysis: Trust Score Analyse (fließt nicht ein, None möglich)
             statistical_analysis: Statistische Analyse
             
         Returns:
@@ -612,96 +903,20 @@ class TransactionAnalyzer:
         Returns:
             Liste von Warnmeldungen
         """
-        flags = []
-        
-        # Weight/Smurfing Flags
-        if weight_analysis.is_suspicious:
-            # Prüfe auf Threshold-Avoidance (nah unter Bar-Grenze)
-            if weight_analysis.threshold_avoidance_ratio >= 0.5:
-                flags.append("🚨 SMURFING-VERDACHT: Bar-Investments nah unter 10.000€ Grenze")
-                if weight_analysis.cumulative_large_amount >= 50000.0:
-                    flags.append(f"💰 GROSSE KUMULATIVE SUMME: {weight_analysis.cumulative_large_amount:,.0f}€ nah unter Grenze")
-            else:
-                flags.append("⚠️ SMURFING-VERDACHT: Viele kleine Transaktionen")
-        
-        if weight_analysis.z_score_30d >= 3.0:
-            flags.append("🔴 HOHE TRANSAKTIONSAKTIVITÄT: Z-Score >= 3")
-        
-        if weight_analysis.small_transaction_ratio >= 0.8:
-            flags.append("💰 KLEINBETRAGS-MUSTER: >80% Transaktionen <2000 EUR")
-        
-        # NEUE FLAGS: Threshold-Avoidance Details
-        if weight_analysis.threshold_avoidance_ratio >= 0.7:
-            flags.append(f"🎯 THRESHOLD-AVOIDANCE: {weight_analysis.threshold_avoidance_ratio*100:.0f}% der Bar-Investments nah unter Grenze")
-        
-        if weight_analysis.temporal_density_weeks > 0.5:
-            flags.append(f"⏱️ HOHE TEMPORALE DICHTE: {weight_analysis.temporal_density_weeks:.2f} Transaktionen/Woche")
-        
-        # Source of Funds Flags
-        if weight_analysis.source_of_funds_exceeded:
-            flags.append("🚨 SOURCE OF FUNDS ÜBERSCHRITTEN: Kumulative Summe > angegebener SoF")
-        
-        # Economic Plausibility Flags
-        if weight_analysis.economic_plausibility_issue:
-            flags.append("⚠️ ECONOMIC PLAUSIBILITY: Unrealistisch hohe Beträge im Verhältnis zum Einkommen")
-        
-        # Entropie Flags
-        # ABSOLUTE SCHWELLENWERTE (funktionieren auch ohne historische Daten)
-        if entropy_analysis.entropy_aggregate < 0.3:
-            flags.append("📍 ENTROPIE-KANALISATION: Extreme Konzentration auf wenige Muster")
-        elif entropy_analysis.entropy_aggregate > 2.0:
-            flags.append("🔀 ENTROPIE-VERSCHLEIERUNG: Extreme Streuung (jeder Betrag unterschiedlich)")
-        
-        # ENTFERNT: "EINZIGE ZAHLUNGSMETHODE" ist nicht verdächtig an sich
-        # Viele normale Kunden verwenden nur eine Zahlungsmethode (z.B. nur SEPA)
-        # Dieses Flag wird nur in Kombination mit anderen verdächtigen Indikatoren verwendet
-        # (z.B. wenn zusätzlich extreme Entropie-Kanalisation vorliegt)
-        
-        # RELATIVE SCHWELLENWERTE (nur wenn Z-Score vorhanden)
-        if entropy_analysis.is_complex and entropy_analysis.z_score != 0:
-            if entropy_analysis.z_score > 2.0:
-                flags.append("🔀 UNGEWÖHNLICHE STREUUNG: Erhöhte Komplexität vs. Historie")
-            elif entropy_analysis.z_score < -2.0:
-                flags.append("📍 KANALISATION: Konzentration auf wenige Muster vs. Historie")
-        
-        # Predictability Flags
-        if not predictability_analysis.is_stable:
-            if predictability_analysis.overall_predictability < 0.3:
-                flags.append("⚠️ INSTABILES VERHALTEN: Sehr niedrige Predictability (< 0.3)")
-            elif predictability_analysis.overall_predictability < 0.5:
-                flags.append("📊 UNVORHERSAGBARES VERHALTEN: Niedrige Predictability (< 0.5)")
-        
-        if predictability_analysis.z_score < -2.0:
-            flags.append("📉 PREDICTABILITY-ABWEICHUNG: Starke negative Abweichung von historischer Baseline")
-        
-        # Trust Score Flags
-        if trust_analysis.current_score < 0.3:
-            flags.append("📉 NIEDRIGER TRUST SCORE: Unvorhersagbares Verhalten")
-        
-        if trust_analysis.self_deviation > 0.7:
-            flags.append("⚡ VERHALTENSÄNDERUNG: Starke Abweichung vom eigenen Profil")
-        
-        # Statistische Flags
-        if statistical_analysis.benford_score > 0.6:
-            flags.append("📊 BENFORD-ABWEICHUNG: Unnatürliche Zahlenverteilung")
-        
-        if statistical_analysis.velocity_score > 0.7:
-            flags.append("⏱️ HOHE VELOCITY: Ungewöhnliche Transaktionsgeschwindigkeit")
-        
-        if statistical_analysis.time_anomaly_score > 0.6:
-            flags.append("🕐 ZEITANOMALIEN: Ungewöhnliche Uhrzeiten/Tage")
-        
-        if statistical_analysis.clustering_score > 0.7:
-            flags.append("👥 PEER-ABWEICHUNG: Untypisch für Kundengruppe")
-        
-        # Geldwäsche-Muster (Layering)
-        # NIEDRIGERE SCHWELLENWERTE für bessere Erkennung
-        if statistical_analysis.layering_score > 0.5:
-            flags.append("🚨 GELDWÄSCHE-VERDACHT: Bar-Einzahlung → SEPA-Auszahlung")
-        elif statistical_analysis.layering_score > 0.3:
-            flags.append("⚠️ LAYERING-MUSTER: Auffällige Bar/SEPA-Kombination")
+        flag_mask = compute_flag_mask(
+            weight_analysis,
+            entropy_analysis,
+            predictability_analysis,
+            trust_analysis,
+            statistical_analysis
+        )
         
-        return flags
+        return format_flags(
+            flag_mask,
+            weight_analysis.cumulative_large_amount,
+            weight_analysis.threshold_avoidance_ratio,
+            weight_analysis.temporal_density_weeks
+        )
     
     def generate_recommendations(
         self,
@@ -755,6 +970,15 @@ class TransactionAnalyzer:
         
         return recommendations
     
+    def flush_score_state(self):
+        """
+        Schreibt geänderte Trust Scores in den persistenten Store (falls vorhanden)
+        """
+        if self.score_store is not None:
+            self.score_store.flush()
+        if self.baseline_store is not None:
+            self.baseline_store.flush()
+    
     def set_customer_info(self, customer_info: CustomerInfo):
         """
         Setzt CustomerInfo für einen Kunden
@@ -763,6 +987,138 @@ class TransactionAnalyzer:
             customer_info: CustomerInfo Objekt
         """
         self.customer_info[customer_info.customer_id] = customer_info
+        self.customer_info_revision += 1
+        self.expiry_scheduler.dirty.add(customer_info.customer_id)
+        self.live_bases.pop(customer_info.customer_id, None)
+    
+    def _select_windows(
+        self,
+        timeline: CustomerTimeline,
+        recent_days: int,
+        reference_time: datetime,
+        as_of: bool = False
+    ) -> Tuple[List[Transaction], List[Transaction], Optional[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+        """
+        Teilt die Transaktionen eines Kunden in aktuelles und historisches Fenster
+        
+        Wenn recent_days >= historical_days, wird die erste Hälfte des
+        historischen Fensters als Baseline und die zweite als aktuell verwendet.
+        
+        Args:
+            timeline: Zeitlich sortierte Transaktionen des Kunden
+            recent_days: Zeitfenster für aktuelle Analyse
+            reference_time: Referenzzeitpunkt ("jetzt" oder Datenende)
+            as_of: Transaktionen nach reference_time ausblenden (Stichtagsanalyse)
+            
+        Returns:
+            Tuple (aktuelle Transaktionen, historische Transaktionen,
+            Index-Bereiche beider Fenster in der Zeitsortierung oder None)
+        """
+        until = reference_time if as_of else None
+        
+        if not recent_days:
+            # Ohne Zeitfenster: alle Transaktionen (auch ohne Timestamp)
+            historical_start = reference_time - timedelta(days=self.historical_days)
+            if as_of:
+                return timeline.between(until=until), timeline.between(historical_start, until=until), None
+            return list(timeline.transactions), timeline.between(historical_start), None
+        
+        recent_start = reference_time - timedelta(days=recent_days)
+        historical_start = reference_time - timedelta(days=self.historical_days)
+        recent_range = timeline.index_range(recent_start, until=until)
+        
+        if recent_days >= self.historical_days:
+            # Erste Hälfte = historisch, zweite Hälfte = recent
+            lo, hi = timeline.index_range(historical_start, until=until)
+            if hi - lo > 1:
+                split_idx = lo + (hi - lo) // 2
+                all_customer_txns = timeline.sorted_between(historical_start, until=until)
+                return (
+                    all_customer_txns[split_idx - lo:],
+                    all_customer_txns[:split_idx - lo],
+                    ((split_idx, hi), (lo, split_idx))
+                )
+            return timeline.between(recent_start, until=until), [], (recent_range, (lo, lo))
+        
+        # Normale Logik: historische Transaktionen OHNE die aktuellen (saubere Baseline)
+        return (
+            timeline.between(recent_start, until=until),
+            timeline.between(historical_start, recent_start),
+            (recent_range, timeline.index_range(historical_start, recent_start))
+        )
+    
+    def _stored_baselines(
+        self,
+        customer_id: str,
+        timeline: CustomerTimeline,
+        daily_index,
+        recent_days: int,
+        historical_range: Tuple[int, int],
+        historical_txns: List[Transaction],
+        approximated: bool
+    ) -> Tuple[Optional[Dict[int, List[float]]], Optional[List[float]], Optional[float]]:
+        """
+        Historische Baselines aus dem BaselineStore (fortgeschrieben bzw. neu berechnet)
+        
+        Args:
+            customer_id: Kunden-ID
+            timeline: Zeitlich sortierte Transaktionen des Kunden
+            daily_index: Tages-Aggregate des Kunden (DailyWeightIndex)
+            recent_days: Zeitfenster für aktuelle Analyse (Teil des Schlüssels)
+            historical_range: Index-Bereich der historischen Transaktionen
+            historical_txns: Historische Transaktionen
+            approximated: Entropie-Baseline aus Stichprobe (wird nicht gespeichert)
+            
+        Returns:
+            Tuple (Weights pro Fenstergröße, Entropien, historische
+            Predictability); None = vom Detektor selbst berechnen
+        """
+        store = self.baseline_store
+        lo, hi = historical_range
+        times = timeline.times_in(lo, hi)
+        digests = timeline.digests_in(lo, hi)
+        
+        weight_baselines = None
+        if hi - lo >= 20:
+            # (unter 20 Transaktionen: Monats-Baseline, direkt berechnet)
+            weight_baselines = {
+                window_days: store.rolling_values(
+                    customer_id,
+                    f"weight:{window_days}@{recent_days}",
+                    times,
+                    digests,
+                    lambda start, w=window_days: daily_index.rolling_weights(lo, hi, w, start),
+                    decay_rate=self.weight_detector.lambda_decay,
+                    today=daily_index.today
+                )
+                for window_days in (7, 30, 90)
+            }
+        
+        historical_entropies = None
+        if hi > lo and not approximated:
+            sorted_txns = timeline.sorted_slice(lo, hi)
+            
+            def _entropies(start):
+                values, next_time = self.entropy_detector.rolling_entropies(
+                    sorted_txns, 30, start.astype(datetime) if start is not None else None
+                )
+                return values, np.datetime64(next_time, 'us')
+            
+            historical_entropies = store.rolling_values(
+                customer_id, f"entropy:30@{recent_days}", times, digests, _entropies
+            )
+        
+        historical_predictability = None
+        if len(historical_txns) >= 10:
+            historical_predictability = store.exact_value(
+                customer_id,
+                f"predictability@{recent_days}",
+                times,
+                digests,
+                lambda: self.predictability_detector.calculate_historical_predictability(historical_txns)
+            )
+        
+        return weight_baselines, historical_entropies, historical_predictability
     
     def analyze_customer(
         self,
@@ -781,44 +1137,106 @@ class TransactionAnalyzer:
         Returns:
             CustomerRiskProfile
         """
-        # Erkenne ob historische Daten
-        use_historical_mode = self.is_historical_data()
-        
-        # Hole Transaktionen
-        recent_txns = self.get_customer_transactions(
+        record = self.analyze_customer_record(
             customer_id,
-            days=recent_days,
-            use_data_end_as_reference=use_historical_mode
+            recent_days=recent_days,
+            all_transactions=all_transactions,
+            keep_analyses=True
         )
+        return self.materialize_profile(record)
+    
+    def analyze_customer_horizons(
+        self,
+        customer_id: str,
+        horizons: List[int] = (30, 90, 365)
+    ) -> Dict[int, CustomerRiskProfile]:
+        """
+        Analysiert einen Kunden für mehrere Zeitfenster in einem Durchgang
         
-        # Historische Transaktionen OHNE die aktuellen (für saubere Baseline)
-        # Wenn recent_days >= historical_days, verwende die erste Hälfte als historisch
-        if recent_days >= self.historical_days:
-            # Verwende alle Transaktionen, aber teile sie in historisch/recent
-            all_customer_txns = self.get_customer_transactions(
-                customer_id,
-                days=self.historical_days,
-                use_data_end_as_reference=use_historical_mode
-            )
-            # Sortiere nach Datum
-            all_customer_txns = sorted([t for t in all_customer_txns if t.timestamp], key=lambda t: t.timestamp)
-            
-            if len(all_customer_txns) > 1:
-                # Erste Hälfte = historisch, zweite Hälfte = recent
-                split_idx = len(all_customer_txns) // 2
-                historical_txns = all_customer_txns[:split_idx]
-                # Aktualisiere recent_txns mit der zweiten Hälfte
-                recent_txns = all_customer_txns[split_idx:]
-            else:
-                historical_txns = []
-        else:
-            # Normale Logik: historische Transaktionen OHNE die aktuellen
-            historical_txns = self.get_customer_transactions(
-                customer_id,
-                days=self.historical_days,
-                exclude_recent_days=recent_days,
-                use_data_end_as_reference=use_historical_mode
-            )
+        Sortierte Transaktionen, Referenzzeitpunkt und Populations-Kontext
+        (Peer-Statistik, Clustering-Fit) werden geteilt; pro Horizont laufen
+        nur die fensterabhängigen Detektoren.
+        
+        Args:
+            customer_id: Kunden-ID
+            horizons: Zeitfenster in Tagen (recent_days)
+            
+        Returns:
+            Dict Zeitfenster → CustomerRiskProfile (GREEN-Basisprofil, wenn
+            im Zeitfenster keine Transaktionen liegen)
+        """
+        if customer_id not in self.transaction_history:
+            raise ValueError(f"Keine Transaktionen für Kunde {customer_id}")
+        
+        population = self.get_population_context()
+        timeline = CustomerTimeline(self.transaction_history[customer_id])
+        
+        profiles = {}
+        for recent_days in horizons:
+            try:
+                record = self.analyze_customer_record(
+                    customer_id,
+                    recent_days=recent_days,
+                    keep_analyses=True,
+                    population=population,
+                    timeline=timeline
+                )
+            except ValueError:
+                record = self._default_record(customer_id)
+            profiles[recent_days] = self.materialize_profile(record)
+        
+        return profiles
+    
+    def analyze_customer_record(
+        self,
+        customer_id: str,
+        recent_days: int = 30,
+        all_transactions: List[Transaction] = None,
+        keep_analyses: bool = False,
+        population: Optional[PopulationContext] = None,
+        timeline: Optional[CustomerTimeline] = None,
+        as_of: Optional[datetime] = None,
+        outputs: Iterable[str] = evaluation_plan.FULL,
+        live_base: bool = False
+    ) -> CustomerScoreRecord:
+        """
+        Analyse eines Kunden als kompakter Datensatz (ohne Profil und Texte)
+        
+        Args:
+            customer_id: Kunden-ID
+            recent_days: Zeitfenster für aktuelle Analyse
+            all_transactions: Alle Transaktionen (für Peer-Vergleiche); ohne
+                              Angabe wird der Populations-Kontext verwendet
+            keep_analyses: Detektor-Ergebnisse auch für GREEN-Kunden behalten
+                           (auffällige Kunden behalten sie immer)
+            population: Geteilter Populations-Kontext (statt all_transactions)
+            timeline: Zeitlich sortierte Transaktionen des Kunden (für mehrere Horizonte)
+            as_of: Stichtag - Referenzzeitpunkt der Zeitfenster; spätere
+                   Transaktionen bleiben unberücksichtigt (Backtest)
+            outputs: Benötigte Ausgaben (siehe evaluation_plan); nicht
+                     benötigte Stufen werden übersprungen. Ohne Flags bleiben
+                     flag_mask 0 und analyses None.
+            live_base: Fensterunabhängige Teile für analyze_customer_live
+                       ablegen (nur aktuelles Fenster REFRESH_RECENT_DAYS mit
+                       Populations-Kontext, ohne Stichtag)
+            
+        Returns:
+            CustomerScoreRecord
+        """
+        needs = evaluation_plan.resolve(outputs, self.use_tp_sp_system)
+        
+        if population is None and all_transactions is None:
+            population = self.get_population_context()
+        
+        if timeline is None:
+            timeline = CustomerTimeline(self.transaction_history.get(customer_id, []))
+        
+        recent_txns, historical_txns, ranges = self._select_windows(
+            timeline,
+            recent_days,
+            as_of if as_of is not None else self.get_reference_time(),
+            as_of=as_of is not None
+        )
         
         if not recent_txns:
             # Kunde ohne aktuelle Transaktionen
@@ -832,55 +1250,241 @@ class TransactionAnalyzer:
         # Hole CustomerInfo (falls vorhanden)
         customer_info = self.customer_info.get(customer_id, None)
         
-        # 1. Weight-Analyse (Anti-Smurfing)
-        weight_analysis = self.weight_detector.analyze(
-            recent_txns,
-            historical_txns,
-            customer_info
-        )
-        
-        # 2. Entropie-Analyse
-        entropy_analysis = self.entropy_detector.analyze(
-            recent_txns,
-            historical_txns
-        )
-        
-        # 3. Predictability-Analyse
-        predictability_analysis = self.predictability_detector.analyze(
-            recent_txns,
-            historical_txns
-        )
-        
-        # 4. Trust Score
+        # Populations-Modell (Peer-Abweichung, Clustering) für diesen Kunden
         # Peer-Abweichung: Verwende nur ähnliche Kunden (nicht alle)
         # Ähnliche Kunden = ähnliche durchschnittliche Transaktionsgröße (±50%)
         customer_mean = np.mean([t.transaction_amount for t in recent_txns]) if recent_txns else 0
-        peer_transactions = []
-        if customer_mean > 0:
-            for txn in all_transactions:
-                # Nur Transaktionen von anderen Kunden mit ähnlicher Größe
-                if txn.customer_id != customer_id:
-                    # Grobe Filterung: ähnliche Transaktionsgröße (±50%)
-                    if 0.5 * customer_mean <= txn.transaction_amount <= 2.0 * customer_mean:
-                        peer_transactions.append(txn)
-        
-        # Wenn zu wenige Peers, verwende keine Peer-Abweichung
-        if len(peer_transactions) < 10:
-            peer_transactions = None  # Deaktiviere Peer-Abweichung
-        
-        trust_analysis = self.trust_calculator.analyze(
-            customer_id,
-            recent_txns,
-            historical_txns,
-            peer_transactions=peer_transactions
+        peer_transactions = None
+        peer_stats = None
+        clustering_score = None
+        if evaluation_plan.CLUSTERING not in needs:
+            clustering_score = 0.0  # Nur für Legacy-Score und Flags benötigt
+        elif population is not None:
+            clustering_score = population.clustering_score(recent_txns)
+        if evaluation_plan.PEERS not in needs:
+            pass  # Keine Peer-Abweichung benötigt (Trust Score wird nicht berechnet)
+        elif population is not None:
+            # Vorberechnete Peer-Statistik (Präfixsummen über sortierte Beträge)
+            peer_stats = population.peer_statistics(customer_id, customer_mean)
+        else:
+            peer_transactions = []
+            if customer_mean > 0:
+                for txn in all_transactions:
+                    # Nur Transaktionen von anderen Kunden mit ähnlicher Größe
+                    if txn.customer_id != customer_id:
+                        # Grobe Filterung: ähnliche Transaktionsgröße (±50%)
+                        if 0.5 * customer_mean <= txn.transaction_amount <= 2.0 * customer_mean:
+                            peer_transactions.append(txn)
+            
+            # Wenn zu wenige Peers, verwende keine Peer-Abweichung
+            if len(peer_transactions) < 10:
+                peer_transactions = None  # Deaktiviere Peer-Abweichung
+        
+        # Detektor-Ergebnisse aus dem Ergebnis-Cache (gleiche Eingaben → gleiches Ergebnis;
+        # Peer-Abweichung und Clustering-Score werden unten pro Lauf eingesetzt)
+        memo_key = None
+        results = None
+        if self.result_memo is not None and population is not None:
+            memo_key = ResultMemo.key(
+                recent_txns,
+                historical_txns,
+                customer_info,
+                (self.cost_model.max_cost, self.cost_model.min_sample_size, self.cost_model.stratum_days)
+            )
+            results = self.result_memo.get(memo_key)
+        
+        live_base = (
+            live_base and ranges is not None and as_of is None and population is not None
+            and recent_days == self.REFRESH_RECENT_DAYS < self.historical_days
+            and evaluation_plan.TRUST in needs
         )
+        if results is None or live_base:
+            # Gespeicherte historische Baselines (nur neue Fenster werden berechnet)
+            daily_index = timeline.daily_index(self.weight_detector) if ranges else None
+            entropy_baseline = self.cost_model.entropy_baseline(recent_txns, historical_txns)
+            approximated = entropy_baseline is not historical_txns
+            weight_baselines, historical_entropies, historical_predictability = None, None, None
+            if self.baseline_store is not None and ranges and as_of is None:
+                weight_baselines, historical_entropies, historical_predictability = self._stored_baselines(
+                    customer_id, timeline, daily_index, recent_days, ranges[1], historical_txns, approximated
+                )
+            if live_base:
+                # Baselines vollständig (für die Z-Scores der Echtzeit-Bewertung)
+                lo, hi = ranges[1]
+                stored = weight_baselines or {}
+                weight_baselines = {}
+                for window_days in (7, 30, 90):
+                    values = stored.get(window_days)
+                    if values is None:
+                        values = daily_index.baseline_weights(lo, hi, window_days)
+                    weight_baselines[window_days] = values
+                if entropy_baseline and historical_entropies is None:
+                    historical_entropies = self.entropy_detector._calculate_historical_entropies(entropy_baseline)
+                if historical_predictability is None and len(historical_txns) >= 10:
+                    historical_predictability = self.predictability_detector.calculate_historical_predictability(
+                        historical_txns
+                    )
         
-        # 4. Statistische Analysen
-        statistical_analysis = self.statistical_analyzer.analyze(
-            recent_txns,
-            all_transactions
+        if results is None:
+            # 1. Weight-Analyse (Anti-Smurfing)
+            # (Weights/Z-Scores über die geteilten Tages-Aggregate des Kunden)
+            weight_analysis = self.weight_detector.analyze(
+                recent_txns,
+                historical_txns,
+                customer_info,
+                daily_index=daily_index,
+                recent_range=ranges[0] if ranges else None,
+                historical_range=ranges[1] if ranges else None,
+                baselines=weight_baselines
+            )
+            
+            # 2. Entropie-Analyse
+            # (bei sehr vielen Transaktionen: Baseline aus geschichteter Stichprobe)
+            entropy_analysis = self.entropy_detector.analyze(
+                recent_txns,
+                entropy_baseline,
+                historical_entropies=historical_entropies
+            )
+            
+            # 3. Predictability-Analyse
+            predictability_analysis = None
+            if evaluation_plan.PREDICTABILITY in needs:
+                predictability_analysis = self.predictability_detector.analyze(
+                    recent_txns,
+                    historical_txns,
+                    historical_predictability=historical_predictability
+                )
+            
+            # 4. Trust-Score-Komponenten ohne Peers (Peer-Abweichung und
+            # Glättung erfolgen unten, abhängig von Population bzw. Zustand)
+            trust_components = None
+            if evaluation_plan.TRUST in needs:
+                predictability, self_deviation, _ = self.trust_calculator.calculate_components(
+                    recent_txns,
+                    historical_txns
+                )
+                trust_components = (predictability, self_deviation)
+            
+            # 5. Statistische Analysen
+            statistical_analysis = self.statistical_analyzer.analyze(
+                recent_txns,
+                all_transactions,
+                clustering_score=clustering_score
+            )
+            
+            results = DetectorResults(
+                weight_analysis,
+                entropy_analysis,
+                predictability_analysis,
+                statistical_analysis,
+                trust_components,
+                approximated
+            )
+            if memo_key is not None:
+                self.result_memo.put(memo_key, results)
+        else:
+            # Treffer aus einem Lauf mit weniger Ausgaben: fehlende Stufen in einer
+            # Kopie nachtragen (der Cache-Eintrag wird von anderen Läufen geteilt)
+            missing_predictability = (
+                evaluation_plan.PREDICTABILITY in needs and results.predictability_analysis is None
+            )
+            missing_trust = evaluation_plan.TRUST in needs and results.trust_components is None
+            if missing_predictability or missing_trust:
+                results = DetectorResults(
+                    results.weight_analysis,
+                    results.entropy_analysis,
+                    results.predictability_analysis,
+                    results.statistical_analysis,
+                    results.trust_components,
+                    results.approximated
+                )
+                if missing_predictability:
+                    results.predictability_analysis = self.predictability_detector.analyze(
+                        recent_txns,
+                        historical_txns
+                    )
+                if missing_trust:
+                    predictability, self_deviation, _ = self.trust_calculator.calculate_components(
+                        recent_txns,
+                        historical_txns
+                    )
+                    results.trust_components = (predictability, self_deviation)
+                self.result_memo.put(memo_key, results)
+        
+        weight_analysis = results.weight_analysis
+        entropy_analysis = results.entropy_analysis
+        predictability_analysis = results.predictability_analysis
+        statistical_analysis = results.statistical_analysis
+        approximated = results.approximated
+        if clustering_score is not None and statistical_analysis.clustering_score != clustering_score:
+            statistical_analysis = statistical_analysis.model_copy(update={'clustering_score': clustering_score})
+        
+        # Trust Score und Penalty (nur für Trust-Score- bzw. Flag-Ausgaben;
+        # der Suspicion Score verwendet den Trust Score nicht)
+        trust_analysis = None
+        if evaluation_plan.TRUST in needs:
+            # Trust Score (Peer-Abweichung, Glättung gegen den vorherigen Score des Kunden)
+            predictability, self_deviation = results.trust_components
+            peer_deviation = self.trust_calculator.calculate_peer_deviation(
+                recent_txns,
+                peer_transactions,
+                peer_stats=peer_stats
+            )
+            trust_analysis = self.trust_calculator.analyze_components(
+                customer_id, predictability, self_deviation, peer_deviation
+            )
+        
+        if live_base:
+            # Gültig, bis die älteste Transaktion eines Fensters herausfällt
+            valid_until = datetime.max
+            for (lo, hi), days in zip(ranges, (recent_days, self.historical_days)):
+                if hi > lo:
+                    first = timeline.times_in(lo, lo + 1)[0].astype(datetime)
+                    valid_until = min(valid_until, first + timedelta(days=days))
+            self.live_bases[customer_id] = LiveScoringBase(
+                population.sequence,
+                valid_until,
+                tuple(LiveScoringBase.moments(weight_baselines[window_days]) for window_days in (7, 30, 90)),
+                LiveScoringBase.moments(historical_entropies) if entropy_baseline else None,
+                historical_predictability,
+                list(recent_txns),
+                historical_txns,
+                approximated
+            )
+        
+        if trust_analysis is not None:
+            trust_analysis = self._apply_trust_penalty(
+                trust_analysis, weight_analysis, entropy_analysis, statistical_analysis
+            )
+        
+        return self._score_record(
+            customer_id,
+            customer_name,
+            total_transactions,
+            total_amount,
+            weight_analysis,
+            entropy_analysis,
+            predictability_analysis,
+            trust_analysis,
+            statistical_analysis,
+            approximated,
+            needs,
+            keep_analyses
         )
+    
+    def _apply_trust_penalty(
+        self,
+        trust_analysis: TrustScoreAnalysis,
+        weight_analysis: WeightAnalysis,
+        entropy_analysis: EntropyAnalysis,
+        statistical_analysis: StatisticalAnalysis
+    ) -> TrustScoreAnalysis:
+        """
+        Reduziert den Trust Score bei verdächtigen Indikatoren
         
+        Returns:
+            Kopie der TrustScoreAnalysis mit angepasstem current_score
+        """
         # ==========================================
         # TRUST_SCORE ANPASSUNG: Direkte Verknüpfung mit verdächtigen Indikatoren
         # ==========================================
@@ -916,9 +1520,31 @@ class TransactionAnalyzer:
         trust_penalty = min(trust_penalty, 0.7)
         adjusted_trust_score = trust_analysis.current_score * (1.0 - trust_penalty)
         
-        # Aktualisiere Trust_Score im Analysis-Objekt
-        trust_analysis.current_score = max(0.0, min(1.0, adjusted_trust_score))
+        return trust_analysis.model_copy(update={
+            'current_score': max(0.0, min(1.0, adjusted_trust_score))
+        })
+    
+    def _score_record(
+        self,
+        customer_id: str,
+        customer_name: str,
+        total_transactions: int,
+        total_amount: float,
+        weight_analysis: WeightAnalysis,
+        entropy_analysis: EntropyAnalysis,
+        predictability_analysis: Optional[PredictabilityAnalysis],
+        trust_analysis: Optional[TrustScoreAnalysis],
+        statistical_analysis: StatisticalAnalysis,
+        approximated: bool,
+        needs: FrozenSet[str],
+        keep_analyses: bool
+    ) -> CustomerScoreRecord:
+        """
+        Suspicion Score, Risiko-Level und Flags aus den Detektor-Ergebnissen
         
+        Returns:
+            CustomerScoreRecord
+        """
         # 5. Suspicion Score
         suspicion_score = self.calculate_suspicion_score(
             weight_analysis,
@@ -931,87 +1557,681 @@ class TransactionAnalyzer:
         # 6. Risiko-Level
         risk_level = self.determine_risk_level(suspicion_score)
         
-        # 7. Flags und Empfehlungen
-        flags = self.generate_flags(
+        # 7. Flags als Bitmaske (Texte erst bei Materialisierung)
+        flag_mask = 0
+        if evaluation_plan.OUTPUT_FLAGS in needs:
+            flag_mask = compute_flag_mask(
+                weight_analysis,
+                entropy_analysis,
+                predictability_analysis,
+                trust_analysis,
+                statistical_analysis
+            )
+        
+        analyses = None
+        if evaluation_plan.OUTPUT_PROFILE in needs and (keep_analyses or risk_level != RiskLevel.GREEN):
+            analyses = (weight_analysis, entropy_analysis, trust_analysis, statistical_analysis)
+        
+        return CustomerScoreRecord(
+            customer_id=customer_id,
+            customer_name=customer_name,
+            total_transactions=total_transactions,
+            total_amount=total_amount,
+            suspicion_score=suspicion_score,
+            risk_level=risk_level,
+            flag_mask=flag_mask,
+            threshold_avoidance_ratio=weight_analysis.threshold_avoidance_ratio,
+            cumulative_large_amount=weight_analysis.cumulative_large_amount,
+            temporal_density_weeks=weight_analysis.temporal_density_weeks,
+            layering_score=statistical_analysis.layering_score,
+            entropy_complex=entropy_analysis.is_complex,
+            approximated=approximated,
+            analyses=analyses
+        )
+    
+    def analyze_customer_live(
+        self,
+        customer_id: str,
+        population: PopulationContext
+    ) -> Optional[CustomerScoreRecord]:
+        """
+        Bewertet einen Kunden im aktuellen Fenster (REFRESH_RECENT_DAYS) aus den
+        laufend geführten Zuständen
+        
+        Weight, Entropie, Velocity und Layering kommen aus den Streaming-
+        Trackern, die Z-Scores aus den Baselines der letzten Vollanalyse
+        (analyze_customer_record mit live_base). Predictability, Benford,
+        Zeit-Anomalie, Clustering und Trust Score werden wie in der
+        Vollanalyse über die Fenster-Transaktionen der Basis berechnet
+        (ohne Zeitleiste, Tages-Aggregate und Baselines).
+        
+        Args:
+            customer_id: Kunden-ID
+            population: Populations-Kontext der Echtzeit-Bewertung
+            
+        Returns:
+            CustomerScoreRecord (mit Detektor-Ergebnissen) oder None, wenn eine
+            Vollanalyse nötig ist (keine Basis für diesen Populations-Kontext,
+            veraltete Baselines, Fenster vor bereits entfernten Transaktionen,
+            keine aktuellen Transaktionen)
+        """
+        base = self.live_bases.get(customer_id)
+        if base is None or not self.live_state or base.population_sequence != population.sequence:
+            return None
+        
+        reference = self.get_reference_time()
+        if reference > base.valid_until:
+            return None  # Fenstergrenzen verschoben: Baselines veraltet
+        activity = self.live_activity.summary(customer_id, reference)
+        if activity is None or not activity.count:
+            return None
+        weight = self.live_weights.weight(customer_id, reference)
+        entropies = self.live_entropies.entropies(customer_id, reference)
+        if weight is None or entropies is None:
+            return None
+        
+        customer_info = self.customer_info.get(customer_id, None)
+        detector = self.weight_detector
+        
+        # 1. Weight (Kennzahlen wie WeightDetector.analyze über das aktuelle Fenster)
+        threshold_avoidance_ratio, cumulative_large_amount = 0.0, 0.0
+        if activity.bar_investment_count:
+            threshold_avoidance_ratio = activity.near_count / activity.bar_investment_count
+            cumulative_large_amount = activity.near_sum
+        source_of_funds_exceeded = (
+            customer_info is not None and customer_info.source_of_funds is not None
+            and activity.investment_sum > customer_info.source_of_funds
+        )
+        weight_analysis = detector.assess(
+            (weight, weight, weight),
+            tuple(LiveScoringBase.z_score(weight, moments) for moments in base.weight_baselines),
+            activity.count,
+            activity.small_count / activity.count,
+            threshold_avoidance_ratio,
+            cumulative_large_amount,
+            detector.density_weeks(activity.count, activity.first_timestamp, activity.last_timestamp),
+            source_of_funds_exceeded,
+            detector.economic_plausibility_issue(activity.near_count, activity.near_sum, customer_info),
+            customer_info
+        )
+        
+        # 2. Entropie (Häufigkeiten aus streaming_entropy)
+        entropy_z = None
+        if base.entropy_baseline is not None:
+            entropy_z = LiveScoringBase.z_score(entropies['entropy_aggregate'], base.entropy_baseline)
+        entropy_analysis = self.entropy_detector.assess(
+            entropies['entropy_amount'],
+            entropies['entropy_payment_method'],
+            entropies['entropy_transaction_type'],
+            entropies['entropy_time'],
+            entropies['entropy_aggregate'],
+            activity.count,
+            activity.unique_amounts,
+            entropy_z
+        )
+        
+        # 3. Predictability (historischer Anteil aus der Basis)
+        recent_txns = base.recent_transactions
+        historical_txns = base.historical_transactions
+        predictability_analysis = self.predictability_detector.analyze(
+            recent_txns,
+            historical_txns,
+            historical_predictability=base.historical_predictability
+        )
+        
+        # 4. Statistische Analysen (Velocity/Layering laufend)
+        statistical_analysis = StatisticalAnalysis(
+            benford_score=self.statistical_analyzer.benford_analysis(recent_txns),
+            velocity_score=activity.velocity_score,
+            time_anomaly_score=self.statistical_analyzer.time_anomaly_detection(recent_txns),
+            clustering_score=population.clustering_score(recent_txns),
+            layering_score=activity.layering_score
+        )
+        
+        # 5. Trust Score (Peer-Abweichung, Glättung) mit aktueller Penalty
+        predictability, self_deviation, _ = self.trust_calculator.calculate_components(
+            recent_txns,
+            historical_txns
+        )
+        peer_deviation = self.trust_calculator.calculate_peer_deviation(
+            recent_txns,
+            None,
+            peer_stats=population.peer_statistics(
+                customer_id, np.mean([t.transaction_amount for t in recent_txns])
+            )
+        )
+        trust_analysis = self._apply_trust_penalty(
+            self.trust_calculator.analyze_components(
+                customer_id, predictability, self_deviation, peer_deviation
+            ),
+            weight_analysis,
+            entropy_analysis,
+            statistical_analysis
+        )
+        
+        return self._score_record(
+            customer_id,
+            activity.customer_name,
+            activity.count,
+            activity.amount_sum,
             weight_analysis,
             entropy_analysis,
             predictability_analysis,
             trust_analysis,
-            statistical_analysis
+            statistical_analysis,
+            base.approximated,
+            evaluation_plan.resolve(evaluation_plan.FULL, self.use_tp_sp_system),
+            True
         )
+    
+    def materialize_profile(self, record: CustomerScoreRecord) -> CustomerRiskProfile:
+        """
+        Erzeugt das vollständige Risikoprofil (inkl. Flags und Empfehlungen)
+        aus einem kompakten Datensatz
         
-        recommendations = self.generate_recommendations(risk_level, flags)
+        Args:
+            record: CustomerScoreRecord
+            
+        Returns:
+            CustomerRiskProfile
+        """
+        weight_analysis = entropy_analysis = trust_analysis = statistical_analysis = None
+        if record.analyses is not None:
+            weight_analysis, entropy_analysis, trust_analysis, statistical_analysis = record.analyses
+        
+        flags = record.flags()
+        recommendations = (
+            self.generate_recommendations(record.risk_level, flags)
+            if record.total_transactions > 0 else []
+        )
         
-        # Erstelle Profil
-        profile = CustomerRiskProfile(
-            customer_id=customer_id,
-            customer_name=customer_name,
-            total_transactions=total_transactions,
-            total_amount=total_amount,
+        return CustomerRiskProfile(
+            customer_id=record.customer_id,
+            customer_name=record.customer_name,
+            total_transactions=record.total_transactions,
+            total_amount=record.total_amount,
             weight_analysis=weight_analysis,
             entropy_analysis=entropy_analysis,
             trust_score_analysis=trust_analysis,
             statistical_analysis=statistical_analysis,
-            suspicion_score=suspicion_score,
-            risk_level=risk_level,
+            suspicion_score=record.suspicion_score,
+            risk_level=record.risk_level,
             flags=flags,
             recommendations=recommendations,
-            analysis_timestamp=datetime.now()
+            prescreened=record.prescreened,
+            score_upper_bound=record.score_upper_bound,
+            approximated=record.approximated,
+            analysis_timestamp=record.analysis_timestamp
+        )
+    
+    def prescreen_customers(self, recent_days: int = 30) -> pd.DataFrame:
+        """
+        Vektorisierte Vorprüfung aller Kunden (siehe prescreen.PreScreener)
+        
+        Args:
+            recent_days: Zeitfenster für aktuelle Analyse
+            
+        Returns:
+            DataFrame (Index: customer_id) mit günstigen Indikatoren und
+            'score_upper_bound' (obere Schranke des TP/SP-Suspicion-Scores)
+        """
+        return self.prescreener.compute_indicators(
+            self.transaction_history,
+            reference_time=self.get_reference_time(),
+            recent_days=recent_days,
+            historical_days=self.historical_days,
+            customer_info=self.customer_info,
+            alpha=self.alpha,
+            beta=self.beta
+        )
+    
+    def _default_record(self, customer_id: str) -> CustomerScoreRecord:
+        """Basis-Datensatz (GREEN, Score 0) für Kunden ohne Transaktionen im Zeitfenster"""
+        return CustomerScoreRecord(
+            customer_id=customer_id,
+            suspicion_score=0.0,
+            risk_level=RiskLevel.GREEN
+        )
+    
+    def _prescreened_record(self, customer_id: str, indicators: pd.Series) -> CustomerScoreRecord:
+        """Datensatz für Kunden, die laut Vorprüfung GREEN nicht verlassen können"""
+        return CustomerScoreRecord(
+            customer_id=customer_id,
+            customer_name=indicators['customer_name'],
+            total_transactions=int(indicators['recent_count']),
+            total_amount=float(indicators['total_amount']),
+            suspicion_score=None,
+            risk_level=RiskLevel.GREEN,
+            prescreened=True,
+            score_upper_bound=float(indicators['score_upper_bound'])
         )
+    
+    def _analyze_customer_safe(
+        self,
+        customer_id: str,
+        recent_days: int,
+        population: PopulationContext,
+        screened: Optional[pd.DataFrame] = None,
+        keep_analyses: bool = False,
+        as_of: Optional[datetime] = None,
+        outputs: Iterable[str] = evaluation_plan.FULL
+    ) -> Optional[CustomerScoreRecord]:
+        """
+        Analysiert einen Kunden im Rahmen eines Gesamtlaufs
         
-        return profile
+        Berücksichtigt die Vorprüfung (falls vorhanden) und liefert für Kunden
+        ohne Transaktionen im Zeitfenster einen Basis-Datensatz.
+        
+        Returns:
+            CustomerScoreRecord oder None bei Analysefehler
+        """
+        if screened is not None:
+            if customer_id not in screened.index:
+                # Keine Transaktionen im Zeitfenster
+                return self._default_record(customer_id)
+            indicators = screened.loc[customer_id]
+            if self.determine_risk_level(indicators['score_upper_bound']) == RiskLevel.GREEN:
+                return self._prescreened_record(customer_id, indicators)
+        
+        try:
+            return self.analyze_customer_record(
+                customer_id,
+                recent_days=recent_days,
+                keep_analyses=keep_analyses,
+                population=population,
+                as_of=as_of,
+                outputs=outputs
+            )
+        except Exception as e:
+            # Wenn Kunde keine Transaktionen im Zeitfenster hat, erstelle Default-Datensatz
+            if "Keine Transaktionen" in str(e):
+                # Basis-Datensatz (GREEN, Score 0)
+                return self._default_record(customer_id)
+            print(f"Fehler bei Analyse von {customer_id}: {e}")
+            return None
     
     def analyze_all_customers(
         self,
-        recent_days: int = 30
+        recent_days: int = 30,
+        prescreen: bool = False
     ) -> List[CustomerRiskProfile]:
         """
         Analysiert alle Kunden
         
         Args:
             recent_days: Zeitfenster für aktuelle Analyse
+            prescreen: Vorprüfung aktivieren - Kunden, deren Score-Obergrenze
+                       unter der GREEN-Grenze liegt, werden nicht voll analysiert
+                       (nur TP/SP-System; ohne suspicion_score, nur score_upper_bound)
             
         Returns:
             Liste von CustomerRiskProfile
         """
-        profiles = []
+        records = self.analyze_all_customer_records(
+            recent_days=recent_days,
+            prescreen=prescreen,
+            keep_analyses=True
+        )
+        return [self.materialize_profile(record) for record in records]
+    
+    def analyze_all_customer_records(
+        self,
+        recent_days: int = 30,
+        prescreen: bool = False,
+        keep_analyses: bool = False,
+        outputs: Iterable[str] = evaluation_plan.FULL,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[CustomerScoreRecord]:
+        """
+        Analysiert alle Kunden als kompakte Datensätze
         
-        # Alle Transaktionen für Peer-Vergleiche
-        all_txns = []
-        for txns in self.transaction_history.values():
-            all_txns.extend(txns)
+        Vollständige Profile werden nur für tatsächlich ausgegebene Kunden
+        über materialize_profile() erzeugt.
         
-        # Analysiere jeden Kunden
-        for customer_id in self.transaction_history.keys():
-            try:
-                profile = self.analyze_customer(
-                    customer_id,
-                    recent_days=recent_days,
-                    all_transactions=all_txns
+        Args:
+            recent_days: Zeitfenster für aktuelle Analyse
+            prescreen: Vorprüfung aktivieren (siehe analyze_all_customers)
+            keep_analyses: Detektor-Ergebnisse auch für GREEN-Kunden behalten
+            outputs: Benötigte Ausgaben (z.B. evaluation_plan.SCORE_ONLY für
+                     Läufe, die nur Score und Risiko-Level auswerten)
+            progress: Wird nach jedem Kunden mit (analysiert, gesamt)
+                      aufgerufen; eine Exception bricht den Lauf ab
+            
+        Returns:
+            Liste von CustomerScoreRecord (nach Suspicion Score absteigend)
+        """
+        records = []
+        
+        # Geteilte Populations-Statistiken für Peer-Vergleiche und Clustering
+        population = self.get_population_context()
+        
+        # Vorprüfung: welche Kunden können GREEN überhaupt verlassen?
+        screened = None
+        if prescreen and self.use_tp_sp_system:
+            screened = self.prescreen_customers(recent_days)
+            if not screened.empty:
+                n_skipped = sum(
+                    1 for bound in screened['score_upper_bound']
+                    if self.determine_risk_level(bound) == RiskLevel.GREEN
                 )
-                profiles.append(profile)
-            except Exception as e:
-                # Wenn Kunde keine Transaktionen im Zeitfenster hat, erstelle Default-Profil
-                if "Keine Transaktionen" in str(e):
-                    # Erstelle ein Basis-Profil (GREEN, Score 0)
-                    default_profile = CustomerRiskProfile(
-                        customer_id=customer_id,
-                        risk_level=RiskLevel.GREEN,
-                        suspicion_score=0.0,
-                        flags=[],
-                        weight_analysis=None,
-                        entropy_analysis=None,
-                        trust_score_analysis=None,
-                        statistical_analysis=None,
-                        analysis_timestamp=datetime.now()
-                    )
-                    profiles.append(default_profile)
-                else:
-                    print(f"Fehler bei Analyse von {customer_id}: {e}")
+                print(f"[INFO] Pre-Screen: {n_skipped} von {len(self.transaction_history)} Kunden "
+                      f"ohne Vollanalyse (GREEN garantiert)")
+        
+        # Vorherige Trust Scores gebündelt laden
+        if self.score_store is not None:
+            self.score_store.prefetch(self.transaction_history.keys())
+        if self.baseline_store is not None:
+            self.baseline_store.prefetch(self.transaction_history.keys())
+        
+        # Analysiere jeden Kunden
+        total = len(self.transaction_history)
+        for done, customer_id in enumerate(self.transaction_history.keys(), start=1):
+            record = self._analyze_customer_safe(
+                customer_id, recent_days, population, screened, keep_analyses,
+                outputs=outputs
+            )
+            if record is not None:
+                records.append(record)
+            if progress is not None:
+                progress(done, total)
+        
+        # Geglättete Trust Scores gebündelt speichern
+        self.flush_score_state()
+        
+        # Sortiere nach Suspicion Score (höchste zuerst)
+        records.sort(key=CustomerScoreRecord.sort_key, reverse=True)
+        
+        return records
+    
+    def analyze_top_customers(
+        self,
+        k: int,
+        min_risk_level: RiskLevel = RiskLevel.YELLOW,
+        recent_days: int = 30
+    ) -> List[CustomerScoreRecord]:
+        """
+        Ermittelt die K Kunden mit dem höchsten Suspicion Score
+        
+        Kunden werden nach ihrer Score-Obergrenze aus der Vorprüfung absteigend
+        analysiert; ein Heap hält die besten K. Sobald die Obergrenze des
+        nächsten Kunden den K-ten Score nicht mehr übertrifft (oder das
+        Mindest-Level nicht erreichen kann), endet die Suche.
+        
+        Args:
+            k: Anzahl gesuchter Kunden
+            min_risk_level: Minimales Risiko-Level
+            recent_days: Zeitfenster für aktuelle Analyse
+            
+        Returns:
+            Liste von CustomerScoreRecord (höchster Score zuerst, maximal k)
+        """
+        levels = list(RiskLevel)
+        min_index = levels.index(min_risk_level)
+        
+        if k <= 0:
+            return []
+        
+        # Obergrenzen gibt es nur für das TP/SP-System
+        if not self.use_tp_sp_system:
+            records = self.analyze_all_customer_records(recent_days=recent_days)
+            return [r for r in records if levels.index(r.risk_level) >= min_index][:k]
+        
+        indicators = self.prescreen_customers(recent_days)
+        order = {customer_id: i for i, customer_id in enumerate(self.transaction_history.keys())}
+        
+        # Geteilte Populations-Statistiken für Peer-Vergleiche und Clustering
+        population = self.get_population_context()
+        
+        candidates = []
+        if not indicators.empty:
+            candidates = indicators['score_upper_bound'].sort_values(ascending=False, kind='stable')
+            candidates = list(candidates.items())
+        
+        if self.score_store is not None:
+            self.score_store.prefetch(cid for cid, _ in candidates)
+        if self.baseline_store is not None:
+            self.baseline_store.prefetch(cid for cid, _ in candidates)
+        
+        # Min-Heap (Score, -Reihenfolge, Datensatz): Wurzel = aktuell K-ter Platz
+        heap = []
+        n_analyzed = 0
+        for customer_id, bound in candidates:
+            if levels.index(self.determine_risk_level(bound)) < min_index:
+                break  # Kein weiterer Kunde kann das Mindest-Level erreichen
+            if len(heap) >= k and bound <= heap[0][0]:
+                break  # Kein weiterer Kunde kann in die Top-K
+            
+            record = self._analyze_customer_safe(customer_id, recent_days, population)
+            n_analyzed += 1
+            if record is None or levels.index(record.risk_level) < min_index:
                 continue
+            
+            entry = (record.suspicion_score, -order[customer_id], record)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        # Kunden ohne Transaktionen im Zeitfenster (Score 0) nur für GREEN
+        if min_index == 0 and len(heap) < k:
+            for customer_id in self.transaction_history.keys():
+                if len(heap) >= k:
+                    break
+                if indicators.empty or customer_id not in indicators.index:
+                    heapq.heappush(heap, (0.0, -order[customer_id], self._default_record(customer_id)))
+        
+        self.flush_score_state()
+        print(f"[INFO] Top-{k}: {n_analyzed} von {len(self.transaction_history)} Kunden voll analysiert")
+        
+        heap.sort(key=lambda entry: entry[:2], reverse=True)
+        return [record for _, _, record in heap]
+    
+    def analyze_all_customers_budgeted(
+        self,
+        time_budget_seconds: float,
+        recent_days: int = 30,
+        prescreen: bool = True
+    ) -> BudgetedAnalysisResult:
+        """
+        Zeitbegrenzte Analyse aller Kunden in Prioritätsreihenfolge
+        
+        Reihenfolge:
+        1. Im letzten Lauf zurückgestellte Kunden (self.deferred_customers)
+        2. Übrige Kunden nach Risiko-Prior absteigend (Bar-Volumen nah unter
+           10.000€, aktuelle Aktivität; siehe PreScreener)
+        
+        Nach Ablauf des Budgets werden keine weiteren Kunden begonnen; die
+        restlichen Kunden werden zurückgestellt und im nächsten Lauf zuerst
+        analysiert.
+        
+        Args:
+            time_budget_seconds: Zeitbudget in Sekunden
+            recent_days: Zeitfenster für aktuelle Analyse
+            prescreen: Garantiert unauffällige Kunden ohne Vollanalyse (nur TP/SP-System)
+            
+        Returns:
+            BudgetedAnalysisResult mit fertigen Profilen und zurückgestellten Kunden
+        """
+        start = time.monotonic()
+        records = []
+        
+        # Geteilte Populations-Statistiken für Peer-Vergleiche und Clustering
+        population = self.get_population_context()
+        
+        # Risiko-Prior (und ggf. Score-Obergrenze) in einem Durchgang
+        indicators = self.prescreen_customers(recent_days)
+        screened = indicators if prescreen and self.use_tp_sp_system else None
+        
+        # Kunden ohne Transaktionen im Zeitfenster kosten nichts
+        pending = []
+        for customer_id in self.transaction_history.keys():
+            if indicators.empty or customer_id not in indicators.index:
+                records.append(self._default_record(customer_id))
+            else:
+                pending.append(customer_id)
+        
+        # Priorität: Übertrag aus letztem Lauf, dann Risiko-Prior
+        carried = [cid for cid in self.deferred_customers if cid in indicators.index]
+        carried_set = set(carried)
+        rest = [cid for cid in pending if cid not in carried_set]
+        if rest:
+            rest = list(indicators.loc[rest, 'risk_prior'].sort_values(ascending=False, kind='stable').index)
+        ordered = carried + rest
+        
+        # Vorherige Trust Scores gebündelt laden
+        if self.score_store is not None:
+            self.score_store.prefetch(ordered)
+        if self.baseline_store is not None:
+            self.baseline_store.prefetch(ordered)
+        
+        deferred = []
+        for i, customer_id in enumerate(ordered):
+            if time.monotonic() - start >= time_budget_seconds:
+                deferred = ordered[i:]
+                break
+            record = self._analyze_customer_safe(customer_id, recent_days, population, screened)
+            if record is not None:
+                records.append(record)
+        
+        self.deferred_customers = deferred
+        if deferred:
+            print(f"[INFO] Zeitbudget von {time_budget_seconds:.1f}s erreicht: "
+                  f"{len(deferred)} Kunden zurückgestellt")
+        
+        # Geglättete Trust Scores gebündelt speichern
+        self.flush_score_state()
         
         # Sortiere nach Suspicion Score (höchste zuerst)
-        profiles.sort(key=lambda p: p.suspicion_score, reverse=True)
+        records.sort(key=CustomerScoreRecord.sort_key, reverse=True)
         
-        return profiles
-
+        return BudgetedAnalysisResult(
+            profiles=[self.materialize_profile(record) for record in records],
+            deferred_customers=deferred,
+            budget_exhausted=bool(deferred),
+            elapsed_seconds=time.monotonic() - start
+        )
+    
+    def set_current_record(self, customer_id: str, record: CustomerScoreRecord):
+        """
+        Legt den laufenden Datensatz eines Kunden ab (tick, Echtzeit-Bewertung)
+        
+        Args:
+            customer_id: Kunden-ID
+            record: Neuer Datensatz
+        """
+        with self._records_lock:
+            self.current_records[customer_id] = record
+            self._records_version += 1
+    
+    def drop_current_record(self, customer_id: str):
+        """
+        Entfernt den laufenden Datensatz eines Kunden (z.B. nach Retention)
+        
+        Args:
+            customer_id: Kunden-ID
+        """
+        with self._records_lock:
+            if self.current_records.pop(customer_id, None) is not None:
+                self._records_version += 1
+    
+    def published_records(self) -> Tuple[int, Dict[str, CustomerScoreRecord]]:
+        """
+        Zuletzt veröffentlichter Stand der laufenden Datensätze
+        
+        Ohne Neubewertung und ohne Schreibsperre des Analyzers (Lese-Endpunkte);
+        tick() läuft in der periodischen Aktualisierung. Die Kopie wird nur
+        nach Änderungen neu erstellt und darf nicht verändert werden.
+        
+        Returns:
+            Tuple (Version, Dict Kunden-ID → CustomerScoreRecord)
+        """
+        with self._records_lock:
+            version = self._records_version
+            if self._published_records[0] != version:
+                self._published_records = (version, dict(self.current_records))
+            return self._published_records
+    
+    def tick(self, reference_time: Optional[datetime] = None) -> List[str]:
+        """
+        Hält current_records aktuell: bewertet nur Kunden neu, deren Zeitfenster
+        sich seit dem letzten Aufruf geändert haben (neue Transaktionen,
+        geänderte CustomerInfo oder aus einem Fenster gefallene Transaktionen)
+        
+        Args:
+            reference_time: Referenzzeitpunkt (Standard: get_reference_time();
+                            bei Angabe werden spätere Transaktionen ignoriert)
+            
+        Returns:
+            Liste der neu bewerteten Kunden-IDs
+        """
+        if not self.live_state:
+            raise RuntimeError("tick() erfordert einen Analyzer mit live_state=True")
+        
+        reference = reference_time if reference_time is not None else self.get_reference_time()
+        scheduler = self.expiry_scheduler
+        
+        if scheduler.clock is not None and reference < scheduler.clock:
+            # Referenz zurückgesprungen (z.B. Wechsel auf historische Daten): alles neu
+            scheduler.reset(reference, (
+                (customer_id, t.timestamp)
+                for customer_id, txns in self.transaction_history.items()
+                for t in txns
+            ))
+        else:
+            scheduler.advance(reference)
+        
+        dirty = sorted(scheduler.pop_dirty())
+        if not dirty:
+            return []
+        
+        population = self.get_population_context()
+        for customer_id in dirty:
+            record = self._analyze_customer_safe(
+                customer_id,
+                self.REFRESH_RECENT_DAYS,
+                population,
+                as_of=reference_time
+            )
+            if record is not None:
+                self.set_current_record(customer_id, record)
+        
+        return dirty
+    
+    def apply_retention(self) -> int:
+        """
+        Entfernt Transaktionen außerhalb der Aufbewahrungsfrist bzw. über dem
+        Speicherbudget (siehe retention.RetentionPolicy)
+        
+        Betroffene Kunden werden für den nächsten tick() markiert; Kunden ohne
+        verbleibende Transaktionen verlieren ihren laufenden Datensatz.
+        
+        Returns:
+            Anzahl betroffener Kunden
+        """
+        if self.retention_policy is None:
+            return 0
+        
+        affected = self.retention_policy.apply(
+            self.history_store,
+            self.get_reference_time(),
+            on_evict=self.deduplicator.age_out if self.deduplicator is not None else None
+        )
+        self.transaction_history = self.history_store.current
+        
+        reference = self.get_reference_time()
+        for customer_id in affected:
+            # Streaming-Zustand neu aufsetzen (Speicherbudget kann auch
+            # Transaktionen im Fenster entfernen)
+            self.live_weights.discard(customer_id)
+            self.live_entropies.discard(customer_id)
+            self.live_activity.discard(customer_id)
+            self.live_bases.pop(customer_id, None)
+            if customer_id not in self.transaction_history:
+                self.drop_current_record(customer_id)
+            elif self.live_state:
+                self.expiry_scheduler.dirty.add(customer_id)
+                self.live_weights.add(self.transaction_history[customer_id], reference)
+                self.live_entropies.add(self.transaction_history[customer_id], reference)
+                self.live_activity.add(self.transaction_history[customer_id], reference)
+        
+        return len(affected)
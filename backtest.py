@@ -0,0 +1,212 @@
+"""
+Backtest: Risiko-Level "zum Stichtag" über einen Zeitraum
+
+Statt pro Stichtag die Daten abzuschneiden und einen neuen TransactionAnalyzer
+aufzubauen, wird der Referenzzeitpunkt schrittweise vorgeschoben. Der Score
+eines Kunden hängt nur vom Inhalt seiner Zeitfenster ab; dieser ändert sich
+nur, wenn eine Transaktion
+- sichtbar wird (timestamp <= Stichtag),
+- das aktuelle Fenster verlässt (timestamp + recent_days) oder
+- das historische Fenster verlässt (timestamp + historical_days).
+
+Alle Ereigniszeitpunkte werden einmal sortiert; pro Schritt werden nur Kunden
+mit einem Ereignis seit dem letzten Stichtag neu bewertet, alle anderen
+übernehmen ihr Ergebnis. Der Aufwand liegt damit nahe an einem Gesamtlauf
+statt an einem Lauf pro Stichtag.
+
+Peer-Vergleich und Clustering (fließen nicht in den Score ein) sind im
+Backtest deaktiviert, damit keine Transaktionen nach dem Stichtag einfließen.
+Bewertet wird nur die Ausgabe "score" (evaluation_plan.SCORE_ONLY): Trust
+Score und Flags werden pro Stichtag nicht berechnet.
+"""
+
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from models import BacktestResult, RiskLevel
+from analyzer import TransactionAnalyzer
+from population_context import CustomerTimeline
+from profile_record import CustomerScoreRecord
+import evaluation_plan
+
+
+class BacktestEngine:
+    """
+    Inkrementeller Stichtags-Sweep über die Daten eines TransactionAnalyzer
+    """
+
+    def __init__(self, analyzer: TransactionAnalyzer):
+        """
+        Args:
+            analyzer: Analyzer mit den Transaktionen und Parametern (alpha, beta,
+                      historical_days, Score-System) für den Backtest
+        """
+        self.analyzer = analyzer
+
+    def _create_scorer(self) -> TransactionAnalyzer:
+        """
+        Eigener Analyzer für den Backtest
+
+        Teilt Transaktionen und Kunden-Infos, hat aber einen eigenen
+        Trust-Score-Zustand (kein Score-Store), damit der Backtest die
+        Glättung der Live-Analyse nicht verändert.
+        """
+        scorer = TransactionAnalyzer(
+            alpha=self.analyzer.alpha,
+            beta=self.analyzer.beta,
+            historical_days=self.analyzer.historical_days,
+            use_tp_sp_system=self.analyzer.use_tp_sp_system,
+            cost_model=self.analyzer.cost_model
+        )
+        scorer.transaction_history = self.analyzer.transaction_history
+        scorer.customer_info = self.analyzer.customer_info
+        return scorer
+
+    def _event_index(self, customer_ids: List[str], recent_days: int):
+        """
+        Sortierte Ereigniszeitpunkte aller Kunden
+
+        Returns:
+            Tuple ((Eintrittszeiten, Kunden-Index), (Austrittszeiten, Kunden-Index))
+        """
+        historical_days = self.analyzer.historical_days
+        entry_times, entry_customers = [], []
+        exit_times, exit_customers = [], []
+
+        for idx, customer_id in enumerate(customer_ids):
+            times = np.array(
+                [t.timestamp for t in self.analyzer.transaction_history[customer_id] if t.timestamp],
+                dtype='datetime64[us]'
+            )
+            if len(times) == 0:
+                continue
+            entry_times.append(times)
+            entry_customers.append(np.full(len(times), idx))
+            exit_times.append(times + np.timedelta64(recent_days, 'D'))
+            exit_times.append(times + np.timedelta64(historical_days, 'D'))
+            exit_customers.append(np.full(2 * len(times), idx))
+
+        def _sorted(times: List[np.ndarray], customers: List[np.ndarray]):
+            if not times:
+                return np.array([], dtype='datetime64[us]'), np.array([], dtype=int)
+            all_times = np.concatenate(times)
+            all_customers = np.concatenate(customers)
+            order = np.argsort(all_times, kind='stable')
+            return all_times[order], all_customers[order]
+
+        return _sorted(entry_times, entry_customers), _sorted(exit_times, exit_customers)
+
+    def run(
+        self,
+        start: datetime,
+        end: datetime,
+        step_days: int = 7,
+        recent_days: int = 30
+    ) -> BacktestResult:
+        """
+        Berechnet die Risiko-Level aller Kunden zu jedem Stichtag
+
+        Args:
+            start: Erster Stichtag
+            end: Letzter möglicher Stichtag (inklusive)
+            step_days: Abstand der Stichtage in Tagen
+            recent_days: Zeitfenster für aktuelle Analyse
+
+        Returns:
+            BacktestResult mit einer Zeitreihe pro Kunde (None = Kunde zum
+            Stichtag noch ohne Transaktionen)
+        """
+        if step_days <= 0:
+            raise ValueError("step_days muss größer als 0 sein")
+        if not recent_days or recent_days <= 0:
+            raise ValueError("recent_days muss größer als 0 sein")
+        if end < start:
+            raise ValueError("end muss nach start liegen")
+
+        scorer = self._create_scorer()
+        customer_ids = sorted(self.analyzer.transaction_history.keys())
+        (entry_times, entry_customers), (exit_times, exit_customers) = self._event_index(
+            customer_ids, recent_days
+        )
+
+        dates: List[datetime] = []
+        current = start
+        while current <= end:
+            dates.append(current)
+            current += timedelta(days=step_days)
+
+        timelines: Dict[str, CustomerTimeline] = {}
+        records: Dict[str, Optional[CustomerScoreRecord]] = {cid: None for cid in customer_ids}
+        risk_levels: Dict[str, List[Optional[RiskLevel]]] = {cid: [] for cid in customer_ids}
+        scores: Dict[str, List[Optional[float]]] = {cid: [] for cid in customer_ids}
+        evaluations = 0
+        reused = 0
+        previous: Optional[np.datetime64] = None
+
+        for as_of in dates:
+            as_of_np = np.datetime64(as_of, 'us')
+
+            if previous is None:
+                # Erster Stichtag: alle bis dahin sichtbaren Kunden bewerten
+                lo = 0
+                hi = int(np.searchsorted(entry_times, as_of_np, side='right'))
+                dirty = set(np.unique(entry_customers[lo:hi]).tolist())
+            else:
+                # Eintritte in (previous, as_of], Austritte in [previous, as_of)
+                lo = int(np.searchsorted(entry_times, previous, side='right'))
+                hi = int(np.searchsorted(entry_times, as_of_np, side='right'))
+                dirty = set(np.unique(entry_customers[lo:hi]).tolist())
+                lo = int(np.searchsorted(exit_times, previous, side='left'))
+                hi = int(np.searchsorted(exit_times, as_of_np, side='left'))
+                dirty.update(np.unique(exit_customers[lo:hi]).tolist())
+
+            for idx in dirty:
+                customer_id = customer_ids[idx]
+                timeline = timelines.get(customer_id)
+                if timeline is None:
+                    timeline = CustomerTimeline(self.analyzer.transaction_history[customer_id])
+                    timelines[customer_id] = timeline
+                records[customer_id] = self._score(scorer, customer_id, timeline, recent_days, as_of)
+                evaluations += 1
+
+            for customer_id in customer_ids:
+                record = records[customer_id]
+                if record is None:
+                    risk_levels[customer_id].append(None)
+                    scores[customer_id].append(None)
+                    continue
+                risk_levels[customer_id].append(record.risk_level)
+                scores[customer_id].append(record.suspicion_score)
+            reused += sum(1 for r in records.values() if r is not None) - len(dirty)
+            previous = as_of_np
+
+        return BacktestResult(
+            dates=dates,
+            risk_levels=risk_levels,
+            suspicion_scores=scores,
+            evaluations=evaluations,
+            reused=reused
+        )
+
+    def _score(
+        self,
+        scorer: TransactionAnalyzer,
+        customer_id: str,
+        timeline: CustomerTimeline,
+        recent_days: int,
+        as_of: datetime
+    ) -> CustomerScoreRecord:
+        """Bewertet einen Kunden zum Stichtag (GREEN/0 ohne aktuelle Transaktionen)"""
+        try:
+            return scorer.analyze_customer_record(
+                customer_id,
+                recent_days=recent_days,
+                all_transactions=[],
+                timeline=timeline,
+                as_of=as_of,
+                outputs=evaluation_plan.SCORE_ONLY
+            )
+        except ValueError as e:
+            if "Keine Transaktionen" in str(e):
+                return scorer._default_record(customer_id)
+            raise
@@ -0,0 +1,398 @@
+"""
+Persistenter Baseline-Store pro Kunde und Fensterkonfiguration
+
+Die Z-Scores von Weight und Entropie vergleichen den aktuellen Wert mit
+Werten über rollierende Fenster (7 Tage Schrittweite) des historischen
+Zeitraums; die Predictability vergleicht mit einem Wert über den gesamten
+historischen Zeitraum. Diese Baselines ändern sich von Lauf zu Lauf kaum und
+werden hier gespeichert:
+
+- Schlüssel: Kunden-ID + Art (z.B. "weight:30@30" = Weight, 30-Tage-Fenster,
+  recent_days=30)
+- Fingerprint des historischen Zeitraums: erster/letzter Timestamp, Anzahl
+  und Inhalts-Prüfsumme (Summe der 64-Bit-Digests aus Transaktions-ID,
+  Betrag, Zahlungsmethode, Transaktionsart und Timestamp; unabhängig von der
+  Reihenfolge gleichzeitiger Transaktionen). Gleiche Timestamps mit anderem
+  Inhalt (z.B. nach Neustart erneut eingelesene, korrigierte Daten) ergeben
+  eine Neuberechnung.
+- Unverändert → Baseline wird übernommen
+- Nur neue Transaktionen am Ende (neue Tage rollen in den Zeitraum) →
+  bestehende Fensterwerte bleiben gültig, nur neue Fenster werden berechnet
+- Sonst (Anfang verschoben, Nachlieferung mitten im Zeitraum) → Neuberechnung
+
+Weight-Werte enthalten den Decay relativ zu "heute"; gespeicherte Werte
+werden beim Laden mit exp(-λ × vergangene Tage) auf heute umgerechnet.
+
+Persistenz wie ScoreStateStore: SQLite-Datei, LRU im Arbeitsspeicher,
+gebündeltes Laden (prefetch) und Schreiben (flush).
+"""
+
+import json
+import sqlite3
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Berechnet Fensterwerte ab Fensterende `resume` (None = erstes Fenster)
+# und liefert (Werte, nächstes Fensterende)
+RollingCompute = Callable[[Optional[np.datetime64]], Tuple[List[float], Optional[np.datetime64]]]
+
+
+class BaselineEntry:
+    """
+    Gespeicherte Baseline eines Kunden für eine Fensterkonfiguration
+    """
+
+    __slots__ = ('first', 'last', 'n', 'digest', 'resume', 'day', 'values')
+
+    def __init__(
+        self,
+        first: int,
+        last: int,
+        n: int,
+        digest: Optional[int],
+        resume: Optional[int],
+        day: int,
+        values: List[float]
+    ):
+        """
+        Args:
+            first: Erster Timestamp des historischen Zeitraums (µs seit Epoch)
+            last: Letzter Timestamp des historischen Zeitraums (µs seit Epoch)
+            n: Anzahl Transaktionen im historischen Zeitraum
+            digest: Inhalts-Prüfsumme der n Transaktionen (None = unbekannt,
+                    Eintrag wird nicht übernommen)
+            resume: Ende des nächsten noch nicht berechneten Fensters (µs)
+            day: Tag (seit Epoch), auf den der Decay der Werte bezogen ist
+            values: Fensterwerte bzw. Einzelwert
+        """
+        self.first = first
+        self.last = last
+        self.n = n
+        self.digest = digest
+        self.resume = resume
+        self.day = day
+        self.values = values
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "first": self.first, "last": self.last, "n": self.n, "digest": self.digest,
+            "resume": self.resume, "day": self.day, "values": self.values
+        })
+
+    @classmethod
+    def from_json(cls, payload: str) -> "BaselineEntry":
+        data = json.loads(payload)
+        return cls(
+            data["first"], data["last"], data["n"], data.get("digest"),
+            data["resume"], data["day"], data["values"]
+        )
+
+
+class BaselineStore:
+    """
+    Speicher (Kunden-ID, Art) → BaselineEntry mit inkrementeller Fortschreibung
+    """
+
+    # SQLite erlaubt max. 999 Parameter pro Statement
+    _BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        max_entries: int = 200000,
+        autoflush_threshold: int = 5000
+    ):
+        """
+        Args:
+            db_path: Pfad zur SQLite-Datei (None = nur In-Memory, nicht persistent)
+            max_entries: Maximale Anzahl Baselines im Arbeitsspeicher (LRU)
+            autoflush_threshold: Schreibe automatisch, sobald so viele Änderungen offen sind
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max_entries
+        self.autoflush_threshold = autoflush_threshold
+
+        self._cache: "OrderedDict[Tuple[str, str], BaselineEntry]" = OrderedDict()
+        self._dirty: Dict[Tuple[str, str], BaselineEntry] = {}
+        self._loaded: set = set()  # Kunden, deren Baselines bereits aus der DB geladen sind
+        self._absent: set = set()  # Kunden ohne Baselines in der DB (begrenzt)
+        self._lock = threading.RLock()
+
+        # Zähler
+        self.reused = 0
+        self.extended = 0
+        self.recomputed = 0
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS baselines ("
+                " customer_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " PRIMARY KEY (customer_id, kind))"
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Baselines
+    # ------------------------------------------------------------------
+
+    def rolling_values(
+        self,
+        customer_id: str,
+        kind: str,
+        times: np.ndarray,
+        digests: np.ndarray,
+        compute: RollingCompute,
+        decay_rate: float = 0.0,
+        today: int = 0
+    ) -> List[float]:
+        """
+        Fensterwerte der rollierenden Baseline (gespeichert, fortgeschrieben
+        oder neu berechnet)
+
+        Args:
+            customer_id: Kunden-ID
+            kind: Art der Baseline (inkl. Fensterkonfiguration)
+            times: Sortierte Timestamps des historischen Zeitraums (datetime64[us])
+            digests: Inhalts-Digests der Transaktionen in gleicher Reihenfolge
+                     (uint64, siehe CustomerTimeline.digests_in)
+            compute: Berechnung der Fensterwerte ab einem Fensterende
+            decay_rate: Decay pro Tag, der in den Werten enthalten ist (0 = keiner)
+            today: Bezugstag des Decays (Tage seit Epoch)
+
+        Returns:
+            Fensterwerte wie bei vollständiger Berechnung
+        """
+        if len(times) == 0:
+            return compute(None)[0]
+
+        first, last, n, digest = self._fingerprint(times, digests)
+        key = (customer_id, kind)
+        entry = self._get(key)
+
+        if entry is not None and self._extends(entry, times, digests, first):
+            values = self._rescaled(entry, decay_rate, today)
+            resume = entry.resume
+            if n == entry.n:
+                self.reused += 1
+                if entry.day == today:
+                    return list(values)
+            else:
+                # Neue Transaktionen am Ende: Fenster bis zum letzten Stand bleiben gültig
+                start = np.datetime64(resume, 'us') if resume is not None else None
+                new_values, next_resume = compute(start)
+                values = values + new_values
+                resume = self._to_us(next_resume) if next_resume is not None else resume
+                self.extended += 1
+        else:
+            values, next_resume = compute(None)
+            resume = self._to_us(next_resume)
+            self.recomputed += 1
+
+        self._put(key, BaselineEntry(first, last, n, digest, resume, today, list(values)))
+        return list(values)
+
+    def exact_value(
+        self,
+        customer_id: str,
+        kind: str,
+        times: np.ndarray,
+        digests: np.ndarray,
+        compute: Callable[[], float]
+    ) -> float:
+        """
+        Einzelwert über den gesamten historischen Zeitraum (nur bei
+        unverändertem Zeitraum übernommen)
+
+        Args:
+            customer_id: Kunden-ID
+            kind: Art der Baseline
+            times: Sortierte Timestamps des historischen Zeitraums (datetime64[us])
+            digests: Inhalts-Digests der Transaktionen in gleicher Reihenfolge
+            compute: Berechnung des Werts
+
+        Returns:
+            Wert wie bei vollständiger Berechnung
+        """
+        if len(times) == 0:
+            return compute()
+
+        fingerprint = self._fingerprint(times, digests)
+        key = (customer_id, kind)
+        entry = self._get(key)
+        if entry is not None and (entry.first, entry.last, entry.n, entry.digest) == fingerprint:
+            self.reused += 1
+            return entry.values[0]
+
+        value = compute()
+        self.recomputed += 1
+        self._put(key, BaselineEntry(*fingerprint, None, 0, [float(value)]))
+        return value
+
+    @staticmethod
+    def _to_us(value: Optional[np.datetime64]) -> Optional[int]:
+        if value is None:
+            return None
+        return int(np.datetime64(value, 'us').astype(np.int64))
+
+    @staticmethod
+    def _digest(digests: np.ndarray, n: int) -> int:
+        """Inhalts-Prüfsumme der ersten n Transaktionen (Summe modulo 2^64)"""
+        return int(np.sum(digests[:n], dtype=np.uint64))
+
+    @classmethod
+    def _fingerprint(cls, times: np.ndarray, digests: np.ndarray) -> Tuple[int, int, int, int]:
+        return cls._to_us(times[0]), cls._to_us(times[-1]), len(times), cls._digest(digests, len(times))
+
+    @classmethod
+    def _extends(cls, entry: BaselineEntry, times: np.ndarray, digests: np.ndarray, first: int) -> bool:
+        """Ist der Zeitraum der gespeicherte (gleicher Inhalt) plus (ggf.) neue Transaktionen am Ende?"""
+        n = len(times)
+        if entry.first != first or entry.n > n:
+            return False
+        if cls._to_us(times[entry.n - 1]) != entry.last:
+            return False
+        # Keine Nachlieferung mit gleichem oder früherem Timestamp
+        if entry.n < n and cls._to_us(times[entry.n]) <= entry.last:
+            return False
+        return entry.digest is not None and cls._digest(digests, entry.n) == entry.digest
+
+    @staticmethod
+    def _rescaled(entry: BaselineEntry, decay_rate: float, today: int) -> List[float]:
+        """Werte mit Decay-Bezug auf heute"""
+        if decay_rate == 0.0 or entry.day == today:
+            return entry.values
+        factor = float(np.exp(-decay_rate * (today - entry.day)))
+        return [v * factor for v in entry.values]
+
+    # ------------------------------------------------------------------
+    # Gebündelte Zugriffe
+    # ------------------------------------------------------------------
+
+    def prefetch(self, customer_ids: Iterable[str]):
+        """
+        Lädt die Baselines mehrerer Kunden in einem Durchgang aus der DB
+
+        Args:
+            customer_ids: Kunden-IDs des anstehenden Analyse-Laufs
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            missing = [
+                cid for cid in customer_ids
+                if cid not in self._loaded and cid not in self._absent
+            ]
+            missing = missing[:self.max_entries]
+
+            for start in range(0, len(missing), self._BATCH_SIZE):
+                batch = missing[start:start + self._BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT customer_id, kind, payload FROM baselines "
+                    f"WHERE customer_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                found = set()
+                for customer_id, kind, payload in rows:
+                    key = (customer_id, kind)
+                    if key not in self._cache:
+                        self._cache[key] = BaselineEntry.from_json(payload)
+                    found.add(customer_id)
+                self._loaded.update(found)
+                self._absent.update(cid for cid in batch if cid not in found)
+                if len(self._absent) > self.max_entries:
+                    self._absent.clear()
+
+            self._evict()
+
+    def flush(self):
+        """
+        Schreibt alle geänderten Baselines gebündelt in die DB
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [
+                (customer_id, kind, entry.to_json())
+                for (customer_id, kind), entry in self._dirty.items()
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO baselines (customer_id, kind, payload) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._dirty.clear()
+
+    def clear(self):
+        """
+        Löscht alle gespeicherten Baselines (Arbeitsspeicher und DB)
+        """
+        with self._lock:
+            self._cache.clear()
+            self._dirty.clear()
+            self._loaded.clear()
+            self._absent.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM baselines")
+                self._conn.commit()
+
+    def close(self):
+        """Schreibt offene Änderungen und schließt die DB-Verbindung"""
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Interne Helfer
+    # ------------------------------------------------------------------
+
+    def _get(self, key: Tuple[str, str]) -> Optional[BaselineEntry]:
+        """Baseline aus LRU-Cache, offenen Änderungen oder DB"""
+        with self._lock:
+            entry = self._cache.get(key) or self._dirty.get(key)
+            if (
+                entry is None and self._conn is not None
+                and key[0] not in self._loaded and key[0] not in self._absent
+            ):
+                row = self._conn.execute(
+                    "SELECT payload FROM baselines WHERE customer_id = ? AND kind = ?",
+                    key
+                ).fetchone()
+                if row is not None:
+                    entry = BaselineEntry.from_json(row[0])
+            if entry is not None:
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+                self._evict()
+            return entry
+
+    def _put(self, key: Tuple[str, str], entry: BaselineEntry):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            self._absent.discard(key[0])
+            if self._conn is not None:
+                self._dirty[key] = entry
+            self._evict()
+            if len(self._dirty) >= self.autoflush_threshold:
+                self.flush()
+
+    def _evict(self):
+        """LRU-Verdrängung; noch nicht geschriebene Baselines bleiben in _dirty erhalten"""
+        while len(self._cache) > self.max_entries:
+            key, _ = self._cache.popitem(last=False)
+            self._loaded.discard(key[0])
@@ -0,0 +1,136 @@
+"""
+Kostenmodell pro Kunde für Kunden mit sehr vielen Transaktionen
+
+Die Analysekosten eines Kunden werden aus der Transaktionsanzahl vorhergesagt
+(Einheit: Transaktions-Durchläufe). Velocity, Layering und Weight laufen in
+linearer Zeit exakt; teuerster verbleibender Teil ist die rollierende
+Entropie-Baseline (30-Tage-Fenster mit 7 Tagen Schrittweite → jede historische
+Transaktion wird ca. 4,3-mal ausgewertet).
+
+Überschreitet die Vorhersage das Limit, wird die Entropie-Baseline auf einer
+deterministischen, nach Zeitraum geschichteten Stichprobe der historischen
+Transaktionen berechnet und das Profil als "approximated" markiert.
+"""
+
+from typing import List
+from models import Transaction
+
+
+class CustomerCostModel:
+    """
+    Vorhersage der Analysekosten eines Kunden und Kappung
+    """
+
+    # Durchläufe pro Transaktion (lineare Detektoren)
+    LINEAR_PASSES = 1.0
+    # Überlappung der rollierenden Entropie-Fenster (30 Tage / 7 Tage Schritt)
+    ENTROPY_WINDOW_OVERLAP = 30.0 / 7.0
+
+    def __init__(self, max_cost: float = 100000.0, min_sample_size: int = 500, stratum_days: int = 7):
+        """
+        Args:
+            max_cost: Kostenlimit pro Kunde (Transaktions-Durchläufe)
+            min_sample_size: Mindestgröße der Stichprobe im gekappten Modus
+            stratum_days: Schichtbreite der Stichprobe in Tagen
+        """
+        self.max_cost = max_cost
+        self.min_sample_size = min_sample_size
+        self.stratum_days = stratum_days
+
+    def predict(self, n_recent: int, n_historical: int) -> float:
+        """
+        Vorhergesagte Kosten der Kundenanalyse
+
+        Args:
+            n_recent: Anzahl aktueller Transaktionen
+            n_historical: Anzahl historischer Transaktionen
+
+        Returns:
+            Kosten in Transaktions-Durchläufen
+        """
+        return (
+            self.LINEAR_PASSES * (n_recent + n_historical)
+            + self.ENTROPY_WINDOW_OVERLAP * n_historical
+        )
+
+    def is_capped(self, n_recent: int, n_historical: int) -> bool:
+        """Überschreitet die Analyse das Kostenlimit?"""
+        return self.predict(n_recent, n_historical) > self.max_cost
+
+    def baseline_sample_size(self, n_recent: int, n_historical: int) -> int:
+        """
+        Größe der Stichprobe für die Entropie-Baseline im gekappten Modus
+
+        Das nach den linearen Anteilen verbleibende Budget wird auf die
+        Entropie-Fenster verteilt (mindestens min_sample_size).
+        """
+        remaining = self.max_cost - self.LINEAR_PASSES * (n_recent + n_historical)
+        size = int(remaining / self.ENTROPY_WINDOW_OVERLAP)
+        return min(n_historical, max(self.min_sample_size, size))
+
+    def entropy_baseline(self, recent: List[Transaction], historical: List[Transaction]) -> List[Transaction]:
+        """
+        Historische Transaktionen für die Entropie-Baseline (ggf. Stichprobe)
+
+        Returns:
+            historical unverändert oder geschichtete Stichprobe
+        """
+        if not self.is_capped(len(recent), len(historical)):
+            return historical
+        return stratified_sample(
+            historical,
+            self.baseline_sample_size(len(recent), len(historical)),
+            self.stratum_days
+        )
+
+
+def stratified_sample(
+    transactions: List[Transaction],
+    sample_size: int,
+    stratum_days: int = 7
+) -> List[Transaction]:
+    """
+    Deterministische, nach Zeitraum geschichtete Stichprobe
+
+    Schichten sind Zeiträume von stratum_days Tagen; jede Schicht erhält
+    proportional zu ihrer Größe Plätze (größte Reste), innerhalb der Schicht
+    werden gleichmäßig verteilte Transaktionen gewählt. Damit bleibt die
+    zeitliche Verteilung (und die Belegung der rollierenden Fenster) erhalten.
+
+    Args:
+        transactions: Transaktionen (ohne Timestamp werden ignoriert)
+        sample_size: Gewünschte Stichprobengröße
+        stratum_days: Schichtbreite in Tagen
+
+    Returns:
+        Stichprobe nach Timestamp sortiert
+    """
+    txns = sorted([t for t in transactions if t.timestamp], key=lambda t: t.timestamp)
+    n = len(txns)
+    if sample_size >= n:
+        return txns
+    if sample_size <= 0:
+        return []
+
+    # Schichten: zusammenhängende Bereiche gleicher Periode
+    boundaries = [0]
+    for i in range(1, n):
+        if txns[i].timestamp.toordinal() // stratum_days != txns[i - 1].timestamp.toordinal() // stratum_days:
+            boundaries.append(i)
+    boundaries.append(n)
+    sizes = [boundaries[s + 1] - boundaries[s] for s in range(len(boundaries) - 1)]
+
+    # Proportionale Zuteilung nach der Methode der größten Reste
+    quotas = [size * sample_size / n for size in sizes]
+    allocation = [int(q) for q in quotas]
+    remainder = sample_size - sum(allocation)
+    by_remainder = sorted(range(len(sizes)), key=lambda s: (-(quotas[s] - allocation[s]), s))
+    for s in by_remainder[:remainder]:
+        allocation[s] += 1
+
+    sample = []
+    for s, count in enumerate(allocation):
+        start, size = boundaries[s], sizes[s]
+        for j in range(count):
+            sample.append(txns[start + int((j + 0.5) * size / count)])
+    return sample
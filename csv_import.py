@@ -0,0 +1,376 @@
+"""
+Einlesen hochgeladener Transaktions-CSVs
+
+Uploads werden nicht als Ganzes in den Speicher gelesen: spool_upload()
+schreibt sie in eine Datei, die Parser lesen diese blockweise
+(CHUNK_ROWS Zeilen) und liefern die Transaktionen pro Block. Der Aufrufer
+fügt jeden Block direkt in den Analyzer ein; der Speicherbedarf des Parsens
+hängt damit von der Blockgröße ab, nicht von der Dateigröße.
+
+Das Encoding wird einmal aus dem Dateianfang bestimmt (detect_encoding);
+die Datei wird danach in einem Durchgang dekodiert. Alle Spalten werden als
+Text gelesen, damit Kundennummern u.ä. in jedem Block gleich interpretiert
+werden. Fehler im Dateiformat werden als
+ValueError gemeldet.
+
+Unterstützte Formate:
+1. Englisch: customer_id,transaction_id,customer_name,transaction_amount,payment_method,transaction_type,timestamp
+2. Deutsch: Datum,Uhrzeit,Timestamp,Kundennummer,Unique Transaktion ID,Vollständiger Name,Auftragsvolumen,In/Out,Art
+"""
+
+import codecs
+import shutil
+import uuid
+import pandas as pd
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, Optional, Set, Tuple
+from models import Transaction
+
+# Zeilen pro Block
+CHUNK_ROWS = 50_000
+
+# Fortschrittsmeldung alle N Zeilen
+PROGRESS_EVERY_ROWS = 1000
+
+# Lesepuffer für Spooling
+READ_BLOCK_BYTES = 1 << 20
+
+# Umfang des Dateianfangs für die Encoding-Erkennung
+SNIFF_BYTES = 64 * 1024
+
+# Byte-Order-Marks → Encoding (UTF-32 vor UTF-16 prüfen, gleiche Anfangsbytes)
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# In Windows-1252 nicht belegte Bytes (kommen dort nicht vor)
+CP1252_UNDEFINED = frozenset(b'\x81\x8d\x8f\x90\x9d')
+
+# Fehlerbehandlung für UTF-8: ungültige Bytes nach dem geprüften Anfang
+# werden als Windows-1252 gelesen (z.B. erster Umlaut spät in einer
+# sonst reinen ASCII-Datei)
+UTF8_FALLBACK_ERRORS = 'clara-cp1252-fallback'
+
+
+def _decode_cp1252_fallback(error: UnicodeDecodeError):
+    invalid = error.object[error.start:error.end]
+    text = ''.join(
+        chr(byte) if byte in CP1252_UNDEFINED else bytes([byte]).decode('windows-1252')
+        for byte in invalid
+    )
+    return text, error.end
+
+
+codecs.register_error(UTF8_FALLBACK_ERRORS, _decode_cp1252_fallback)
+
+ENGLISH_COLUMNS = [
+    'customer_id', 'transaction_id', 'customer_name',
+    'transaction_amount', 'payment_method', 'transaction_type'
+]
+
+
+def spool_upload(source: BinaryIO, directory: Path) -> Path:
+    """
+    Schreibt einen Upload blockweise in eine Datei
+
+    Args:
+        source: Geöffneter Upload (z.B. UploadFile.file)
+        directory: Zielverzeichnis
+
+    Returns:
+        Pfad der Datei (der Aufrufer löscht sie nach der Verarbeitung)
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"upload_{uuid.uuid4().hex}.csv"
+    source.seek(0)
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(source, target, READ_BLOCK_BYTES)
+    return path
+
+
+def detect_encoding(path: Path) -> str:
+    """
+    Ermittelt das Encoding aus den ersten SNIFF_BYTES Bytes
+
+    1. Byte-Order-Mark (UTF-8, UTF-16, UTF-32)
+    2. Gültiges UTF-8 (eine am Ende abgeschnittene Sequenz zählt als gültig);
+       reines ASCII gilt ebenfalls als UTF-8
+    3. Sonst Windows-1252 (deutsche Exporte aus Excel), Latin-1 wenn in
+       Windows-1252 nicht belegte Bytes vorkommen
+
+    Args:
+        path: CSV-Datei
+
+    Returns:
+        Name des Encodings (bei utf-8 mit UTF8_FALLBACK_ERRORS lesen)
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(SNIFF_BYTES)
+
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    if CP1252_UNDEFINED.isdisjoint(prefix):
+        return 'windows-1252'
+    return 'latin-1'
+
+
+def _open_chunks(path: Path, chunk_rows: int) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+    """Öffnet die CSV blockweise; liefert (Spalten, Block-Iterator)"""
+    encoding = detect_encoding(path)
+    errors = UTF8_FALLBACK_ERRORS if encoding == 'utf-8' else 'strict'
+    try:
+        columns = list(pd.read_csv(path, encoding=encoding, encoding_errors=errors, nrows=0).columns)
+        reader = pd.read_csv(
+            path, encoding=encoding, encoding_errors=errors, dtype=str, chunksize=chunk_rows
+        )
+    except Exception as e:
+        raise ValueError(f"CSV konnte nicht gelesen werden: {e}")
+    print(f"[INFO] CSV wird mit {encoding} gelesen")
+    return columns, _guarded(reader)
+
+
+def _guarded(reader) -> Iterator[pd.DataFrame]:
+    """Meldet Lesefehler mitten in der Datei als ValueError"""
+    with reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except Exception as e:
+                raise ValueError(f"CSV konnte nicht gelesen werden: {e}")
+            yield chunk
+
+
+def _german_transaction(row, columns: List[str], idx: int, unknown_type: str) -> Transaction:
+    """Wandelt eine Zeile im deutschen Format in eine Transaktion"""
+    # Mapping: Deutsch → Englisch
+    customer_id = str(row['Kundennummer'])
+    transaction_id = str(row['Unique Transaktion ID'])
+    customer_name = str(row['Vollständiger Name'])
+
+    # Betrag: Komma → Punkt konvertieren
+    amount_str = str(row['Auftragsvolumen']).replace(',', '.')
+    transaction_amount = float(amount_str)
+
+    # Zahlungsmethode: "Kredit" → "Kreditkarte"
+    art = str(row['Art']).strip()
+    if art == "Kredit":
+        payment_method = "Kreditkarte"
+    elif art == "Bar":
+        payment_method = "Bar"
+    elif art == "SEPA":
+        payment_method = "SEPA"
+    else:
+        payment_method = art  # Fallback
+
+    # Transaktionstyp: "In/Out" → "investment/auszahlung"
+    in_out = str(row['In/Out']).strip()
+    if in_out == "In":
+        transaction_type = "investment"
+    elif in_out == "Out":
+        transaction_type = "auszahlung"
+    else:
+        transaction_type = unknown_type  # Fallback
+
+    # Timestamp: Kombiniere Datum + Uhrzeit oder nutze Timestamp-Spalte
+    timestamp = None
+    if 'Timestamp' in columns and pd.notna(row['Timestamp']):
+        try:
+            # Format: DD.MM.YYYY
+            date_str = str(row['Timestamp'])
+            timestamp = pd.to_datetime(date_str, format='%d.%m.%Y')
+
+            # Füge Uhrzeit hinzu falls vorhanden
+            if 'Uhrzeit' in columns and pd.notna(row['Uhrzeit']):
+                try:
+                    # Uhrzeit ist ein Dezimalwert (0.663... = Stundenanteil des Tages)
+                    time_str = str(row['Uhrzeit']).replace(',', '.')
+                    time_decimal = float(time_str)
+                    hours = int(time_decimal * 24)
+                    minutes = int((time_decimal * 24 - hours) * 60)
+                    seconds = int(((time_decimal * 24 - hours) * 60 - minutes) * 60)
+                    timestamp = timestamp.replace(hour=hours, minute=minutes, second=seconds)
+                except Exception as e:
+                    pass  # Behalte nur Datum
+        except Exception as e:
+            print(f"[WARN] Timestamp-Parse-Fehler in Zeile {idx+2}: {e}")
+            timestamp = None
+
+    return Transaction(
+        customer_id=customer_id,
+        transaction_id=transaction_id,
+        customer_name=customer_name,
+        transaction_amount=transaction_amount,
+        payment_method=payment_method,
+        transaction_type=transaction_type,
+        timestamp=timestamp
+    )
+
+
+def _english_transaction(row, columns: List[str]) -> Transaction:
+    """Wandelt eine Zeile im englischen Format in eine Transaktion"""
+    timestamp = None
+    if 'timestamp' in columns and pd.notna(row['timestamp']):
+        try:
+            timestamp = pd.to_datetime(row['timestamp'])
+        except:
+            timestamp = None
+
+    return Transaction(
+        customer_id=str(row['customer_id']),
+        transaction_id=str(row['transaction_id']),
+        customer_name=str(row['customer_name']),
+        transaction_amount=float(row['transaction_amount']),
+        payment_method=str(row['payment_method']),
+        transaction_type=str(row['transaction_type']),
+        timestamp=timestamp
+    )
+
+
+def _iter_chunks(
+    chunks: Iterator[pd.DataFrame],
+    convert: Callable,
+    progress: Optional[Callable[[int], None]]
+) -> Iterator[Tuple[List[Transaction], List[int]]]:
+    """Wandelt Blöcke in (Transaktionen, Indizes übersprungener Zeilen)"""
+    rows = 0
+    for chunk in chunks:
+        transactions = []
+        skipped = []
+        # Der Zeilenindex läuft über alle Blöcke weiter
+        for idx, row in chunk.iterrows():
+            if progress is not None and idx and idx % PROGRESS_EVERY_ROWS == 0:
+                progress(idx)
+            try:
+                transactions.append(convert(row, idx))
+            except Exception as e:
+                print(f"[WARN] Fehler beim Parsen von Zeile {idx+2}: {e}")
+                skipped.append(idx)
+        rows += len(chunk)
+        yield transactions, skipped
+
+    if progress is not None:
+        progress(rows)
+
+
+def iter_transactions(
+    path: Path,
+    progress: Optional[Callable[[int], None]] = None,
+    chunk_rows: int = CHUNK_ROWS
+) -> Iterator[List[Transaction]]:
+    """
+    Parst eine CSV im englischen oder deutschen Format blockweise
+
+    Args:
+        path: CSV-Datei (Encoding wird erkannt)
+        progress: Wird alle PROGRESS_EVERY_ROWS Zeilen mit der Anzahl
+                  verarbeiteter Zeilen aufgerufen
+        chunk_rows: Zeilen pro Block
+
+    Yields:
+        Gültige Transaktionen eines Blocks (fehlerhafte Zeilen werden übersprungen)
+
+    Raises:
+        ValueError: CSV nicht lesbar, Pflichtspalten fehlen oder keine gültige
+                    Transaktion (letzteres nach dem letzten Block)
+    """
+    columns, chunks = _open_chunks(path, chunk_rows)
+
+    # Prüfe welches Format vorliegt
+    if 'Kundennummer' in columns:
+        # NEUES FORMAT: Deutsche Spalten
+        print(f"[INFO] Verarbeite NEUES Format (deutsch)")
+        def convert(row, idx):
+            return _german_transaction(row, columns, idx, "investment")
+    else:
+        # ALTES FORMAT: Englische Spalten
+        print(f"[INFO] Verarbeite ALTES Format (englisch)")
+        missing_columns = [col for col in ENGLISH_COLUMNS if col not in columns]
+        if missing_columns:
+            raise ValueError(f"Fehlende Spalten: {', '.join(missing_columns)}")
+        def convert(row, idx):
+            return _english_transaction(row, columns)
+
+    found = False
+    for transactions, _ in _iter_chunks(chunks, convert, progress):
+        found = found or bool(transactions)
+        yield transactions
+
+    if not found:
+        raise ValueError("Keine gültigen Transaktionen in CSV gefunden")
+
+
+def iter_export_transactions(
+    path: Path,
+    skipped_rows: Set[int],
+    progress: Optional[Callable[[int], None]] = None,
+    chunk_rows: int = CHUNK_ROWS
+) -> Iterator[List[Transaction]]:
+    """
+    Parst eine CSV im deutschen Format für den markierten Export blockweise
+
+    Args:
+        path: CSV-Datei (Encoding wird erkannt)
+        skipped_rows: Wird um die Indizes fehlerhafter Zeilen ergänzt (diese
+                      fehlen auch im Export, siehe iter_original_rows)
+        progress: Siehe iter_transactions
+        chunk_rows: Zeilen pro Block
+
+    Yields:
+        Gültige Transaktionen eines Blocks
+
+    Raises:
+        ValueError: CSV nicht lesbar, nicht im deutschen Format oder ohne gültige Transaktion
+    """
+    columns, chunks = _open_chunks(path, chunk_rows)
+
+    if 'Kundennummer' not in columns:
+        raise ValueError("Nur deutsches CSV-Format wird unterstützt")
+
+    def convert(row, idx):
+        return _german_transaction(row, columns, idx, "auszahlung")
+
+    found = False
+    for transactions, skipped in _iter_chunks(chunks, convert, progress):
+        skipped_rows.update(skipped)
+        found = found or bool(transactions)
+        yield transactions
+
+    if not found:
+        raise ValueError("Keine gültigen Transaktionen gefunden")
+
+
+def iter_original_rows(
+    path: Path,
+    skipped_rows: Set[int],
+    chunk_rows: int = CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Liest die Originalzeilen erneut blockweise (für den markierten Export)
+
+    Args:
+        path: CSV-Datei
+        skipped_rows: Indizes fehlerhafter Zeilen (aus iter_export_transactions)
+        chunk_rows: Zeilen pro Block
+
+    Yields:
+        DataFrame-Block der Originalzeilen (Text) ohne übersprungene Zeilen
+    """
+    _, chunks = _open_chunks(path, chunk_rows)
+    for chunk in chunks:
+        if skipped_rows:
+            chunk = chunk[~chunk.index.isin(skipped_rows)]
+        yield chunk
@@ -0,0 +1,219 @@
+"""
+Laufende Aggregate pro Kunde (beim Einfügen fortgeschrieben)
+
+Pro Kunde und Snapshot-Version ein unveränderliches CustomerAggregates-Objekt:
+- Anzahl, Summe, Mittelwert und Varianz der Beträge (Welford)
+- Mittelwert und Varianz der Zwischenankunftszeiten (Welford, zeitlich sortiert)
+- Anzahl pro Zahlungsmethode und Transaktionsart
+- Kumulative Investments, erster/letzter Timestamp
+
+Ein Anhang erzeugt aus dem Aggregat der Vorversion ein neues Objekt in
+O(neue Transaktionen); ältere Snapshots behalten ihr Aggregat. Nur wenn eine
+neue Transaktion vor dem bisher letzten Timestamp liegt (Zwischenankunftszeiten
+ändern sich in der Mitte), werden die Zwischenankunftszeiten aus allen
+Timestamps des Kunden neu berechnet. Nach Retention wird das Aggregat neu
+aufgebaut (neue Liste).
+
+Die Kennzahlen beziehen sich auf alle gespeicherten Transaktionen des Kunden
+(nicht auf Analysefenster) und entsprechen z.B. StatisticalAnalyzer.
+_extract_features bzw. WeightDetector.check_source_of_funds über die
+gesamte Historie des Kunden.
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from models import Transaction, CustomerInfo
+
+
+class CustomerAggregates:
+    """
+    Unveränderliche laufende Kennzahlen eines Kunden
+    """
+
+    __slots__ = (
+        'count', 'amount_sum', 'amount_mean', 'amount_m2',
+        'timed_count', 'first_timestamp', 'last_timestamp', 'first_has_timestamp',
+        'gap_count', 'gap_mean', 'gap_m2',
+        'method_counts', 'type_counts', 'investment_sum'
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.amount_sum = 0.0
+        self.amount_mean = 0.0
+        self.amount_m2 = 0.0
+        self.timed_count = 0
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.first_has_timestamp = False
+        self.gap_count = 0
+        self.gap_mean = 0.0   # Sekunden
+        self.gap_m2 = 0.0
+        self.method_counts: Dict[str, int] = {}
+        self.type_counts: Dict[str, int] = {}
+        self.investment_sum = 0.0
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Transaction]) -> 'CustomerAggregates':
+        """
+        Baut das Aggregat vollständig auf
+
+        Args:
+            transactions: Transaktionen des Kunden (Einfügereihenfolge)
+
+        Returns:
+            CustomerAggregates
+        """
+        transactions = list(transactions)
+        aggregates = cls()
+        aggregates._add_untimed_parts(transactions)
+        timestamps = sorted(t.timestamp for t in transactions if t.timestamp)
+        aggregates._add_timestamps(timestamps)
+        return aggregates
+
+    def extended(
+        self,
+        transactions: List[Transaction],
+        all_transactions: Optional[Iterable[Transaction]] = None
+    ) -> 'CustomerAggregates':
+        """
+        Neues Aggregat mit zusätzlichen Transaktionen
+
+        Args:
+            transactions: Neu angehängte Transaktionen
+            all_transactions: Alle Transaktionen des Kunden inkl. der neuen
+                              (für den Neuaufbau bei zeitlich früheren Anhängen)
+
+        Returns:
+            Neues CustomerAggregates (self bleibt unverändert)
+        """
+        timestamps = sorted(t.timestamp for t in transactions if t.timestamp)
+        aggregates = self._copy()
+        aggregates._add_untimed_parts(transactions)
+        if (
+            timestamps and self.last_timestamp is not None
+            and timestamps[0] < self.last_timestamp and all_transactions is not None
+        ):
+            # Zeitlich früherer Anhang: Zwischenankunftszeiten neu berechnen
+            aggregates._reset_timestamps()
+            timestamps = sorted(t.timestamp for t in all_transactions if t.timestamp)
+        aggregates._add_timestamps(timestamps)
+        return aggregates
+
+    def _copy(self) -> 'CustomerAggregates':
+        aggregates = CustomerAggregates()
+        for name in self.__slots__:
+            setattr(aggregates, name, getattr(self, name))
+        aggregates.method_counts = dict(self.method_counts)
+        aggregates.type_counts = dict(self.type_counts)
+        return aggregates
+
+    def _add_untimed_parts(self, transactions: List[Transaction]):
+        """Beträge (Welford), Methoden/Arten und Investments"""
+        if self.count == 0 and transactions:
+            self.first_has_timestamp = transactions[0].timestamp is not None
+        for t in transactions:
+            amount = t.transaction_amount
+            self.count += 1
+            self.amount_sum += amount
+            delta = amount - self.amount_mean
+            self.amount_mean += delta / self.count
+            self.amount_m2 += delta * (amount - self.amount_mean)
+
+            method = t.payment_method.value
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+            transaction_type = t.transaction_type.value
+            self.type_counts[transaction_type] = self.type_counts.get(transaction_type, 0) + 1
+            if transaction_type == "investment":
+                self.investment_sum += amount
+
+    def _reset_timestamps(self):
+        self.timed_count = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.gap_count = 0
+        self.gap_mean = 0.0
+        self.gap_m2 = 0.0
+
+    def _add_timestamps(self, timestamps: List[datetime]):
+        """Zeitraum und Zwischenankunftszeiten (Welford); timestamps sortiert, nicht vor last_timestamp"""
+        for ts in timestamps:
+            if self.last_timestamp is not None:
+                gap = (ts - self.last_timestamp).total_seconds()
+                self.gap_count += 1
+                delta = gap - self.gap_mean
+                self.gap_mean += delta / self.gap_count
+                self.gap_m2 += delta * (gap - self.gap_mean)
+            else:
+                self.first_timestamp = ts
+            self.last_timestamp = ts
+            self.timed_count += 1
+
+    @property
+    def amount_std(self) -> float:
+        """Standardabweichung der Beträge (Population, wie np.std)"""
+        return math.sqrt(self.amount_m2 / self.count) if self.count else 0.0
+
+    @property
+    def gap_std_seconds(self) -> float:
+        """Standardabweichung der Zwischenankunftszeiten in Sekunden"""
+        return math.sqrt(self.gap_m2 / self.gap_count) if self.gap_count else 0.0
+
+    def method_share(self, method: str) -> float:
+        """Anteil einer Zahlungsmethode"""
+        return self.method_counts.get(method, 0) / self.count if self.count else 0.0
+
+    def type_share(self, transaction_type: str) -> float:
+        """Anteil einer Transaktionsart"""
+        return self.type_counts.get(transaction_type, 0) / self.count if self.count else 0.0
+
+    def source_of_funds_exceeded(self, customer_info: Optional[CustomerInfo]) -> bool:
+        """Kumulative Investments über der Source of Funds (wie check_source_of_funds)"""
+        if not customer_info or customer_info.source_of_funds is None:
+            return False
+        return self.investment_sum > customer_info.source_of_funds
+
+    def features(self) -> List[float]:
+        """
+        Feature-Vektor wie StatisticalAnalyzer._extract_features
+
+        Returns:
+            [avg_amount, frequency, bar_ratio, investment_ratio]
+        """
+        if not self.count:
+            return [0.0, 0.0, 0.0, 0.0]
+
+        frequency = 0.0
+        if self.first_has_timestamp and self.timed_count > 1:
+            date_range = (self.last_timestamp.date() - self.first_timestamp.date()).days + 1
+            frequency = self.count / max(date_range, 1)
+
+        return [
+            self.amount_sum / self.count,
+            frequency,
+            self.method_share("Bar"),
+            self.type_share("investment")
+        ]
+
+    def to_dict(self) -> Dict:
+        """Kennzahlen für die API"""
+        return {
+            "total_transactions": self.count,
+            "total_amount": self.amount_sum,
+            "amount_mean": self.amount_mean,
+            "amount_std": self.amount_std,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "interarrival_mean_hours": self.gap_mean / 3600.0,
+            "interarrival_std_hours": self.gap_std_seconds / 3600.0,
+            "payment_methods": dict(self.method_counts),
+            "transaction_types": dict(self.type_counts),
+            "cumulative_investments": self.investment_sum
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"CustomerAggregates(count={self.count}, mean={self.amount_mean:.2f}, "
+            f"std={self.amount_std:.2f}, investments={self.investment_sum:.2f})"
+        )
@@ -0,0 +1,204 @@
+"""
+Idempotente Aufnahme: Duplikaterkennung über transaction_id
+
+- Exakte Menge der IDs aller residenten Transaktionen (begrenzt auf
+  max_resident_ids)
+- Bloom-Filter (feste Größe) für IDs, die per Retention aus dem Speicher
+  entfernt oder wegen der Obergrenze aus der exakten Menge verdrängt wurden
+
+Der Bloom-Filter wird nur für Transaktionen mit Zeitstempel vor dem
+Bloom-Cutoff befragt. Dieser liegt nie innerhalb des längsten Analysefensters
+(window_days vor dem neuesten aufgenommenen Zeitstempel): IDs aus dem Fenster
+bleiben immer in der exakten Menge, auch wenn das Speicherbudget der
+Retention ihre Transaktionen auslagert oder die Obergrenze überschritten ist.
+Ein falsch-positiver Treffer verwirft damit höchstens eine Transaktion, die
+ohnehin außerhalb jedes Analysefensters liegt.
+"""
+
+import hashlib
+import heapq
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Transaction
+
+
+class BloomFilter:
+    """
+    Bloom-Filter über Strings (Bit-Array, Double Hashing)
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 1e-4):
+        """
+        Args:
+            capacity: Erwartete Anzahl Einträge
+            false_positive_rate: Ziel-Fehlerrate bei voller Kapazität
+        """
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.n_bits = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.n_hashes):
+            yield (h1 + i * h2) % self.n_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class TransactionDeduplicator:
+    """
+    Filtert bereits aufgenommene Transaktionen (Wiederholungen von Upstream)
+    """
+
+    def __init__(
+        self,
+        aged_capacity: int = 5_000_000,
+        false_positive_rate: float = 1e-4,
+        max_resident_ids: int = 10_000_000,
+        window_days: int = 365
+    ):
+        """
+        Args:
+            aged_capacity: Erwartete Anzahl entfernter IDs (Größe des Bloom-Filters)
+            false_positive_rate: Ziel-Fehlerrate des Bloom-Filters
+            max_resident_ids: Obergrenze der exakten Menge; darüber wandern die
+                              ältesten IDs außerhalb des Analysefensters in den
+                              Bloom-Filter
+            window_days: Längstes Analysefenster (IDs darin bleiben exakt)
+        """
+        self._lock = threading.Lock()
+        # ID → Zeitstempel; Min-Heap (Zeitstempel, ID) für die Verdrängung
+        # (Einträge bereits entfernter IDs werden beim Entnehmen übersprungen)
+        self._resident: Dict[str, Optional[datetime]] = {}
+        self._by_time: List[Tuple[datetime, str]] = []
+        self._aged = BloomFilter(aged_capacity, false_positive_rate)
+        self._aged_cutoff: Optional[datetime] = None
+        self._latest: Optional[datetime] = None
+        self.max_resident_ids = max_resident_ids
+        self.window_days = window_days
+
+        # Zähler
+        self.accepted_total = 0
+        self.duplicates_total = 0
+        self.displaced_total = 0
+
+    def filter(self, transactions: List[Transaction]) -> List[Transaction]:
+        """
+        Liefert nur neue Transaktionen (auch Duplikate innerhalb des Batches
+        werden entfernt) und merkt sich deren IDs
+
+        Args:
+            transactions: Eingehende Transaktionen
+
+        Returns:
+            Neue Transaktionen in Eingangsreihenfolge
+        """
+        accepted = []
+        with self._lock:
+            for txn in transactions:
+                if self._is_duplicate(txn):
+                    self.duplicates_total += 1
+                    continue
+                self._resident[txn.transaction_id] = txn.timestamp
+                if txn.timestamp:
+                    heapq.heappush(self._by_time, (txn.timestamp, txn.transaction_id))
+                    if self._latest is None or txn.timestamp > self._latest:
+                        self._latest = txn.timestamp
+                accepted.append(txn)
+            self.accepted_total += len(accepted)
+            if len(self._resident) > self.max_resident_ids:
+                self._displace()
+        return accepted
+
+    def _window_floor(self) -> Optional[datetime]:
+        """Beginn des längsten Analysefensters (None ohne Zeitstempel)"""
+        if self._latest is None:
+            return None
+        return self._latest - timedelta(days=self.window_days)
+
+    def _displace(self):
+        """Verschiebt die ältesten IDs vor dem Analysefenster in den Bloom-Filter"""
+        floor = self._window_floor()
+        heap = self._by_time
+        while len(self._resident) > self.max_resident_ids and heap:
+            timestamp, transaction_id = heap[0]
+            if self._resident.get(transaction_id, None) != timestamp:
+                heapq.heappop(heap)  # Bereits entfernt
+                continue
+            if floor is None or timestamp >= floor:
+                break  # Rest liegt im Analysefenster
+            heapq.heappop(heap)
+            del self._resident[transaction_id]
+            self._age(transaction_id, timestamp + timedelta(microseconds=1))
+            self.displaced_total += 1
+
+    def _age(self, transaction_id: str, cutoff: datetime):
+        """Nimmt eine ID in den Bloom-Filter auf und verschiebt dessen Cutoff"""
+        self._aged.add(transaction_id)
+        if self._aged_cutoff is None or cutoff > self._aged_cutoff:
+            self._aged_cutoff = cutoff
+
+    def _compact(self):
+        """Entfernt Heap-Einträge bereits entfernter IDs"""
+        if len(self._by_time) > 2 * len(self._resident) + 1024:
+            self._by_time = [
+                (timestamp, transaction_id) for timestamp, transaction_id in self._by_time
+                if self._resident.get(transaction_id, None) == timestamp
+            ]
+            heapq.heapify(self._by_time)
+
+    def _is_duplicate(self, txn: Transaction) -> bool:
+        if txn.transaction_id in self._resident:
+            return True
+        # Bloom-Filter nur für Transaktionen, die vor dem Retention-Cutoff liegen
+        if self._aged_cutoff is not None and txn.timestamp and txn.timestamp < self._aged_cutoff:
+            return txn.transaction_id in self._aged
+        return False
+
+    def age_out(self, transactions: List[Transaction], cutoff: Optional[datetime]):
+        """
+        Verschiebt IDs entfernter Transaktionen von der exakten Menge in den Bloom-Filter
+
+        IDs aus dem längsten Analysefenster (z.B. vom Speicherbudget der
+        Retention ausgelagert) bleiben in der exakten Menge; der Bloom-Cutoff
+        wird höchstens bis zum Fensterbeginn verschoben.
+
+        Args:
+            transactions: Per Retention entfernte Transaktionen
+            cutoff: Retention-Cutoff (ältere Transaktionen werden nicht mehr gehalten)
+        """
+        with self._lock:
+            floor = self._window_floor()
+            if cutoff is not None and floor is not None:
+                cutoff = min(cutoff, floor)
+            for txn in transactions:
+                if txn.timestamp is None or (floor is not None and txn.timestamp >= floor):
+                    continue
+                if self._resident.pop(txn.transaction_id, None) is not None:
+                    self._aged.add(txn.transaction_id)
+            if cutoff is not None and (self._aged_cutoff is None or cutoff > self._aged_cutoff):
+                self._aged_cutoff = cutoff
+            self._compact()
+
+    def stats(self) -> Dict[str, int]:
+        """Zähler für Monitoring"""
+        return {
+            "resident_ids": len(self._resident),
+            "aged_ids": self._aged.count,
+            "displaced_total": self.displaced_total,
+            "accepted_total": self.accepted_total,
+            "duplicates_total": self.duplicates_total,
+        }
@@ -12,7 +12,7 @@ Erkennt ungewöhnliche Verteilungen und Verschleierungsversuche durch:
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from collections import Counter
 from models import Transaction, EntropyAnalysis
 
@@ -252,7 +252,8 @@ class EntropyDetector:
     def analyze(
         self,
         recent_transactions: List[Transaction],
-        historical_transactions: List[Transaction] = None
+        historical_transactions: List[Transaction] = None,
+        historical_entropies: Optional[List[float]] = None
     ) -> EntropyAnalysis:
         """
         Vollständige Entropie-Analyse
@@ -260,6 +261,8 @@ class EntropyDetector:
         Args:
             recent_transactions: Aktuelle Transaktionen
             historical_transactions: Historische Transaktionen für Baseline
+            historical_entropies: Gespeicherte Baseline-Entropien (statt Berechnung
+                                  aus historical_transactions)
             
         Returns:
             EntropyAnalysis Objekt
@@ -278,6 +281,52 @@ class EntropyDetector:
             entropy_time
         )
         
+        # Z-Score berechnen (wenn historische Daten vorhanden)
+        z_score = None
+        if historical_transactions and len(historical_transactions) > 0:
+            # Berechne historische Entropien (rollierende Fenster)
+            if historical_entropies is None:
+                historical_entropies = self._calculate_historical_entropies(
+                    historical_transactions
+                )
+            z_score = self.calculate_z_score(entropy_agg, historical_entropies)
+        
+        return self.assess(
+            entropy_amount,
+            entropy_payment,
+            entropy_type,
+            entropy_time,
+            entropy_agg,
+            len(recent_transactions),
+            len({t.transaction_amount for t in recent_transactions}),
+            z_score
+        )
+    
+    def assess(
+        self,
+        entropy_amount: float,
+        entropy_payment: float,
+        entropy_type: float,
+        entropy_time: float,
+        entropy_agg: float,
+        recent_count: int,
+        unique_amounts: int,
+        z_score: Optional[float]
+    ) -> EntropyAnalysis:
+        """
+        Komplexitäts-Bewertung aus den Entropien des aktuellen Fensters
+        (z.B. aus laufend geführten Häufigkeiten statt aus den Transaktionen)
+        
+        Args:
+            entropy_amount, entropy_payment, entropy_type, entropy_time,
+            entropy_agg: Entropien (siehe analyze)
+            recent_count: Anzahl aktueller Transaktionen
+            unique_amounts: Anzahl verschiedener Beträge
+            z_score: Z-Score gegen die historische Baseline (None = keine Historie)
+            
+        Returns:
+            EntropyAnalysis Objekt
+        """
         # ==========================================
         # ABSOLUTE SCHWELLENWERTE (Primär-Erkennung)
         # ==========================================
@@ -294,16 +343,14 @@ class EntropyDetector:
             absolute_suspicious = True
         
         # Zusätzlich: Payment Method Entropie sehr niedrig (nur eine Methode)
-        if entropy_payment < 0.1 and len(recent_transactions) > 10:
+        if entropy_payment < 0.1 and recent_count > 10:
             # Nur eine Zahlungsmethode bei vielen Transaktionen
             absolute_suspicious = True
         
         # NEU: Hohe Betrags-Diversität (viele unterschiedliche Beträge)
         # Prüfe Anzahl unique Beträge relativ zur Gesamtzahl
-        if len(recent_transactions) >= 10:
-            amounts = [t.transaction_amount for t in recent_transactions]
-            unique_amounts = len(set(amounts))
-            unique_ratio = unique_amounts / len(recent_transactions)
+        if recent_count >= 10:
+            unique_ratio = unique_amounts / recent_count
             
             # Wenn >= 80% der Beträge unique sind, ist es verdächtig (Verschleierung)
             if unique_ratio >= 0.8:
@@ -316,17 +363,11 @@ class EntropyDetector:
         # ==========================================
         # RELATIVE SCHWELLENWERTE (Sekundär-Erkennung)
         # ==========================================
-        # Z-Score berechnen (wenn historische Daten vorhanden)
-        z_score = 0.0
         relative_suspicious = False
         
-        if historical_transactions and len(historical_transactions) > 0:
-            # Berechne historische Entropien (rollierende Fenster)
-            historical_entropies = self._calculate_historical_entropies(
-                historical_transactions
-            )
-            z_score = self.calculate_z_score(entropy_agg, historical_entropies)
-            
+        if z_score is None:
+            z_score = 0.0
+        else:
             # Relative Schwellenwerte (nur bei Änderungen)
             # |z_H| >= 2.5 → Hinweis (erhöht von 2.0)
             # |z_H| >= 3.5 → stark auffällig (erhöht von 3.0)
@@ -372,6 +413,26 @@ class EntropyDetector:
         if not txns:
             return []
         
+        return self.rolling_entropies(txns, window_size)[0]
+    
+    def rolling_entropies(
+        self,
+        sorted_transactions: List[Transaction],
+        window_size: int = 30,
+        start: Optional[datetime] = None
+    ) -> Tuple[List[float], datetime]:
+        """
+        Entropien der rollierenden Fenster (7 Tage Schrittweite)
+        
+        Args:
+            sorted_transactions: Transaktionen mit Timestamp, nach Timestamp sortiert
+            window_size: Fenstergröße in Tagen
+            start: Ende des ersten zu berechnenden Fensters (None = erstes Fenster)
+            
+        Returns:
+            Tuple (Entropie-Werte, Ende des nächsten Fensters)
+        """
+        txns = sorted_transactions
         entropies = []
         
         # Finde ersten und letzten Zeitpunkt
@@ -379,16 +440,18 @@ class EntropyDetector:
         max_time = txns[-1].timestamp
         
         # Erstelle rollierende Fenster (alle 7 Tage ein neues Fenster)
-        current_time = min_time + timedelta(days=window_size)
+        current_time = min_time + timedelta(days=window_size) if start is None else start
+        
+        # Fenstergrenzen per Binärsuche über die sortierten Zeitstempel
+        times = np.array([t.timestamp for t in txns], dtype='datetime64[us]')
         
         while current_time <= max_time:
             window_start = current_time - timedelta(days=window_size)
             window_end = current_time
             
-            window_txns = [
-                t for t in txns
-                if window_start <= t.timestamp < window_end
-            ]
+            lo = int(np.searchsorted(times, np.datetime64(window_start, 'us'), side='left'))
+            hi = int(np.searchsorted(times, np.datetime64(window_end, 'us'), side='left'))
+            window_txns = txns[lo:hi]
             
             if len(window_txns) > 5:  # Mindestanzahl für sinnvolle Entropie
                 # Berechne Entropien
@@ -406,5 +469,4 @@ class EntropyDetector:
             # Nächstes Fenster (7 Tage später)
             current_time += timedelta(days=7)
         
-        return entropies
-
+        return entropies, current_time
@@ -0,0 +1,84 @@
+"""
+Bedarfsgesteuerte Auswertung: welche Detektor-Stufen jede Ausgabe benötigt
+
+Der Suspicion Score im TP/SP-System verwendet weder den Trust Score (inkl.
+Peer-Auswahl) noch den Clustering-Score; beide fließen nur in Flags bzw. das
+vollständige Profil ein. Für Massenläufe, die nur Score und Risiko-Level
+brauchen (Statistik, Backtest), werden diese Stufen übersprungen.
+
+Abhängigkeitsgraph (Ausgabe → benötigte Ausgaben bzw. Stufen):
+
+    score (TP/SP)   → weight, entropy, predictability, statistics
+    score (Legacy)  → weight, entropy, statistics, clustering
+    trust_score     → trust, peers, weight, entropy, statistics (Penalty)
+    flags           → trust_score, weight, entropy, predictability,
+                      statistics, clustering
+    csv             → score, flags (Spalten des CSV-Exports)
+    profile         → score, flags, trust_score (API-Profil)
+
+Ohne die Stufe "trust" wird auch die Trust-Score-Glättung (Score-Store)
+nicht fortgeschrieben.
+"""
+
+from typing import Dict, FrozenSet, Iterable, Set
+
+# Detektor-Stufen
+WEIGHT = 'weight'
+ENTROPY = 'entropy'
+PREDICTABILITY = 'predictability'
+STATISTICS = 'statistics'          # Benford, Velocity, Zeit-Anomalien, Layering
+CLUSTERING = 'clustering'          # K-Means-Fit der Population
+TRUST = 'trust'                    # Trust-Score-Komponenten und Glättung
+PEERS = 'peers'                    # Peer-Auswahl bzw. Peer-Statistik der Population
+
+STAGES: FrozenSet[str] = frozenset({
+    WEIGHT, ENTROPY, PREDICTABILITY, STATISTICS, CLUSTERING, TRUST, PEERS
+})
+
+# Ausgaben
+OUTPUT_SCORE = 'score'             # Suspicion Score und Risiko-Level
+OUTPUT_TRUST_SCORE = 'trust_score'
+OUTPUT_FLAGS = 'flags'
+OUTPUT_CSV = 'csv'
+OUTPUT_PROFILE = 'profile'
+
+# Abhängigkeitsgraph
+DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    'score_tp_sp': frozenset({WEIGHT, ENTROPY, PREDICTABILITY, STATISTICS}),
+    'score_legacy': frozenset({WEIGHT, ENTROPY, STATISTICS, CLUSTERING}),
+    OUTPUT_TRUST_SCORE: frozenset({TRUST, PEERS, WEIGHT, ENTROPY, STATISTICS}),
+    OUTPUT_FLAGS: frozenset({OUTPUT_TRUST_SCORE, WEIGHT, ENTROPY, PREDICTABILITY, STATISTICS, CLUSTERING}),
+    OUTPUT_CSV: frozenset({OUTPUT_SCORE, OUTPUT_FLAGS}),
+    OUTPUT_PROFILE: frozenset({OUTPUT_SCORE, OUTPUT_FLAGS, OUTPUT_TRUST_SCORE}),
+}
+
+# Standard: alles berechnen (vollständiges Profil)
+FULL: FrozenSet[str] = frozenset({OUTPUT_PROFILE})
+SCORE_ONLY: FrozenSet[str] = frozenset({OUTPUT_SCORE})
+
+
+def resolve(outputs: Iterable[str], use_tp_sp_system: bool = True) -> FrozenSet[str]:
+    """
+    Transitive Hülle der angeforderten Ausgaben
+
+    Args:
+        outputs: Angeforderte Ausgaben (z.B. {"score"} für Massenläufe)
+        use_tp_sp_system: Score-Berechnung des Analyzers (TP/SP oder Legacy)
+
+    Returns:
+        Menge aller benötigten Ausgaben und Stufen
+    """
+    score_node = 'score_tp_sp' if use_tp_sp_system else 'score_legacy'
+    required: Set[str] = set()
+    pending = list(outputs)
+    while pending:
+        node = pending.pop()
+        if node in required:
+            continue
+        if node not in STAGES and node not in DEPENDENCIES and node != OUTPUT_SCORE:
+            raise ValueError(f"Unbekannte Ausgabe: {node}")
+        required.add(node)
+        if node == OUTPUT_SCORE:
+            pending.append(score_node)
+        pending.extend(DEPENDENCIES.get(node, ()))
+    return frozenset(required)
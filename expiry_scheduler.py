@@ -0,0 +1,140 @@
+"""
+Zeitrad für den Ablauf von Transaktionen aus den Analyse-Zeitfenstern
+
+Das aktuelle und das historische Fenster eines Kunden ändern sich auch ohne
+neue Transaktionen, sobald der Referenzzeitpunkt eine Transaktion um
+window_days überholt. Statt regelmäßig alle Kunden neu zu bewerten, legt der
+Scheduler für jede Transaktion und jedes Fenster einen Ablaufzeitpunkt in
+einem Tages-Bucket ab. Beim Vorrücken der Uhr werden genau die Kunden mit
+abgelaufenen Einträgen als "dirty" markiert.
+
+Fensterlogik wie TransactionAnalyzer._select_windows: eine Transaktion liegt
+im Fenster, solange reference_time <= timestamp + window_days. Transaktionen
+mit Zeitstempel nach der Uhr (Stichtagsanalyse) erhalten zusätzlich einen
+Eintrag für den Zeitpunkt, ab dem sie sichtbar werden (timestamp <= reference_time).
+"""
+
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ExpiryScheduler:
+    """
+    Zeitrad mit einem Bucket pro Kalendertag
+    """
+
+    def __init__(self, window_days: Tuple[int, ...] = (30, 365)):
+        """
+        Args:
+            window_days: Fensterlängen in Tagen (aktuelles und historisches Fenster)
+        """
+        self.window_days = tuple(window_days)
+        self.clock: Optional[datetime] = None
+        self.dirty: Set[str] = set()
+        # Tag → (Zeitpunkt, Kunden-ID, fällig bereits bei Gleichheit)
+        self._buckets: Dict[date, List[Tuple[datetime, str, bool]]] = {}
+        self._days: List[date] = []  # Min-Heap der belegten Tage
+
+    def __len__(self) -> int:
+        """Anzahl ausstehender Ablauf-Einträge"""
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def schedule(self, customer_id: str, timestamp: Optional[datetime]):
+        """
+        Legt die Ablaufzeitpunkte einer neuen Transaktion ab und markiert den Kunden
+
+        Args:
+            customer_id: Kunden-ID
+            timestamp: Zeitstempel der Transaktion (ohne Zeitstempel: nur dirty)
+        """
+        self.dirty.add(customer_id)
+        if timestamp is None:
+            return
+
+        if self.clock is None or timestamp > self.clock:
+            # Noch nicht sichtbar: wird mit reference_time >= timestamp relevant
+            self._add(timestamp, customer_id, True)
+
+        for days in self.window_days:
+            expiry = timestamp + timedelta(days=days)
+            if self.clock is not None and expiry < self.clock:
+                # Bereits außerhalb des Fensters
+                continue
+            self._add(expiry, customer_id, False)
+
+    def _add(self, when: datetime, customer_id: str, inclusive: bool):
+        """Legt einen Eintrag im Bucket seines Tages ab"""
+        day = when.date()
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = []
+            self._buckets[day] = bucket
+            heapq.heappush(self._days, day)
+        bucket.append((when, customer_id, inclusive))
+
+    def advance(self, now: datetime) -> Set[str]:
+        """
+        Rückt die Uhr vor und markiert Kunden mit abgelaufenen Einträgen
+
+        Args:
+            now: Neuer Referenzzeitpunkt (nicht vor der aktuellen Uhr)
+
+        Returns:
+            Neu markierte Kunden-IDs
+        """
+        if self.clock is not None and now < self.clock:
+            raise ValueError("Referenzzeitpunkt liegt vor der Uhr des Schedulers")
+
+        expired: Set[str] = set()
+        today = now.date()
+        while self._days and self._days[0] <= today:
+            day = self._days[0]
+            bucket = self._buckets[day]
+            if day < today:
+                # Ganzer Tag abgelaufen
+                expired.update(entry[1] for entry in bucket)
+                remaining = []
+            else:
+                # Heutiger Bucket: nur bereits fällige Einträge
+                remaining = []
+                for entry in bucket:
+                    if entry[0] < now or (entry[2] and entry[0] == now):
+                        expired.add(entry[1])
+                    else:
+                        remaining.append(entry)
+            if remaining:
+                self._buckets[day] = remaining
+                break
+            heapq.heappop(self._days)
+            del self._buckets[day]
+
+        self.clock = now
+        self.dirty.update(expired)
+        return expired
+
+    def pop_dirty(self) -> Set[str]:
+        """
+        Liefert und leert die Menge der neu zu bewertenden Kunden
+
+        Returns:
+            Kunden-IDs
+        """
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    def reset(self, now: datetime, transactions: Iterable[Tuple[str, Optional[datetime]]]):
+        """
+        Baut das Zeitrad neu auf (z.B. wenn der Referenzzeitpunkt zurückspringt)
+
+        Args:
+            now: Neue Uhrzeit des Schedulers
+            transactions: (Kunden-ID, Zeitstempel) aller Transaktionen;
+                          alle Kunden werden als dirty markiert
+        """
+        self._buckets = {}
+        self._days = []
+        self.clock = now
+        for customer_id, timestamp in transactions:
+            self.schedule(customer_id, timestamp)
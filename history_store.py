@@ -0,0 +1,264 @@
+"""
+Versionierter Transaktionsspeicher mit Copy-on-Write-Snapshots
+
+Jeder Schreibvorgang erzeugt eine neue, unveränderliche Version
+(HistorySnapshot). Leser arbeiten auf der Version, die sie beim Start
+übernommen haben, und sehen einen konsistenten Datenstand ohne Sperren,
+während Schreiber bereits die nächste Version aufbauen.
+
+Strukturelle Teilung:
+- Pro Kunde eine append-only Liste; ein Snapshot kennt nur deren Länge zum
+  Zeitpunkt der Version (CustomerLog). Spätere Anhänge sind für ältere
+  Snapshots unsichtbar, es wird nichts kopiert.
+- Die Zuordnung Kunde → CustomerLog ist in Buckets aufgeteilt; ein
+  Schreibvorgang kopiert nur die Buckets der betroffenen Kunden, alle
+  anderen werden von der Vorversion übernommen.
+- Beim Entfernen alter Transaktionen (Retention) erhält der Kunde eine neue
+  Liste; ältere Snapshots behalten die bisherige.
+- Jeder Kunden-Log trägt die laufenden Kennzahlen seiner Version
+  (customer_aggregates.CustomerAggregates), fortgeschrieben beim Anhängen.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from models import Transaction
+from customer_aggregates import CustomerAggregates
+
+
+class CustomerLog(Sequence):
+    """
+    Unveränderliche Sicht auf die ersten `length` Einträge einer append-only Liste
+    """
+
+    __slots__ = ('_items', '_length', 'aggregates')
+
+    def __init__(self, items: List, length: int, aggregates: Optional[CustomerAggregates] = None):
+        self._items = items
+        self._length = length
+        # Laufende Kennzahlen dieser Version (nur für Kunden-Logs)
+        self.aggregates = aggregates
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return self._items[:self._length][index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("CustomerLog index out of range")
+        return self._items[index]
+
+    def __iter__(self) -> Iterator:
+        items = self._items
+        for i in range(self._length):
+            yield items[i]
+
+    def __repr__(self) -> str:
+        return f"CustomerLog(len={self._length})"
+
+
+class HistorySnapshot(Mapping):
+    """
+    Unveränderlicher Datenstand: Kunden-ID → Transaktionen (CustomerLog)
+
+    Iteration in Einfügereihenfolge der Kunden.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        buckets: Tuple[Dict[str, CustomerLog], ...],
+        customer_order: CustomerLog,
+        n_transactions: int,
+        latest_timestamp: Optional[datetime]
+    ):
+        """
+        Args:
+            version: Versionsnummer (steigt mit jedem Schreibvorgang)
+            buckets: Kunden-Buckets (nach Hash der Kunden-ID)
+            customer_order: Kunden-IDs in Einfügereihenfolge
+            n_transactions: Anzahl Transaktionen
+            latest_timestamp: Neuester Timestamp
+        """
+        self.version = version
+        self._buckets = buckets
+        self._customer_order = customer_order
+        self.n_transactions = n_transactions
+        self.latest_timestamp = latest_timestamp
+
+    def _bucket(self, customer_id: str) -> Dict[str, CustomerLog]:
+        return self._buckets[hash(customer_id) % len(self._buckets)]
+
+    def __getitem__(self, customer_id: str) -> CustomerLog:
+        return self._bucket(customer_id)[customer_id]
+
+    def aggregates(self, customer_id: str) -> Optional[CustomerAggregates]:
+        """Laufende Kennzahlen eines Kunden (None für unbekannte Kunden)"""
+        log = self._bucket(customer_id).get(customer_id)
+        return log.aggregates if log is not None else None
+
+    def __contains__(self, customer_id) -> bool:
+        return customer_id in self._bucket(customer_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._customer_order)
+
+    def __len__(self) -> int:
+        return len(self._customer_order)
+
+    def __repr__(self) -> str:
+        return (
+            f"HistorySnapshot(version={self.version}, customers={len(self)}, "
+            f"transactions={self.n_transactions})"
+        )
+
+
+class TransactionStore:
+    """
+    Schreibseite des versionierten Speichers
+
+    Schreibvorgänge werden serialisiert; das Lesen des aktuellen Snapshots
+    (Attribut `current`) ist jederzeit ohne Sperre möglich.
+    """
+
+    # Anzahl Buckets der Kunden-Zuordnung
+    N_BUCKETS = 64
+
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._customer_order: List[str] = []
+        # Ältester Timestamp pro Kunde (nur Kunden mit Timestamps)
+        self._oldest: Dict[str, datetime] = {}
+        self.current = HistorySnapshot(
+            version=0,
+            buckets=tuple({} for _ in range(self.N_BUCKETS)),
+            customer_order=CustomerLog(self._customer_order, 0),
+            n_transactions=0,
+            latest_timestamp=None
+        )
+
+    def append(self, transactions: List[Transaction]) -> HistorySnapshot:
+        """
+        Hängt Transaktionen an und veröffentlicht eine neue Version
+
+        Args:
+            transactions: Neue Transaktionen
+
+        Returns:
+            Neuer Snapshot
+        """
+        with self._write_lock:
+            snapshot = self.current
+            if not transactions:
+                return snapshot
+
+            # Nach Kunde gruppieren (Reihenfolge beibehalten)
+            grouped: Dict[str, List[Transaction]] = {}
+            latest = snapshot.latest_timestamp
+            for txn in transactions:
+                grouped.setdefault(txn.customer_id, []).append(txn)
+                if txn.timestamp:
+                    if latest is None or txn.timestamp > latest:
+                        latest = txn.timestamp
+                    oldest = self._oldest.get(txn.customer_id)
+                    if oldest is None or txn.timestamp < oldest:
+                        self._oldest[txn.customer_id] = txn.timestamp
+
+            buckets = list(snapshot._buckets)
+            copied = set()
+            for customer_id, txns in grouped.items():
+                index = hash(customer_id) % len(buckets)
+                if index not in copied:
+                    buckets[index] = dict(buckets[index])
+                    copied.add(index)
+
+                log = buckets[index].get(customer_id)
+                if log is None:
+                    items = []
+                    aggregates = CustomerAggregates()
+                    self._customer_order.append(customer_id)
+                else:
+                    items = log._items
+                    aggregates = log.aggregates
+                    if len(items) != len(log):
+                        # Liste wurde außerhalb dieser Version verändert: kopieren
+                        items = items[:len(log)]
+                items.extend(txns)
+                buckets[index][customer_id] = CustomerLog(
+                    items, len(items), aggregates.extended(txns, items)
+                )
+
+            self.current = HistorySnapshot(
+                version=snapshot.version + 1,
+                buckets=tuple(buckets),
+                customer_order=CustomerLog(self._customer_order, len(self._customer_order)),
+                n_transactions=snapshot.n_transactions + len(transactions),
+                latest_timestamp=latest
+            )
+            return self.current
+
+    def evict(self, cutoff: datetime) -> Tuple[HistorySnapshot, List[Transaction], Set[str]]:
+        """
+        Entfernt alle Transaktionen mit timestamp < cutoff und veröffentlicht
+        eine neue Version (Transaktionen ohne Timestamp bleiben erhalten)
+
+        Args:
+            cutoff: Älteste zu behaltende Zeit
+
+        Returns:
+            Tuple (neuer Snapshot, entfernte Transaktionen, Kunden ohne
+            verbleibende Transaktionen)
+        """
+        with self._write_lock:
+            snapshot = self.current
+            candidates = [cid for cid, oldest in self._oldest.items() if oldest < cutoff]
+            if not candidates:
+                return snapshot, [], set()
+
+            buckets = list(snapshot._buckets)
+            copied = set()
+            removed: List[Transaction] = []
+            emptied: Set[str] = set()
+            for customer_id in candidates:
+                index = hash(customer_id) % len(buckets)
+                if index not in copied:
+                    buckets[index] = dict(buckets[index])
+                    copied.add(index)
+
+                kept = []
+                for txn in buckets[index][customer_id]:
+                    if txn.timestamp and txn.timestamp < cutoff:
+                        removed.append(txn)
+                    else:
+                        kept.append(txn)
+
+                timestamps = [t.timestamp for t in kept if t.timestamp]
+                if timestamps:
+                    self._oldest[customer_id] = min(timestamps)
+                else:
+                    del self._oldest[customer_id]
+
+                if kept:
+                    # Neue Liste: ältere Snapshots behalten die bisherige
+                    buckets[index][customer_id] = CustomerLog(
+                        kept, len(kept), CustomerAggregates.from_transactions(kept)
+                    )
+                else:
+                    del buckets[index][customer_id]
+                    emptied.add(customer_id)
+
+            if emptied:
+                # Neue Reihenfolge-Liste (ältere Snapshots behalten die bisherige)
+                self._customer_order = [cid for cid in self._customer_order if cid not in emptied]
+
+            self.current = HistorySnapshot(
+                version=snapshot.version + 1,
+                buckets=tuple(buckets),
+                customer_order=CustomerLog(self._customer_order, len(self._customer_order)),
+                n_transactions=snapshot.n_transactions - len(removed),
+                latest_timestamp=snapshot.latest_timestamp
+            )
+            return self.current, removed, emptied
@@ -4,15 +4,17 @@ CLARA Transaction Analysis System - REST API
 FastAPI-basierte REST API für Transaktionsanalyse
 """
 
+import asyncio
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from functools import partial
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 import pandas as pd
-import io
+import threading
 import time
 import logging
 import os
@@ -20,9 +22,23 @@ from pathlib import Path
 
 from models import (
     Transaction, CustomerRiskProfile, AnalysisResponse,
-    HealthResponse, RiskLevel
+    HealthResponse, RiskLevel, BacktestResult, RetentionMetrics,
+    AnalysisJob, JobStatus, JobFlaggedPage
 )
 from analyzer import TransactionAnalyzer
+from backtest import BacktestEngine
+from score_store import ScoreStateStore
+from retention import RetentionPolicy
+from dedup import TransactionDeduplicator
+from baseline_store import BaselineStore
+from result_memo import ResultMemo
+from realtime_scorer import RealtimeScorer
+from micro_batcher import TransactionBatcher
+from single_flight import SingleFlightCache
+from worker_pool import WorkerPool
+from analysis_jobs import JobManager, JobContext
+from profile_record import CustomerScoreRecord
+import csv_import
 
 # Logging Setup
 log_dir = Path("logs")
@@ -67,8 +83,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Persistenter Zustand (Trust-Score-Glättung über Uploads und Neustarts hinweg)
+data_dir = Path("data")
+data_dir.mkdir(exist_ok=True)
+score_store = ScoreStateStore(data_dir / "trust_scores.sqlite")
+baseline_store = BaselineStore(data_dir / "baselines.sqlite")
+
+# Ergebnis-Cache über Uploads hinweg (unveränderte Kunden werden nicht neu analysiert)
+result_memo = ResultMemo()
+
+# Retention: Transaktionen außerhalb des längsten Analysefensters (365 Tage)
+# bzw. über dem Speicherbudget werden nach data/archive ausgelagert
+retention_policy = RetentionPolicy(
+    retention_days=365,
+    max_resident_transactions=5_000_000,
+    spill_dir=data_dir / "archive"
+)
+
 # Globaler Analyzer (in Produktion: mit Datenbank-Persistenz)
-analyzer = TransactionAnalyzer()
+# Idempotente Aufnahme: wiederholt zugestellte transaction_ids werden verworfen
+analyzer = TransactionAnalyzer(
+    score_store=score_store,
+    retention_policy=retention_policy,
+    deduplicator=TransactionDeduplicator(),
+    baseline_store=baseline_store,
+    result_memo=result_memo
+)
+
+# CPU-lastige Arbeit außerhalb der Event-Loop; exklusive Sperre für Änderungen am globalen Analyzer
+worker_pool = WorkerPool()
+analyzer_lock = threading.Lock()
+
+# Uploads werden hier zwischengespeichert und blockweise geparst
+upload_dir = data_dir / "uploads"
+
+# Echtzeit-Bewertung einzelner Transaktionen (zwischengespeicherter Populations-Kontext)
+realtime_scorer = RealtimeScorer(analyzer, lock=analyzer_lock)
+
+# Gleichzeitige Einzel-Transaktionen werden gesammelt (max. 5 ms) und batchweise bewertet
+transaction_batcher = TransactionBatcher(realtime_scorer)
+
+# Teure Lese-Endpunkte: gleiche Anfragen auf gleichem Datenstand teilen eine Berechnung
+read_cache = SingleFlightCache(ttl_seconds=30)
+
+# Hintergrund-Jobs für große Uploads (Registry in data/jobs)
+job_manager = JobManager(data_dir / "jobs", worker_pool)
+
+# Intervall für die laufende Aktualisierung abgelaufener Zeitfenster
+REFRESH_INTERVAL_SECONDS = 300
+
+# Weckt die laufende Aktualisierung vorzeitig (z.B. nach Batch-Einfügen)
+refresh_requested = asyncio.Event()
 
 # Start-Zeit für Uptime
 start_time = time.time()
@@ -78,6 +143,84 @@ output_dir = Path("output")
 output_dir.mkdir(exist_ok=True)
 
 
+def _write_locked(fn, *args, **kwargs):
+    """Führt fn mit exklusivem Zugriff auf den globalen Analyzer aus (Worker-Thread)"""
+    with analyzer_lock:
+        return fn(*args, **kwargs)
+
+
+def _flushed(fn, *args, **kwargs):
+    """Führt fn aus und schreibt danach geänderte Trust Scores (Worker-Thread)"""
+    result = fn(*args, **kwargs)
+    analyzer.flush_score_state()
+    return result
+
+
+def _set_deferred_customers(deferred: List[str]):
+    """Vermerkt die im letzten Budget-Lauf zurückgestellten Kunden (exklusiv)"""
+    analyzer.deferred_customers = deferred
+
+
+def _refresh_windows(apply_retention: bool = True):
+    """
+    Retention und Neubewertung abgelaufener Zeitfenster (Worker-Thread)
+    
+    Exklusiv sind nur Retention und Neubewertung; der Populations-Kontext
+    (Peer-Statistik, KMeans-Fit) wird dazwischen ohne Sperre aufgebaut und von
+    tick für denselben Datenstand wiederverwendet.
+    
+    Returns:
+        Tuple (Anzahl Kunden mit ausgelagerten Transaktionen, neu bewertete Kunden-IDs)
+    """
+    evicted = _write_locked(analyzer.apply_retention) if apply_retention else 0
+    realtime_scorer.refresh_population()
+    refreshed = _write_locked(analyzer.tick)
+    # Auch Trust Scores aus der Echtzeit-Bewertung schreiben (Stores sind threadsicher)
+    analyzer.flush_score_state()
+    return evicted, refreshed
+
+
+async def refresh_loop():
+    """
+    Bewertet periodisch (bzw. nach refresh_requested) Kunden neu, deren
+    Zeitfenster sich geändert haben; Lese-Endpunkte verwenden den zuletzt
+    veröffentlichten Stand (TransactionAnalyzer.published_records)
+    """
+    while True:
+        try:
+            await asyncio.wait_for(refresh_requested.wait(), timeout=REFRESH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        refresh_requested.clear()
+        try:
+            evicted, refreshed = await worker_pool.run(_refresh_windows)
+            if evicted:
+                logger.info(f"Retention: Transaktionen von {evicted} Kunden ausgelagert")
+            if refreshed:
+                logger.info(f"Zeitfenster-Aktualisierung: {len(refreshed)} Kunden neu bewertet")
+        except Exception as e:
+            logger.error(f"Fehler bei Zeitfenster-Aktualisierung: {e}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Startet Job-Warteschlange und die periodische Zeitfenster-Aktualisierung"""
+    # Zwischengespeicherte Uploads abgebrochener Läufe entfernen
+    for stale_upload in upload_dir.glob("upload_*.csv"):
+        stale_upload.unlink(missing_ok=True)
+    job_manager.start()
+    asyncio.create_task(refresh_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Schreibt offene Trust Scores und Baselines beim Herunterfahren"""
+    await transaction_batcher.close("Server wird heruntergefahren")
+    score_store.close()
+    baseline_store.close()
+    worker_pool.shutdown()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Root Endpoint - Serves the Web UI"""
@@ -105,15 +248,20 @@ async def analyze_single_transaction(transaction: Transaction):
     Analysiert eine einzelne Transaktion
     
     Fügt die Transaktion zum System hinzu und gibt das Risikoprofil zurück.
+    Wiederholte Zustellung (gleiche transaction_id) wird ignoriert.
+    
+    Nur der betroffene Kunde wird neu bewertet, aus den laufend geführten
+    Zuständen (Weight, Entropie, Velocity, Layering) gegen den
+    zwischengespeicherten Populations-Kontext; Trust Scores werden gesammelt geschrieben
+    (Autoflush bzw. periodische Aktualisierung). Gleichzeitige Aufrufe werden
+    für wenige Millisekunden gesammelt und gemeinsam eingefügt; jeder Kunde
+    wird pro Batch einmal bewertet.
     """
     try:
-        # Füge Transaktion hinzu
-        analyzer.add_transactions([transaction])
-        
-        # Analysiere Kunde
-        profile = analyzer.analyze_customer(transaction.customer_id)
+        # Transaktion aufnehmen (Duplikate werden verworfen) und Kunde neu bewerten
+        record = await transaction_batcher.submit(transaction)
         
-        return profile
+        return analyzer.materialize_profile(record)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,192 +288,23 @@ async def analyze_csv_file(
     Zeitstempel ist optional (Format: YYYY-MM-DD HH:MM:SS oder ISO 8601 bzw. DD.MM.YYYY)
     """
     try:
-        # Lese CSV (mit Encoding-Detection für Windows CSV-Dateien)
-        contents = await file.read()
-        
-        # Versuche verschiedene Encodings
-        df = None
-        encodings = ['utf-8', 'windows-1252', 'latin-1', 'cp1252']
-        
-        for encoding in encodings:
-            try:
-                decoded_content = contents.decode(encoding)
-                df = pd.read_csv(io.StringIO(decoded_content))
-                break  # Erfolgreich - verwende dieses Encoding
-            except (UnicodeDecodeError, Exception) as e:
-                continue  # Versuche nächstes Encoding
-        
-        if df is None:
-            raise HTTPException(status_code=400, detail="CSV konnte mit keinem bekannten Encoding gelesen werden")
-        
-        # Prüfe welches Format vorliegt
-        is_new_format = 'Kundennummer' in df.columns
-        
-        transactions = []
+        # Upload auf Disk zwischenspeichern (nicht als Ganzes in den Speicher lesen)
+        path = await worker_pool.run(csv_import.spool_upload, file.file, upload_dir)
         
-        if is_new_format:
-            # NEUES FORMAT: Deutsche Spalten
-            print(f"[INFO] Verarbeite NEUES Format (deutsch) mit {len(df)} Zeilen")
-            
-            for idx, row in df.iterrows():
-                try:
-                    # Mapping: Deutsch → Englisch
-                    customer_id = str(row['Kundennummer'])
-                    transaction_id = str(row['Unique Transaktion ID'])
-                    customer_name = str(row['Vollständiger Name'])
-                    
-                    # Betrag: Komma → Punkt konvertieren
-                    amount_str = str(row['Auftragsvolumen']).replace(',', '.')
-                    transaction_amount = float(amount_str)
-                    
-                    # Zahlungsmethode: "Kredit" → "Kreditkarte"
-                    art = str(row['Art']).strip()
-                    if art == "Kredit":
-                        payment_method = "Kreditkarte"
-                    elif art == "Bar":
-                        payment_method = "Bar"
-                    elif art == "SEPA":
-                        payment_method = "SEPA"
-                    else:
-                        payment_method = art  # Fallback
-                    
-                    # Transaktionstyp: "In/Out" → "investment/auszahlung"
-                    in_out = str(row['In/Out']).strip()
-                    if in_out == "In":
-                        transaction_type = "investment"
-                    elif in_out == "Out":
-                        transaction_type = "auszahlung"
-                    else:
-                        transaction_type = "investment"  # Fallback
-                    
-                    # Timestamp: Kombiniere Datum + Uhrzeit oder nutze Timestamp-Spalte
-                    timestamp = None
-                    if 'Timestamp' in df.columns and pd.notna(row['Timestamp']):
-                        try:
-                            # Format: DD.MM.YYYY
-                            date_str = str(row['Timestamp'])
-                            timestamp = pd.to_datetime(date_str, format='%d.%m.%Y')
-                            
-                            # Füge Uhrzeit hinzu falls vorhanden
-                            if 'Uhrzeit' in df.columns and pd.notna(row['Uhrzeit']):
-                                try:
-                                    # Uhrzeit ist ein Dezimalwert (0.663... = Stundenanteil des Tages)
-                                    time_str = str(row['Uhrzeit']).replace(',', '.')
-                                    time_decimal = float(time_str)
-                                    hours = int(time_decimal * 24)
-                                    minutes = int((time_decimal * 24 - hours) * 60)
-                                    seconds = int(((time_decimal * 24 - hours) * 60 - minutes) * 60)
-                                    timestamp = timestamp.replace(hour=hours, minute=minutes, second=seconds)
-                                except Exception as e:
-                                    pass  # Behalte nur Datum
-                        except Exception as e:
-                            print(f"[WARN] Timestamp-Parse-Fehler in Zeile {idx+2}: {e}")
-                            timestamp = None
-                    
-                    txn = Transaction(
-                        customer_id=customer_id,
-                        transaction_id=transaction_id,
-                        customer_name=customer_name,
-                        transaction_amount=transaction_amount,
-                        payment_method=payment_method,
-                        transaction_type=transaction_type,
-                        timestamp=timestamp
-                    )
-                    transactions.append(txn)
-                except Exception as e:
-                    print(f"[WARN] Fehler beim Parsen von Zeile {idx+2}: {e}")
-                    continue
-        
-        else:
-            # ALTES FORMAT: Englische Spalten
-            print(f"[INFO] Verarbeite ALTES Format (englisch) mit {len(df)} Zeilen")
-            
-            required_columns = [
-                'customer_id', 'transaction_id', 'customer_name',
-                'transaction_amount', 'payment_method', 'transaction_type'
-            ]
-            
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Fehlende Spalten: {', '.join(missing_columns)}"
-                )
-            
-            for idx, row in df.iterrows():
-                try:
-                    timestamp = None
-                    if 'timestamp' in df.columns and pd.notna(row['timestamp']):
-                        try:
-                            timestamp = pd.to_datetime(row['timestamp'])
-                        except:
-                            timestamp = None
-                    
-                    txn = Transaction(
-                        customer_id=str(row['customer_id']),
-                        transaction_id=str(row['transaction_id']),
-                        customer_name=str(row['customer_name']),
-                        transaction_amount=float(row['transaction_amount']),
-                        payment_method=str(row['payment_method']),
-                        transaction_type=str(row['transaction_type']),
-                        timestamp=timestamp
-                    )
-                    transactions.append(txn)
-                except Exception as e:
-                    print(f"[WARN] Fehler beim Parsen von Zeile {idx+2}: {e}")
-                    continue
-        
-        if not transactions:
-            raise HTTPException(
-                status_code=400,
-                detail="Keine gültigen Transaktionen in CSV gefunden"
-            )
-        
-        print(f"[OK] {len(transactions)} Transaktionen erfolgreich geparst")
         print(f"[INFO] Analyse-Parameter: recent_days={recent_days}, historical_days={historical_days}")
         
-        # Erstelle neuen Analyzer mit den spezifischen Parametern
-        custom_analyzer = TransactionAnalyzer(
-            alpha=0.6,
-            beta=0.4,
-            historical_days=historical_days
-        )
-        
-        # Füge Transaktionen hinzu
-        custom_analyzer.add_transactions(transactions)
-        
-        # Debug: Prüfe wie viele Kunden wir haben
-        num_customers = len(custom_analyzer.transaction_history)
-        print(f"[DEBUG] {num_customers} Kunden in transaction_history gefunden")
-        
-        # Debug: Zeige erste paar Kunden mit Transaktionszahlen
-        for i, (cust_id, txns) in enumerate(list(custom_analyzer.transaction_history.items())[:5]):
-            print(f"  - Kunde {cust_id}: {len(txns)} Transaktionen")
-        
-        # Analysiere alle Kunden mit dem spezifizierten Zeitfenster
-        profiles = custom_analyzer.analyze_all_customers(recent_days=recent_days)
-        
-        # Filtere flagged customers (YELLOW, ORANGE, RED)
-        flagged = [
-            p for p in profiles
-            if p.risk_level != RiskLevel.GREEN
-        ]
-        
-        # Zähle nach Risk Level
-        summary = {
-            "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
-            "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
-            "orange": sum(1 for p in profiles if p.risk_level == RiskLevel.ORANGE),
-            "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
-        }
-        
-        return AnalysisResponse(
-            status="success",
-            message=f"{len(transactions)} Transaktionen analysiert, {len(profiles)} Kunden bewertet",
-            analyzed_customers=len(profiles),
-            flagged_customers=flagged,
-            summary=summary
-        )
+        # Parsen und Analyse im Worker-Thread (eigener Analyzer, globaler Zustand bleibt unberührt)
+        try:
+            return await worker_pool.run(
+                _analyze_uploaded_file,
+                path,
+                recent_days,
+                historical_days
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            path.unlink(missing_ok=True)
     
     except HTTPException:
         raise
@@ -333,6 +312,91 @@ async def analyze_csv_file(
         raise HTTPException(status_code=500, detail=f"Fehler bei CSV-Verarbeitung: {str(e)}")
 
 
+def _analyze_uploaded_file(
+    path: Path,
+    recent_days: int,
+    historical_days: int,
+    rows_progress=None,
+    progress=None
+) -> AnalysisResponse:
+    """
+    Parst eine hochgeladene CSV blockweise und analysiert sie mit eigenem
+    Analyzer (Worker-Thread)
+    
+    Jeder Block wird direkt eingefügt; der Speicherbedarf des Parsens hängt
+    von der Blockgröße ab, nicht von der Dateigröße. Der Analyzer führt kein
+    Zeitrad und keine Streaming-Zustände (live_state=False), pro Zeile bleibt
+    nur die Transaktion selbst.
+    
+    Args:
+        path: Zwischengespeicherte CSV-Datei
+        recent_days: Zeitfenster für aktuelle Analyse
+        historical_days: Zeitfenster für historische Baseline
+        rows_progress: Fortschritts-Callback (geparste Zeilen), z.B. eines Jobs
+        progress: Fortschritts-Callback (analysiert, gesamt), z.B. eines Jobs
+        
+    Returns:
+        AnalysisResponse
+        
+    Raises:
+        ValueError: CSV nicht lesbar oder ohne gültige Transaktion
+    """
+    # Erstelle neuen Analyzer mit den spezifischen Parametern
+    custom_analyzer = TransactionAnalyzer(
+        alpha=0.6,
+        beta=0.4,
+        historical_days=historical_days,
+        score_store=score_store,
+        result_memo=result_memo,
+        live_state=False
+    )
+    
+    # Füge Transaktionen blockweise hinzu
+    n_transactions = 0
+    for chunk in csv_import.iter_transactions(path, progress=rows_progress):
+        custom_analyzer.add_transactions(chunk)
+        n_transactions += len(chunk)
+    
+    print(f"[OK] {n_transactions} Transaktionen erfolgreich geparst")
+    
+    # Debug: Prüfe wie viele Kunden wir haben
+    num_customers = len(custom_analyzer.transaction_history)
+    print(f"[DEBUG] {num_customers} Kunden in transaction_history gefunden")
+    
+    # Debug: Zeige erste paar Kunden mit Transaktionszahlen
+    for i, (cust_id, txns) in enumerate(list(custom_analyzer.transaction_history.items())[:5]):
+        print(f"  - Kunde {cust_id}: {len(txns)} Transaktionen")
+    
+    # Analysiere alle Kunden mit dem spezifizierten Zeitfenster
+    # (Pre-Screen: garantiert unauffällige Kunden ohne Vollanalyse)
+    # Kompakte Datensätze; vollständige Profile nur für ausgegebene Kunden
+    profiles = custom_analyzer.analyze_all_customer_records(
+        recent_days=recent_days, prescreen=True, progress=progress
+    )
+    
+    # Filtere flagged customers (YELLOW, ORANGE, RED)
+    flagged = [
+        custom_analyzer.materialize_profile(p) for p in profiles
+        if p.risk_level != RiskLevel.GREEN
+    ]
+    
+    # Zähle nach Risk Level
+    summary = {
+        "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
+        "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
+        "orange": sum(1 for p in profiles if p.risk_level == RiskLevel.ORANGE),
+        "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
+    }
+    
+    return AnalysisResponse(
+        status="success",
+        message=f"{n_transactions} Transaktionen analysiert, {len(profiles)} Kunden bewertet",
+        analyzed_customers=len(profiles),
+        flagged_customers=flagged,
+        summary=summary
+    )
+
+
 @app.get("/api/customer/{customer_id}/risk-profile", response_model=CustomerRiskProfile)
 async def get_customer_risk_profile(
     customer_id: str,
@@ -346,7 +410,18 @@ async def get_customer_risk_profile(
         recent_days: Zeitfenster für Analyse (Standard: 30 Tage)
     """
     try:
-        profile = analyzer.analyze_customer(customer_id, recent_days=recent_days)
+        if recent_days == analyzer.REFRESH_RECENT_DAYS and customer_id not in analyzer.expiry_scheduler.dirty:
+            # Laufender Datensatz (Detektor-Ergebnisse nur bei auffälligen bzw.
+            # in Echtzeit bewerteten Kunden vorhanden, sonst Vollanalyse);
+            # Kunden mit noch nicht nachbewerteten Änderungen werden analysiert
+            _, records = analyzer.published_records()
+            record = records.get(customer_id)
+            if record is not None and record.analyses is not None:
+                return analyzer.materialize_profile(record)
+        
+        # Konsistenter Datenstand, Analyse außerhalb der Event-Loop
+        view = analyzer.snapshot()
+        profile = await worker_pool.run(_flushed, view.analyze_customer, customer_id, recent_days)
         return profile
     
     except ValueError as e:
@@ -355,10 +430,105 @@ async def get_customer_risk_profile(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/customer/{customer_id}/weight")
+async def get_customer_live_weight(customer_id: str):
+    """
+    Aktuelles Weight (30 Tage) eines Kunden aus dem laufend fortgeschriebenen
+    Zustand - ohne Vollanalyse der Transaktionshistorie
+    
+    Args:
+        customer_id: Kunden-ID
+    """
+    try:
+        if customer_id not in analyzer.transaction_history:
+            raise ValueError(f"Keine Transaktionen für Kunde {customer_id}")
+        
+        return {
+            "customer_id": customer_id,
+            "weight_30d": analyzer.live_weight(customer_id),
+            "reference_time": analyzer.get_reference_time()
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/customer/{customer_id}/entropy")
+async def get_customer_live_entropy(customer_id: str):
+    """
+    Aktuelle Entropien (30 Tage) eines Kunden aus den laufend geführten
+    Häufigkeiten - ohne Vollanalyse der Transaktionshistorie
+    
+    Args:
+        customer_id: Kunden-ID
+    """
+    try:
+        if customer_id not in analyzer.transaction_history:
+            raise ValueError(f"Keine Transaktionen für Kunde {customer_id}")
+        
+        entropies = analyzer.live_entropy(customer_id)
+        entropies["customer_id"] = customer_id
+        entropies["reference_time"] = analyzer.get_reference_time()
+        return entropies
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/customer/{customer_id}/summary")
+async def get_customer_summary(customer_id: str):
+    """
+    Laufende Kennzahlen eines Kunden über alle gespeicherten Transaktionen
+    (Betragsstatistik, Zwischenankunftszeiten, Zahlungsmethoden, kumulative
+    Investments) - O(1) aus den beim Einfügen fortgeschriebenen Aggregaten
+    
+    Args:
+        customer_id: Kunden-ID
+    """
+    aggregates = analyzer.transaction_history.aggregates(customer_id)
+    if aggregates is None:
+        raise HTTPException(status_code=404, detail=f"Keine Transaktionen für Kunde {customer_id}")
+    
+    summary = aggregates.to_dict()
+    summary["customer_id"] = customer_id
+    summary["source_of_funds_exceeded"] = aggregates.source_of_funds_exceeded(
+        analyzer.customer_info.get(customer_id)
+    )
+    return summary
+
+
+@app.get("/api/customer/{customer_id}/risk-profiles", response_model=Dict[int, CustomerRiskProfile])
+async def get_customer_risk_profiles(
+    customer_id: str,
+    horizons: List[int] = Query(default=[30, 90, 365])
+):
+    """
+    Holt die Risikoprofile eines Kunden für mehrere Zeitfenster (Fallprüfung)
+    
+    Args:
+        customer_id: Kunden-ID
+        horizons: Zeitfenster in Tagen (z.B. ?horizons=30&horizons=90&horizons=3650)
+    """
+    try:
+        view = analyzer.snapshot()
+        profiles = await worker_pool.run(_flushed, view.analyze_customer_horizons, customer_id, horizons)
+        return profiles
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/flagged-customers", response_model=List[CustomerRiskProfile])
 async def get_flagged_customers(
     min_risk_level: Optional[str] = "YELLOW",
-    limit: Optional[int] = 100
+    limit: Optional[int] = 100,
+    recent_days: Optional[int] = None
 ):
     """
     Holt alle auffälligen Kunden
@@ -366,24 +536,46 @@ async def get_flagged_customers(
     Args:
         min_risk_level: Minimales Risiko-Level (GREEN, YELLOW, ORANGE, RED)
         limit: Maximale Anzahl Ergebnisse
+        recent_days: Abweichendes Zeitfenster in Tagen (Standard: laufende
+                     Datensätze, 30 Tage)
     """
     try:
-        # Analysiere alle Kunden
-        profiles = analyzer.analyze_all_customers()
+        view = analyzer.snapshot()
+        risk_level = RiskLevel(min_risk_level.upper())
+        levels = list(RiskLevel)
         
-        # Filtere nach Risk Level
-        risk_levels = ["GREEN", "YELLOW", "ORANGE", "RED"]
-        min_index = risk_levels.index(min_risk_level.upper())
+        if recent_days is not None and recent_days != analyzer.REFRESH_RECENT_DAYS:
+            # Abweichendes Fenster: Top-K mit Score-Obergrenzen (nur Kandidaten
+            # für die Top-K werden voll analysiert)
+            async def compute_window():
+                records = await worker_pool.run(
+                    _flushed, view.analyze_top_customers, limit, risk_level, recent_days
+                )
+                return [view.materialize_profile(r) for r in records]
+            
+            return await read_cache.get(
+                ("flagged-customers", risk_level, limit, recent_days, view.data_version()),
+                compute_window
+            )
         
-        flagged = [
-            p for p in profiles
-            if risk_levels.index(p.risk_level.value) >= min_index
-        ]
+        # Zuletzt veröffentlichte laufende Datensätze (30 Tage, Neubewertung
+        # in der periodischen Aktualisierung)
+        records_version, records = analyzer.published_records()
         
-        # Limitiere
-        flagged = flagged[:limit]
+        async def compute():
+            flagged = sorted(
+                (r for r in records.values() if levels.index(r.risk_level) >= levels.index(risk_level)),
+                key=CustomerScoreRecord.sort_key,
+                reverse=True
+            )
+            # Erzeuge nur die ausgegebenen Profile
+            return [view.materialize_profile(r) for r in flagged[:limit]]
         
-        return flagged
+        # Gleichzeitige/wiederholte Abfragen auf gleichem Datenstand teilen das Ergebnis
+        return await read_cache.get(
+            ("flagged-customers", risk_level, limit, view.data_version(), records_version),
+            compute
+        )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -395,38 +587,63 @@ async def get_statistics():
     Holt System-Statistiken
     """
     try:
-        total_customers = len(analyzer.transaction_history)
-        total_transactions = sum(
-            len(txns) for txns in analyzer.transaction_history.values()
+        view = analyzer.snapshot()
+        records_version, records = analyzer.published_records()
+        return await read_cache.get(
+            ("statistics", view.data_version(), records_version),
+            lambda: _compute_statistics(view, list(records.values()))
         )
-        
-        # Analysiere alle
-        profiles = analyzer.analyze_all_customers()
-        
-        risk_distribution = {
-            "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
-            "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
-            "orange": sum(1 for p in profiles if p.risk_level == RiskLevel.ORANGE),
-            "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
-        }
-        
-        avg_suspicion = sum(p.suspicion_score for p in profiles) / len(profiles) if profiles else 0
-        
-        return {
-            "total_customers": total_customers,
-            "total_transactions": total_transactions,
-            "risk_distribution": risk_distribution,
-            "average_suspicion_score": round(avg_suspicion, 2),
-            "flagged_percentage": round(
-                (risk_distribution["yellow"] + risk_distribution["orange"] + risk_distribution["red"]) / 
-                max(total_customers, 1) * 100, 2
-            )
-        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _compute_statistics(view: TransactionAnalyzer, profiles: List[CustomerScoreRecord]) -> Dict:
+    """Berechnet die System-Statistiken auf einem festen Datenstand (laufende Datensätze, 30 Tage)"""
+    total_customers = len(view.transaction_history)
+    total_transactions = view.transaction_history.n_transactions
+    
+    risk_distribution = {
+        "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
+        "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
+        "orange": sum(1 for p in profiles if p.risk_level == RiskLevel.ORANGE),
+        "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
+    }
+    
+    avg_suspicion = sum(p.suspicion_score for p in profiles) / len(profiles) if profiles else 0
+    
+    return {
+        "total_customers": total_customers,
+        "total_transactions": total_transactions,
+        "risk_distribution": risk_distribution,
+        "average_suspicion_score": round(avg_suspicion, 2),
+        "flagged_percentage": round(
+            (risk_distribution["yellow"] + risk_distribution["orange"] + risk_distribution["red"]) / 
+            max(total_customers, 1) * 100, 2
+        )
+    }
+
+
+def _reset_state():
+    """Verwirft alle Daten und erzeugt einen neuen Analyzer (unter Schreibsperre)"""
+    global analyzer, realtime_scorer, transaction_batcher, baseline_store
+    score_store.clear()
+    # Alte Verbindung schließen, bevor der Speicher geleert und ersetzt wird
+    baseline_store.close()
+    baseline_store = BaselineStore(baseline_store.db_path)
+    baseline_store.clear()
+    result_memo.clear()
+    analyzer = TransactionAnalyzer(
+        score_store=score_store,
+        retention_policy=retention_policy,
+        deduplicator=TransactionDeduplicator(),
+        baseline_store=baseline_store,
+        result_memo=result_memo
+    )
+    realtime_scorer = RealtimeScorer(analyzer, lock=analyzer_lock)
+    transaction_batcher = TransactionBatcher(realtime_scorer)
+
+
 @app.delete("/api/reset")
 async def reset_system():
     """
@@ -434,8 +651,12 @@ async def reset_system():
     
     ⚠️ ACHTUNG: Nur für Testing/Development
     """
-    global analyzer
-    analyzer = TransactionAnalyzer()
+    # Wartende Einzel-Transaktionen verwerfen, laufende Batches abwarten
+    # (bevor der Batcher mit dem alten Analyzer ersetzt wird)
+    await transaction_batcher.close("System wurde zurückgesetzt")
+    # Exklusiv: laufende Auswertungen und Einfügungen werden abgewartet
+    await worker_pool.run(_write_locked, _reset_state)
+    read_cache.clear()
     
     return {
         "status": "success",
@@ -448,7 +669,8 @@ async def analyze_transaction_batch(transactions: List[Transaction]):
     """
     Analysiert einen Batch von Transaktionen (als JSON)
     
-    Alternative zu CSV-Upload - nimmt JSON-Array von Transaktionen
+    Alternative zu CSV-Upload - nimmt JSON-Array von Transaktionen.
+    Bereits aufgenommene transaction_ids werden ignoriert (idempotent).
     """
     try:
         if not transactions:
@@ -457,15 +679,19 @@ async def analyze_transaction_batch(transactions: List[Transaction]):
                 detail="Keine Transaktionen bereitgestellt"
             )
         
-        # Füge Transaktionen hinzu
-        analyzer.add_transactions(transactions)
+        # Füge Transaktionen hinzu (Duplikate werden verworfen)
+        accepted = await worker_pool.run(_write_locked, analyzer.add_transactions, transactions)
+        duplicates = len(transactions) - len(accepted)
+        # Laufende Datensätze im Hintergrund nachbewerten
+        refresh_requested.set()
         
-        # Analysiere alle Kunden
-        profiles = analyzer.analyze_all_customers()
+        # Analysiere alle Kunden (Pre-Screen: garantiert unauffällige Kunden ohne Vollanalyse)
+        view = analyzer.snapshot()
+        profiles = await worker_pool.run(view.analyze_all_customer_records, prescreen=True)
         
-        # Filtere flagged customers
+        # Filtere flagged customers (nur diese als vollständige Profile)
         flagged = [
-            p for p in profiles
+            view.materialize_profile(p) for p in profiles
             if p.risk_level != RiskLevel.GREEN
         ]
         
@@ -479,7 +705,7 @@ async def analyze_transaction_batch(transactions: List[Transaction]):
         
         return AnalysisResponse(
             status="success",
-            message=f"{len(transactions)} Transaktionen analysiert",
+            message=f"{len(accepted)} Transaktionen analysiert ({duplicates} Duplikate ignoriert)",
             analyzed_customers=len(profiles),
             flagged_customers=flagged,
             summary=summary
@@ -491,184 +717,47 @@ async def analyze_transaction_batch(transactions: List[Transaction]):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/analyze/csv-upload")
-async def analyze_csv_upload(file: UploadFile = File(...)):
+@app.post("/api/analyze/budgeted", response_model=AnalysisResponse)
+async def analyze_with_time_budget(
+    time_budget_seconds: float = 60.0,
+    recent_days: int = 30
+):
     """
-    Analysiert CSV und erstellt automatisch eine markierte CSV-Datei
+    Zeitbegrenzte Analyse aller gespeicherten Kunden
     
-    Returns:
-        JSON mit Analyse-Zusammenfassung und Dateinamen der generierten CSV
+    Kunden werden nach Risiko-Prior analysiert (Bar-Volumen nah unter 10.000€,
+    aktuelle Aktivität). Nach Ablauf des Budgets nicht mehr analysierte Kunden
+    werden zurückgestellt und beim nächsten Aufruf zuerst analysiert.
+    
+    Args:
+        time_budget_seconds: Zeitbudget in Sekunden
+        recent_days: Zeitfenster für Analyse (Standard: 30 Tage)
     """
     try:
-        logger.info(f"CSV-Upload gestartet: {file.filename}")
-        
-        # Lese CSV
-        contents = await file.read()
-        
-        # Versuche verschiedene Encodings
-        df = None
-        encodings = ['utf-8', 'windows-1252', 'latin-1', 'cp1252']
-        
-        for encoding in encodings:
-            try:
-                decoded_content = contents.decode(encoding)
-                df = pd.read_csv(io.StringIO(decoded_content))
-                logger.info(f"CSV erfolgreich mit {encoding} gelesen")
-                break
-            except (UnicodeDecodeError, Exception):
-                continue
-        
-        if df is None:
-            raise HTTPException(status_code=400, detail="CSV konnte nicht gelesen werden")
-        
-        # Parse Transaktionen (neues deutsches Format)
-        is_new_format = 'Kundennummer' in df.columns
-        
-        if not is_new_format:
-            raise HTTPException(status_code=400, detail="Nur deutsches CSV-Format wird unterstützt")
-        
-        transactions = []
-        original_rows = []
-        
-        for idx, row in df.iterrows():
-            try:
-                customer_id = str(row['Kundennummer'])
-                transaction_id = str(row['Unique Transaktion ID'])
-                customer_name = str(row['Vollständiger Name'])
-                
-                amount_str = str(row['Auftragsvolumen']).replace(',', '.')
-                transaction_amount = float(amount_str)
-                
-                art = str(row['Art']).strip()
-                if art == "Kredit":
-                    payment_method = "Kreditkarte"
-                elif art == "Bar":
-                    payment_method = "Bar"
-                elif art == "SEPA":
-                    payment_method = "SEPA"
-                else:
-                    payment_method = art
-                
-                in_out = str(row['In/Out']).strip()
-                transaction_type = "investment" if in_out == "In" else "auszahlung"
-                
-                timestamp = None
-                if 'Timestamp' in df.columns and pd.notna(row['Timestamp']):
-                    try:
-                        date_str = str(row['Timestamp'])
-                        timestamp = pd.to_datetime(date_str, format='%d.%m.%Y')
-                        
-                        if 'Uhrzeit' in df.columns and pd.notna(row['Uhrzeit']):
-                            try:
-                                time_str = str(row['Uhrzeit']).replace(',', '.')
-                                time_decimal = float(time_str)
-                                hours = int(time_decimal * 24)
-                                minutes = int((time_decimal * 24 - hours) * 60)
-                                seconds = int(((time_decimal * 24 - hours) * 60 - minutes) * 60)
-                                timestamp = timestamp.replace(hour=hours, minute=minutes, second=seconds)
-                            except:
-                                pass
-                    except:
-                        timestamp = None
-                
-                txn = Transaction(
-                    customer_id=customer_id,
-                    transaction_id=transaction_id,
-                    customer_name=customer_name,
-                    transaction_amount=transaction_amount,
-                    payment_method=payment_method,
-                    transaction_type=transaction_type,
-                    timestamp=timestamp
-                )
-                transactions.append(txn)
-                original_rows.append(row)
-                
-            except Exception as e:
-                logger.warning(f"Fehler beim Parsen von Zeile {idx+2}: {e}")
-                continue
-        
-        if not transactions:
-            raise HTTPException(status_code=400, detail="Keine gültigen Transaktionen gefunden")
-        
-        logger.info(f"{len(transactions)} Transaktionen erfolgreich geparst")
+        if time_budget_seconds <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="time_budget_seconds muss größer als 0 sein"
+            )
         
-        # Erstelle Analyzer und analysiere
-        custom_analyzer = TransactionAnalyzer(
-            alpha=0.6,
-            beta=0.4,
-            historical_days=365,
-            use_tp_sp_system=True
+        # Analyse auf festem Datenstand; exklusiv nur das Vermerken der
+        # zurückgestellten Kunden im Analyzer
+        view = analyzer.snapshot()
+        result = await worker_pool.run(
+            view.analyze_all_customers_budgeted,
+            time_budget_seconds=time_budget_seconds,
+            recent_days=recent_days
         )
+        await worker_pool.run(_write_locked, _set_deferred_customers, result.deferred_customers)
+        profiles = result.profiles
         
-        custom_analyzer.add_transactions(transactions)
-        
-        # Verwende 30 Tage für aktuelle Analyse
-        # Kunden ohne Transaktionen in diesem Zeitfenster bekommen Default-Profil (GREEN, Score 0)
-        profiles = custom_analyzer.analyze_all_customers(recent_days=30)
-        
-        logger.info(f"{len(profiles)} Kunden analysiert")
-        
-        # Erstelle Analyse-Dictionary
-        customer_analysis = {}
-        for profile in profiles:
-            # Flags sind direkt im CustomerRiskProfile gespeichert
-            flags_str = ' | '.join(profile.flags) if profile.flags else ''
-            
-            customer_analysis[profile.customer_id] = {
-                'Risk_Level': profile.risk_level.value,
-                'Suspicion_Score': round(profile.suspicion_score, 2),  # Direkt verwenden, keine Multiplikation
-                'Flags': flags_str,
-                'Threshold_Avoidance_Ratio_%': round(profile.weight_analysis.threshold_avoidance_ratio * 100, 1) if profile.weight_analysis else 0.0,
-                'Cumulative_Large_Amount': round(profile.weight_analysis.cumulative_large_amount, 2) if profile.weight_analysis else 0.0,
-                'Temporal_Density_Weeks': round(profile.weight_analysis.temporal_density_weeks, 2) if profile.weight_analysis else 0.0,
-                'Layering_Score': round(profile.statistical_analysis.layering_score, 2) if profile.statistical_analysis else 0.0,
-                'Entropy_Complex': 'Ja' if profile.entropy_analysis and profile.entropy_analysis.is_complex else 'Nein',
-                # Trust_Score entfernt - nicht mehr verwendet
-            }
-        
-        # Erstelle Output-DataFrame
-        output_data = []
-        for idx, row in enumerate(original_rows):
-            customer_id = str(row['Kundennummer'])
-            analysis = customer_analysis.get(customer_id, {})
-            
-            output_row = row.to_dict()
-            output_row['Risk_Level'] = analysis.get('Risk_Level', 'GREEN')
-            output_row['Suspicion_Score'] = analysis.get('Suspicion_Score', 0.0)  # Direkt verwenden
-            output_row['Flags'] = analysis.get('Flags', '')
-            output_row['Threshold_Avoidance_Ratio_%'] = analysis.get('Threshold_Avoidance_Ratio_%', 0.0)
-            output_row['Cumulative_Large_Amount'] = analysis.get('Cumulative_Large_Amount', 0.0)
-            output_row['Temporal_Density_Weeks'] = analysis.get('Temporal_Density_Weeks', 0.0)
-            output_row['Layering_Score'] = analysis.get('Layering_Score', 0.0)
-            output_row['Entropy_Complex'] = analysis.get('Entropy_Complex', 'Nein')
-            # Trust_Score entfernt - nicht mehr verwendet
-            
-            output_data.append(output_row)
-        
-        output_df = pd.DataFrame(output_data)
-        
-        # Entferne Trust_Score aus DataFrame (für CSV und Excel)
-        if 'Trust_Score' in output_df.columns:
-            output_df = output_df.drop(columns=['Trust_Score'])
-        
-        # Speichere CSV
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_filename = f"Analyzed_Trades_{timestamp}.csv"
-        output_path = output_dir / output_filename
-        
-        output_df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        logger.info(f"Analysierte CSV gespeichert: {output_filename}")
-        
-        # Erstelle auch Excel-Datei (falls openpyxl verfügbar)
-        excel_filename = None
-        if OPENPYXL_AVAILABLE:
-            try:
-                excel_filename = create_excel_file(output_df, output_dir, timestamp)
-                logger.info(f"Analysierte Excel gespeichert: {excel_filename}")
-            except Exception as e:
-                logger.warning(f"Excel-Export fehlgeschlagen: {e}")
+        # Filtere flagged customers
+        flagged = [
+            p for p in profiles
+            if p.risk_level != RiskLevel.GREEN
+        ]
         
-        # Zusammenfassung
+        # Zähle nach Risk Level
         summary = {
             "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
             "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
@@ -676,15 +765,116 @@ async def analyze_csv_upload(file: UploadFile = File(...)):
             "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
         }
         
+        return AnalysisResponse(
+            status="success",
+            message=(
+                f"{len(profiles)} Kunden in {result.elapsed_seconds:.1f}s bewertet, "
+                f"{len(result.deferred_customers)} zurückgestellt"
+            ),
+            analyzed_customers=len(profiles),
+            flagged_customers=flagged,
+            deferred_customers=result.deferred_customers,
+            summary=summary
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/refresh")
+async def refresh_expired_windows():
+    """
+    Bewertet sofort alle Kunden neu, deren Zeitfenster sich seit der letzten
+    Aktualisierung geändert haben (läuft sonst alle REFRESH_INTERVAL_SECONDS)
+    """
+    try:
+        _, refreshed = await worker_pool.run(_refresh_windows, apply_retention=False)
+        
+        _, published = analyzer.published_records()
+        records = published.values()
         return {
             "status": "success",
-            "message": f"{len(transactions)} Transaktionen analysiert",
-            "analyzed_customers": len(profiles),
-            "summary": summary,
-            "csv_filename": output_filename,
-            "excel_filename": excel_filename
+            "refreshed_customers": len(refreshed),
+            "tracked_customers": len(published),
+            "flagged_customers": sum(1 for r in records if r.risk_level != RiskLevel.GREEN),
+            "pending_expiries": len(analyzer.expiry_scheduler)
         }
     
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/retention", response_model=RetentionMetrics)
+async def get_retention_metrics():
+    """
+    Kennzahlen zur Speicherbegrenzung (residente Transaktionen pro Kunde,
+    entfernte/ausgelagerte Transaktionen)
+    """
+    try:
+        return retention_policy.metrics(analyzer.transaction_history)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/backtest", response_model=BacktestResult)
+async def run_backtest(
+    start: datetime,
+    end: datetime,
+    step_days: int = 7,
+    recent_days: int = 30
+):
+    """
+    Backtest: Risiko-Level aller gespeicherten Kunden zu jedem Stichtag
+    
+    Der Referenzzeitpunkt wird von start bis end in Schritten von step_days
+    vorgeschoben; Transaktionen nach dem Stichtag bleiben unberücksichtigt.
+    
+    Args:
+        start: Erster Stichtag
+        end: Letzter Stichtag
+        step_days: Abstand der Stichtage in Tagen (Standard: 7)
+        recent_days: Zeitfenster für Analyse (Standard: 30 Tage)
+    """
+    try:
+        engine = BacktestEngine(analyzer.snapshot())
+        result = await worker_pool.run(engine.run, start, end, step_days, recent_days)
+        logger.info(
+            f"Backtest: {len(result.dates)} Stichtage, "
+            f"{result.evaluations} Analysen, {result.reused} übernommen"
+        )
+        return result
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/analyze/csv-upload")
+async def analyze_csv_upload(file: UploadFile = File(...)):
+    """
+    Analysiert CSV und erstellt automatisch eine markierte CSV-Datei
+    
+    Returns:
+        JSON mit Analyse-Zusammenfassung und Dateinamen der generierten CSV
+    """
+    try:
+        logger.info(f"CSV-Upload gestartet: {file.filename}")
+        
+        # Upload auf Disk zwischenspeichern (nicht als Ganzes in den Speicher lesen)
+        path = await worker_pool.run(csv_import.spool_upload, file.file, upload_dir)
+        
+        # Parsen, Analyse und Export im Worker-Thread
+        try:
+            return await worker_pool.run(_export_analyzed_upload, path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            path.unlink(missing_ok=True)
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -692,6 +882,268 @@ async def analyze_csv_upload(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Fehler: {str(e)}")
 
 
+# Analyse-Spalten der markierten CSV/Excel mit Werten für Kunden ohne Analyse
+EXPORT_COLUMN_DEFAULTS = {
+    'Risk_Level': 'GREEN',
+    'Suspicion_Score': 0.0,
+    'Flags': '',
+    'Threshold_Avoidance_Ratio_%': 0.0,
+    'Cumulative_Large_Amount': 0.0,
+    'Temporal_Density_Weeks': 0.0,
+    'Layering_Score': 0.0,
+    'Entropy_Complex': 'Nein',
+}
+
+# Zeilenlimit eines Excel-Arbeitsblatts (ohne Kopfzeile)
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def _export_analyzed_upload(
+    path: Path,
+    rows_progress=None,
+    progress=None,
+    include_flagged: bool = False
+) -> Dict:
+    """
+    Analysiert eine hochgeladene CSV und schreibt die markierte CSV/Excel
+    (Worker-Thread)
+    
+    Die Datei wird zweimal blockweise gelesen: zuerst für die Analyse, dann
+    für den Export der Originalzeilen mit den Analyse-Spalten.
+    
+    Args:
+        path: Zwischengespeicherte CSV-Datei
+        rows_progress: Fortschritts-Callback (geparste Zeilen), z.B. eines Jobs
+        progress: Fortschritts-Callback (analysiert, gesamt), z.B. eines Jobs
+        include_flagged: Profile der auffälligen Kunden mitliefern
+                         (flagged_customers, für Jobs)
+        
+    Returns:
+        Zusammenfassung mit Dateinamen
+        
+    Raises:
+        ValueError: CSV nicht lesbar, nicht im deutschen Format oder ohne gültige Transaktion
+    """
+    # Erstelle Analyzer und analysiere
+    custom_analyzer = TransactionAnalyzer(
+        alpha=0.6,
+        beta=0.4,
+        historical_days=365,
+        use_tp_sp_system=True,
+        score_store=score_store,
+        result_memo=result_memo,
+        live_state=False
+    )
+    
+    # Transaktionen blockweise einfügen; fehlerhafte Zeilen fehlen auch im Export
+    skipped_rows = set()
+    n_transactions = 0
+    for chunk in csv_import.iter_export_transactions(path, skipped_rows, progress=rows_progress):
+        custom_analyzer.add_transactions(chunk)
+        n_transactions += len(chunk)
+    
+    logger.info(f"{n_transactions} Transaktionen erfolgreich geparst")
+    
+    # Verwende 30 Tage für aktuelle Analyse
+    # Kunden ohne Transaktionen in diesem Zeitfenster bekommen Default-Profil (GREEN, Score 0)
+    # Kompakte Datensätze genügen für den Export (keine vollständigen Profile)
+    profiles = custom_analyzer.analyze_all_customer_records(recent_days=30, progress=progress)
+    
+    logger.info(f"{len(profiles)} Kunden analysiert")
+    
+    # Erstelle Analyse-Dictionary
+    customer_analysis = {}
+    for profile in profiles:
+        # Flag-Texte werden erst hier aus der Bitmaske erzeugt
+        flags = profile.flags()
+        flags_str = ' | '.join(flags) if flags else ''
+        
+        customer_analysis[profile.customer_id] = {
+            'Risk_Level': profile.risk_level.value,
+            'Suspicion_Score': round(profile.suspicion_score, 2),  # Direkt verwenden, keine Multiplikation
+            'Flags': flags_str,
+            'Threshold_Avoidance_Ratio_%': round(profile.threshold_avoidance_ratio * 100, 1),
+            'Cumulative_Large_Amount': round(profile.cumulative_large_amount, 2),
+            'Temporal_Density_Weeks': round(profile.temporal_density_weeks, 2),
+            'Layering_Score': round(profile.layering_score, 2),
+            'Entropy_Complex': 'Ja' if profile.entropy_complex else 'Nein',
+            # Trust_Score entfernt - nicht mehr verwendet
+        }
+    
+    # Speichere CSV: Originalzeilen blockweise mit Analyse-Spalten
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_filename = f"Analyzed_Trades_{timestamp}.csv"
+    output_path = output_dir / output_filename
+    
+    # Trust_Score entfernt - nicht mehr verwendet
+    replaced_columns = list(EXPORT_COLUMN_DEFAULTS) + ['Trust_Score']
+    output_rows = 0
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as output_file:
+        for chunk in csv_import.iter_original_rows(path, skipped_rows):
+            customer_ids = chunk['Kundennummer'].astype(str)
+            output_chunk = chunk.drop(columns=[c for c in replaced_columns if c in chunk.columns])
+            for column, default in EXPORT_COLUMN_DEFAULTS.items():
+                output_chunk[column] = [
+                    customer_analysis.get(customer_id, {}).get(column, default)
+                    for customer_id in customer_ids
+                ]
+            output_chunk.to_csv(output_file, header=(output_rows == 0), index=False)
+            output_rows += len(output_chunk)
+    logger.info(f"Analysierte CSV gespeichert: {output_filename}")
+    
+    # Erstelle auch Excel-Datei (falls openpyxl verfügbar und die Zeilen in ein Arbeitsblatt passen)
+    excel_filename = None
+    if OPENPYXL_AVAILABLE and output_rows > EXCEL_MAX_ROWS:
+        logger.warning(f"Excel-Export übersprungen: {output_rows} Zeilen (max. {EXCEL_MAX_ROWS})")
+    elif OPENPYXL_AVAILABLE:
+        try:
+            output_df = pd.read_csv(output_path, encoding='utf-8-sig')
+            excel_filename = create_excel_file(output_df, output_dir, timestamp)
+            logger.info(f"Analysierte Excel gespeichert: {excel_filename}")
+        except Exception as e:
+            logger.warning(f"Excel-Export fehlgeschlagen: {e}")
+    
+    # Zusammenfassung
+    summary = {
+        "green": sum(1 for p in profiles if p.risk_level == RiskLevel.GREEN),
+        "yellow": sum(1 for p in profiles if p.risk_level == RiskLevel.YELLOW),
+        "orange": sum(1 for p in profiles if p.risk_level == RiskLevel.ORANGE),
+        "red": sum(1 for p in profiles if p.risk_level == RiskLevel.RED),
+    }
+    
+    result = {
+        "status": "success",
+        "message": f"{n_transactions} Transaktionen analysiert",
+        "analyzed_customers": len(profiles),
+        "summary": summary,
+        "csv_filename": output_filename,
+        "excel_filename": excel_filename
+    }
+    if include_flagged:
+        result["flagged_customers"] = [
+            custom_analyzer.materialize_profile(p) for p in profiles
+            if p.risk_level != RiskLevel.GREEN
+        ]
+    return result
+
+
+def _csv_job(job: JobContext, path: Path, recent_days: int, historical_days: int) -> Dict:
+    """
+    Job-Funktion für /api/jobs/csv: Parsen und Analyse mit Fortschritt
+    
+    Returns:
+        Ergebnis-Dict für den JobManager
+    """
+    response = _analyze_uploaded_file(
+        path, recent_days, historical_days,
+        rows_progress=job.rows_parsed, progress=job.customers_analyzed
+    )
+    return {
+        "message": response.message,
+        "analyzed_customers": response.analyzed_customers,
+        "summary": response.summary,
+        "flagged_customers": response.flagged_customers
+    }
+
+
+def _csv_upload_job(job: JobContext, path: Path) -> Dict:
+    """
+    Job-Funktion für /api/jobs/csv-upload: Parsen, Analyse und markierte CSV/Excel
+    
+    Returns:
+        Ergebnis-Dict für den JobManager
+    """
+    return _export_analyzed_upload(
+        path, rows_progress=job.rows_parsed, progress=job.customers_analyzed, include_flagged=True
+    )
+
+
+@app.post("/api/jobs/csv", response_model=AnalysisJob, status_code=202)
+async def submit_csv_job(
+    file: UploadFile = File(...),
+    recent_days: int = Form(30),
+    historical_days: int = Form(365)
+):
+    """
+    Analysiert eine CSV-Datei im Hintergrund (wie /api/analyze/csv)
+    
+    Antwortet sofort mit der Job-ID; Fortschritt über GET /api/jobs/{job_id},
+    auffällige Kunden über GET /api/jobs/{job_id}/flagged.
+    """
+    path = await worker_pool.run(csv_import.spool_upload, file.file, upload_dir)
+    job = job_manager.submit(
+        "csv", _csv_job, path, recent_days, historical_days,
+        filename=file.filename, cleanup=partial(path.unlink, missing_ok=True)
+    )
+    logger.info(f"Job {job.job_id} (csv) eingereiht: {file.filename}")
+    return job
+
+
+@app.post("/api/jobs/csv-upload", response_model=AnalysisJob, status_code=202)
+async def submit_csv_upload_job(file: UploadFile = File(...)):
+    """
+    Analysiert eine CSV-Datei im Hintergrund und erstellt die markierte
+    CSV/Excel-Datei (wie /api/analyze/csv-upload)
+    
+    Dateinamen stehen nach Abschluss im Job (csv_filename, excel_filename).
+    """
+    path = await worker_pool.run(csv_import.spool_upload, file.file, upload_dir)
+    job = job_manager.submit(
+        "csv-upload", _csv_upload_job, path,
+        filename=file.filename, cleanup=partial(path.unlink, missing_ok=True)
+    )
+    logger.info(f"Job {job.job_id} (csv-upload) eingereiht: {file.filename}")
+    return job
+
+
+@app.get("/api/jobs", response_model=List[AnalysisJob])
+async def list_jobs():
+    """Alle Analyse-Jobs (neueste zuerst)"""
+    return job_manager.list_jobs()
+
+
+@app.get("/api/jobs/{job_id}", response_model=AnalysisJob)
+async def get_job(job_id: str):
+    """
+    Status, Fortschritt (geparste Zeilen, analysierte Kunden, Restlaufzeit)
+    und Ergebnis-Zusammenfassung eines Jobs
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} nicht gefunden")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/flagged", response_model=JobFlaggedPage)
+async def get_job_flagged_customers(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    Auffällige Kunden eines abgeschlossenen Jobs (seitenweise)
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} nicht gefunden")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} ist nicht abgeschlossen ({job.status.value})")
+    return await worker_pool.run(job_manager.flagged, job_id, offset, limit)
+
+
+@app.delete("/api/jobs/{job_id}", response_model=AnalysisJob)
+async def cancel_job(job_id: str):
+    """
+    Bricht einen Job ab (wartend: sofort, laufend: bei der nächsten
+    Fortschrittsmeldung)
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} nicht gefunden")
+    logger.info(f"Job {job_id}: Abbruch angefordert")
+    return job
+
+
 def create_excel_file(df: pd.DataFrame, output_dir: Path, timestamp: str) -> str:
     """
     Erstellt eine formatierte Excel-Datei aus dem DataFrame
@@ -0,0 +1,135 @@
+"""
+Micro-Batching für Echtzeit-Transaktionen
+
+Unter Last treffen viele /api/analyze/transaction-Aufrufe gleichzeitig ein.
+Statt jede Transaktion einzeln einzufügen und zu bewerten, sammelt
+TransactionBatcher Anfragen für wenige Millisekunden (bzw. bis zu einer
+Höchstzahl), fügt sie in einem Schreibvorgang ein und bewertet jeden
+betroffenen Kunden einmal - auch wenn mehrere seiner Transaktionen im Batch
+liegen (RealtimeScorer.score_batch). Jede Anfrage erhält den Datensatz ihres
+Kunden über ein Future.
+
+Batches werden nacheinander in einem eigenen Worker-Thread bewertet;
+währenddessen nimmt die Event-Loop weitere Anfragen für den nächsten Batch an.
+close() beendet den Batcher (z.B. vor dem Zurücksetzen): wartende Anfragen
+schlagen fehl, laufende Batches werden abgewartet.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+from models import Transaction
+from profile_record import CustomerScoreRecord
+from realtime_scorer import RealtimeScorer
+
+
+class TransactionBatcher:
+    """
+    Sammelt Einzel-Transaktionen und bewertet sie batchweise
+    """
+
+    def __init__(
+        self,
+        scorer: RealtimeScorer,
+        max_delay_seconds: float = 0.005,
+        max_batch_size: int = 256
+    ):
+        """
+        Args:
+            scorer: Echtzeit-Bewertung (Einfügen und Neubewertung)
+            max_delay_seconds: Höchste Wartezeit der ersten Anfrage eines Batches
+            max_batch_size: Batch wird bei dieser Größe sofort verarbeitet
+        """
+        self.scorer = scorer
+        self.max_delay_seconds = max_delay_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[Transaction, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Ein Worker: Batches werden in Eingangsreihenfolge nacheinander bewertet
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batcher")
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        # Kennzahlen
+        self.batches = 0
+        self.transactions = 0
+
+    async def submit(self, transaction: Transaction) -> CustomerScoreRecord:
+        """
+        Reiht eine Transaktion in den nächsten Batch ein
+
+        Args:
+            transaction: Neue Transaktion
+
+        Returns:
+            CustomerScoreRecord des Kunden nach Verarbeitung des Batches
+            
+        Raises:
+            RuntimeError: Batcher ist geschlossen
+        """
+        if self._closed:
+            raise RuntimeError("TransactionBatcher ist geschlossen")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((transaction, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Übergibt die gesammelten Anfragen als Batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._process(batch))
+        # Referenz halten, bis der Batch verarbeitet ist
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: List[Tuple[Transaction, asyncio.Future]]):
+        """Fügt einen Batch ein, bewertet die Kunden und löst die Futures auf"""
+        transactions = [transaction for transaction, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            records = await loop.run_in_executor(self._executor, self.scorer.score_batch, transactions)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.transactions += len(batch)
+        for transaction, future in batch:
+            if not future.done():
+                future.set_result(records[transaction.customer_id])
+
+    async def close(self, reason: str = "TransactionBatcher wurde geschlossen"):
+        """
+        Schließt den Batcher (in der Event-Loop aufrufen)
+
+        Noch nicht übergebene Anfragen schlagen mit RuntimeError(reason) fehl,
+        bereits übergebene Batches werden fertig bewertet. Danach werden keine
+        Anfragen mehr angenommen.
+
+        Args:
+            reason: Fehlermeldung für die wartenden Anfragen
+        """
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(reason))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Keine laufenden Batches mehr: beendet sofort
+        self._executor.shutdown(wait=True)
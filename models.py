@@ -151,20 +151,58 @@ class CustomerRiskProfile(BaseModel):
     statistical_analysis: Optional[StatisticalAnalysis] = Field(default=None, description="Statistische Analyse")
     
     # Gesamtbewertung
-    suspicion_score: float = Field(..., description="Gesamtverdachts-Score (M)")
+    suspicion_score: Optional[float] = Field(..., description="Gesamtverdachts-Score (M); None bei Vorprüfung")
+    score_upper_bound: Optional[float] = Field(default=None, description="Obere Schranke des Suspicion Scores aus der Vorprüfung")
     risk_level: RiskLevel
     flags: List[str] = Field(default_factory=list, description="Spezifische Warnungen")
     recommendations: List[str] = Field(default_factory=list, description="Empfohlene Maßnahmen")
+    prescreened: bool = Field(default=False, description="Nur Vorprüfung: Detektoren nicht ausgeführt, kein suspicion_score (siehe score_upper_bound)")
+    approximated: bool = Field(default=False, description="Kostenlimit erreicht: Entropie-Baseline aus Stichprobe berechnet")
     
     analysis_timestamp: datetime = Field(default_factory=datetime.now)
 
 
+class BudgetedAnalysisResult(BaseModel):
+    """Ergebnis einer zeitbegrenzten Analyse"""
+    profiles: List[CustomerRiskProfile] = Field(default_factory=list, description="Fertige Profile (nach Score sortiert)")
+    deferred_customers: List[str] = Field(default_factory=list, description="Nicht mehr analysierte Kunden (nächster Lauf zuerst)")
+    budget_exhausted: bool = Field(default=False, description="Zeitbudget abgelaufen?")
+    elapsed_seconds: float = Field(default=0.0, description="Benötigte Zeit")
+
+
+class BacktestResult(BaseModel):
+    """Ergebnis eines Backtests (Risiko-Level zu mehreren Stichtagen)"""
+    dates: List[datetime] = Field(default_factory=list, description="Stichtage")
+    risk_levels: Dict[str, List[Optional[RiskLevel]]] = Field(default_factory=dict, description="Kunden-ID → Risiko-Level pro Stichtag (None = noch keine Transaktionen)")
+    suspicion_scores: Dict[str, List[Optional[float]]] = Field(default_factory=dict, description="Kunden-ID → Suspicion Score pro Stichtag")
+    evaluations: int = Field(default=0, description="Anzahl durchgeführter Kundenanalysen")
+    reused: int = Field(default=0, description="Anzahl unverändert übernommener Ergebnisse")
+
+
+class RetentionMetrics(BaseModel):
+    """Kennzahlen zur Speicherbegrenzung der Transaktionshistorie"""
+    resident_transactions: int = Field(default=0, description="Transaktionen im Speicher")
+    resident_customers: int = Field(default=0, description="Kunden im Speicher")
+    max_resident_transactions: Optional[int] = Field(default=None, description="Speicherbudget (None = unbegrenzt)")
+    retention_days: int = Field(..., description="Aufbewahrung im Speicher (Tage vor Referenzzeitpunkt)")
+    transactions_per_customer_mean: float = Field(default=0.0, description="Residente Transaktionen pro Kunde (Mittelwert)")
+    transactions_per_customer_p95: float = Field(default=0.0, description="Residente Transaktionen pro Kunde (95. Perzentil)")
+    transactions_per_customer_max: int = Field(default=0, description="Residente Transaktionen pro Kunde (Maximum)")
+    top_customers: Dict[str, int] = Field(default_factory=dict, description="Kunden mit den meisten residenten Transaktionen")
+    evicted_total: int = Field(default=0, description="Insgesamt entfernte Transaktionen")
+    spilled_total: int = Field(default=0, description="Davon auf Disk ausgelagert")
+    budget_evictions: int = Field(default=0, description="Wegen Speicherbudget (innerhalb des Fensters) entfernt")
+    last_cutoff: Optional[datetime] = Field(default=None, description="Letzter Cutoff")
+    last_run: Optional[datetime] = Field(default=None, description="Letzter Retention-Lauf")
+
+
 class AnalysisResponse(BaseModel):
     """API Response für Analysen"""
     status: str
     message: str
     analyzed_customers: int
     flagged_customers: List[CustomerRiskProfile]
+    deferred_customers: List[str] = Field(default_factory=list, description="Aus Zeitgründen zurückgestellte Kunden")
     summary: Dict[str, int] = Field(
         default_factory=lambda: {
             "green": 0,
@@ -175,6 +213,46 @@ class AnalysisResponse(BaseModel):
     )
 
 
+class JobStatus(str, Enum):
+    """Status einer Hintergrund-Analyse"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class AnalysisJob(BaseModel):
+    """Hintergrund-Analyse einer hochgeladenen Datei (Status, Fortschritt, Ergebnis)"""
+    job_id: str = Field(..., description="Job-ID")
+    kind: str = Field(..., description="csv (Analyse) oder csv-upload (markierte CSV/Excel)")
+    status: JobStatus = Field(default=JobStatus.QUEUED, description="Status")
+    filename: Optional[str] = Field(default=None, description="Name der hochgeladenen Datei")
+    created_at: datetime = Field(default_factory=datetime.now, description="Eingereicht")
+    started_at: Optional[datetime] = Field(default=None, description="Gestartet")
+    finished_at: Optional[datetime] = Field(default=None, description="Beendet")
+    rows_parsed: int = Field(default=0, description="Bisher geparste Zeilen")
+    customers_total: int = Field(default=0, description="Zu analysierende Kunden")
+    customers_analyzed: int = Field(default=0, description="Bisher analysierte Kunden")
+    eta_seconds: Optional[float] = Field(default=None, description="Geschätzte Restlaufzeit der Analyse")
+    message: Optional[str] = Field(default=None, description="Ergebnismeldung")
+    error: Optional[str] = Field(default=None, description="Fehlermeldung")
+    analyzed_customers: int = Field(default=0, description="Bewertete Kunden")
+    flagged_count: int = Field(default=0, description="Auffällige Kunden (siehe /flagged)")
+    summary: Dict[str, int] = Field(default_factory=dict, description="Kunden pro Risiko-Level")
+    csv_filename: Optional[str] = Field(default=None, description="Markierte CSV (csv-upload)")
+    excel_filename: Optional[str] = Field(default=None, description="Markierte Excel-Datei (csv-upload)")
+
+
+class JobFlaggedPage(BaseModel):
+    """Seite der auffälligen Kunden eines Jobs"""
+    job_id: str
+    total: int = Field(..., description="Anzahl auffälliger Kunden")
+    offset: int
+    limit: int
+    flagged_customers: List[CustomerRiskProfile]
+
+
 class HealthResponse(BaseModel):
     """Health Check Response"""
     status: str
@@ -0,0 +1,343 @@
+"""
+Populations-Kontext für Peer-Vergleiche und Clustering
+
+Einmal pro Datenstand berechnete, von allen Kunden geteilte Strukturen:
+- Neuester Timestamp (Referenzzeitpunkt für historische Daten)
+- Sortierte Beträge aller Transaktionen mit Präfixsummen (bei Bedarf)
+  → Peer-Statistik (Mittelwert/Std ähnlich großer Transaktionen anderer
+  Kunden) in O(log n) statt eines Durchlaufs über alle Transaktionen
+- Standardisierung und K-Means-Fit der Kunden-Features (bei Bedarf)
+  → Clustering-Score ohne erneuten Fit pro Kunde
+
+Dazu CustomerTimeline: zeitlich sortierte Transaktionen eines Kunden und
+deren Tages-Aggregate (DailyWeightIndex), damit mehrere Analyse-Horizonte
+dieselbe Sortierung und dieselben Präfixsummen teilen.
+
+Die Ergebnisse entsprechen der bisherigen Berechnung in
+TransactionAnalyzer.analyze_customer bzw. StatisticalAnalyzer.clustering_analysis.
+"""
+
+import hashlib
+import itertools
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from models import Transaction
+from statistical_methods import StatisticalAnalyzer
+from weight_detector import WeightDetector, DailyWeightIndex
+
+
+class PopulationContext:
+    """
+    Geteilte Populations-Statistiken eines Datenstands
+    """
+
+    # Mindestanzahl Peer-Transaktionen für die Peer-Abweichung
+    MIN_PEER_TRANSACTIONS = 10
+
+    # Laufende Nummer je aufgebautem Kontext (Bezug für abgeleitete Zustände)
+    _sequence = itertools.count(1)
+
+    def __init__(
+        self,
+        transaction_history: Dict[str, List[Transaction]],
+        statistical_analyzer: StatisticalAnalyzer,
+        n_clusters: int = 5
+    ):
+        """
+        Args:
+            transaction_history: Kunden-ID → Transaktionen
+            statistical_analyzer: Liefert die Feature-Extraktion für das Clustering
+            n_clusters: Anzahl Cluster (wie clustering_analysis)
+        """
+        self.statistical_analyzer = statistical_analyzer
+        self.n_clusters = n_clusters
+        self.sequence = next(PopulationContext._sequence)
+        self.n_transactions = sum(len(txns) for txns in transaction_history.values())
+
+        # Neuester Timestamp
+        timestamps = [
+            t.timestamp for txns in transaction_history.values() for t in txns if t.timestamp
+        ]
+        self.latest_timestamp: Optional[datetime] = max(timestamps) if timestamps else None
+
+        # Peer-Statistik und Clustering-Fit erst bei Bedarf (Läufe, die nur
+        # Score/Risiko-Level brauchen, verwenden beides nicht)
+        self._transaction_history = transaction_history
+        self._lock = threading.Lock()
+        self._peers_ready = False
+        self._clustering_ready = False
+        self._customer_arrays: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._scaler: Optional[StandardScaler] = None
+        self._kmeans: Optional[KMeans] = None
+
+    def prepare(self) -> 'PopulationContext':
+        """
+        Baut Peer-Statistik und Clustering-Fit sofort auf (sonst beim ersten
+        Zugriff), z.B. außerhalb der Schreibsperre des Analyzers
+
+        Returns:
+            self
+        """
+        self._ensure_peers()
+        self._ensure_clustering()
+        return self
+
+    def _ensure_peers(self):
+        """Sortierte Beträge mit Präfixsummen (um Shift zentriert gegen Auslöschung)"""
+        if self._peers_ready:
+            return
+        with self._lock:
+            if self._peers_ready:
+                return
+            amounts = np.array(
+                [t.transaction_amount for txns in self._transaction_history.values() for t in txns],
+                dtype=float
+            )
+            self._shift = float(np.median(amounts)) if len(amounts) else 0.0
+            self._sorted_amounts, self._prefix_sum, self._prefix_sq = self._prefix_arrays(amounts)
+            self._peers_ready = True
+
+    def _ensure_clustering(self):
+        """Clustering: Features aller Kunden (Kunden-IDs sortiert wie groupby)"""
+        if self._clustering_ready:
+            return
+        with self._lock:
+            if self._clustering_ready:
+                return
+            transaction_history = self._transaction_history
+            if self.n_transactions >= 50 and len(transaction_history) >= self.n_clusters:
+                features = np.array([
+                    self._customer_features(cid)
+                    for cid in sorted(transaction_history.keys())
+                ])
+                scaler = StandardScaler()
+                features_scaled = scaler.fit_transform(features)
+                kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
+                kmeans.fit(features_scaled)
+                self._scaler, self._kmeans = scaler, kmeans
+            self._clustering_ready = True
+
+    def _customer_features(self, customer_id: str) -> List[float]:
+        """Clustering-Features aller Transaktionen eines Kunden (aus den laufenden Aggregaten, falls vorhanden)"""
+        transactions = self._transaction_history[customer_id]
+        aggregates = getattr(transactions, 'aggregates', None)
+        if aggregates is not None:
+            return aggregates.features()
+        return self.statistical_analyzer._extract_features(transactions)
+
+    def _prefix_arrays(self, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sortierte Beträge und Präfixsummen (Summe, Quadratsumme) der zentrierten Werte"""
+        sorted_amounts = np.sort(amounts)
+        centered = sorted_amounts - self._shift
+        prefix_sum = np.concatenate(([0.0], np.cumsum(centered)))
+        prefix_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+        return sorted_amounts, prefix_sum, prefix_sq
+
+    def _range_sums(
+        self,
+        arrays: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        low: float,
+        high: float
+    ) -> Tuple[int, float, float]:
+        """Anzahl, Summe und Quadratsumme (zentriert) aller Beträge in [low, high]"""
+        sorted_amounts, prefix_sum, prefix_sq = arrays
+        lo = int(np.searchsorted(sorted_amounts, low, side='left'))
+        hi = int(np.searchsorted(sorted_amounts, high, side='right'))
+        return hi - lo, prefix_sum[hi] - prefix_sum[lo], prefix_sq[hi] - prefix_sq[lo]
+
+    def peer_statistics(
+        self,
+        customer_id: str,
+        customer_mean: float
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Peer-Statistik: Transaktionen anderer Kunden mit ähnlicher Größe (±50%)
+
+        Args:
+            customer_id: Kunden-ID (eigene Transaktionen werden ausgeschlossen)
+            customer_mean: Durchschnittsbetrag des Kunden im aktuellen Fenster
+
+        Returns:
+            (Mittelwert, Standardabweichung) der Peer-Beträge oder None
+            bei zu wenigen Peers
+        """
+        if customer_mean <= 0:
+            return None
+        self._ensure_peers()
+
+        low, high = 0.5 * customer_mean, 2.0 * customer_mean
+        count, total, total_sq = self._range_sums(
+            (self._sorted_amounts, self._prefix_sum, self._prefix_sq), low, high
+        )
+
+        # Eigene Transaktionen abziehen
+        own = self._customer_arrays.get(customer_id)
+        if own is None:
+            own_amounts = np.array(
+                [t.transaction_amount for t in self._transaction_history.get(customer_id, [])],
+                dtype=float
+            )
+            own = self._prefix_arrays(own_amounts)
+            self._customer_arrays[customer_id] = own
+        own_count, own_total, own_sq = self._range_sums(own, low, high)
+
+        count -= own_count
+        if count < self.MIN_PEER_TRANSACTIONS:
+            return None
+
+        mean_centered = (total - own_total) / count
+        variance = max(0.0, (total_sq - own_sq) / count - mean_centered * mean_centered)
+        return mean_centered + self._shift, float(np.sqrt(variance))
+
+    def clustering_score(self, customer_transactions: List[Transaction]) -> float:
+        """
+        Clustering-Score mit dem geteilten K-Means-Fit
+
+        Returns:
+            Clustering Score (0-1, höher = weiter vom Cluster-Zentrum)
+        """
+        if not customer_transactions:
+            return 0.0
+        self._ensure_clustering()
+        if self._kmeans is None:
+            return 0.0
+
+        customer_features = self.statistical_analyzer._extract_features(customer_transactions)
+        customer_features_scaled = self._scaler.transform(np.array([customer_features]))
+
+        distances = np.linalg.norm(
+            self._kmeans.cluster_centers_ - customer_features_scaled[0],
+            axis=1
+        )
+
+        # Normalisiere (typische Distanzen liegen bei 0-5)
+        return min(float(np.min(distances)) / 5.0, 1.0)
+
+
+def _transaction_digest(transaction: Transaction, time_us: int) -> int:
+    """Stabiler 64-Bit-Digest des Inhalts einer Transaktion (Timestamp in µs seit Epoch)"""
+    content = "\x1f".join((
+        transaction.transaction_id,
+        repr(float(transaction.transaction_amount)),
+        transaction.payment_method.value,
+        transaction.transaction_type.value,
+        str(time_us)
+    ))
+    return int.from_bytes(hashlib.blake2b(content.encode(), digest_size=8).digest(), 'little')
+
+
+class CustomerTimeline:
+    """
+    Nach Zeit sortierte Transaktionen eines Kunden für mehrere Zeitfenster
+
+    Fensterabfragen per Binärsuche; Ergebnisse in Einfügereihenfolge wie
+    TransactionAnalyzer.get_customer_transactions.
+    """
+
+    def __init__(self, transactions: List[Transaction]):
+        """
+        Args:
+            transactions: Transaktionen des Kunden (Einfügereihenfolge)
+        """
+        self.transactions = transactions
+        positions = np.array([i for i, t in enumerate(transactions) if t.timestamp], dtype=int)
+        times = np.array(
+            [transactions[i].timestamp for i in positions], dtype='datetime64[us]'
+        )
+        order = np.argsort(times, kind='stable')
+        self._positions = positions[order]
+        self._times = times[order]
+        self._daily_index: Optional[DailyWeightIndex] = None
+        self._digests: Optional[np.ndarray] = None
+
+    def daily_index(self, detector: WeightDetector) -> DailyWeightIndex:
+        """Tages-Aggregate für die Weight-Berechnung (einmal pro Kunde erzeugt)"""
+        if self._daily_index is None:
+            self._daily_index = DailyWeightIndex(
+                detector,
+                [self.transactions[i] for i in self._positions]
+            )
+        return self._daily_index
+
+    def index_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """
+        Index-Bereich (in Zeitsortierung) für start <= timestamp < end
+        (und timestamp <= until, falls angegeben)
+        """
+        return self._range(start, end, until)
+
+    def _range(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        until: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """Index-Bereich (sortiert) für start <= timestamp < end, timestamp <= until"""
+        lo = int(np.searchsorted(self._times, np.datetime64(start, 'us'), side='left')) if start else 0
+        hi = int(np.searchsorted(self._times, np.datetime64(end, 'us'), side='left')) if end else len(self._times)
+        if until:
+            hi = min(hi, int(np.searchsorted(self._times, np.datetime64(until, 'us'), side='right')))
+        return lo, max(lo, hi)
+
+    def between(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Transaction]:
+        """
+        Transaktionen mit start <= timestamp < end (und timestamp <= until)
+
+        Returns:
+            Liste in Einfügereihenfolge
+        """
+        lo, hi = self._range(start, end, until)
+        return [self.transactions[i] for i in np.sort(self._positions[lo:hi])]
+
+    def times_in(self, lo: int, hi: int) -> np.ndarray:
+        """Sortierte Timestamps des Index-Bereichs lo..hi (datetime64[us])"""
+        return self._times[lo:hi]
+
+    def digests_in(self, lo: int, hi: int) -> np.ndarray:
+        """
+        64-Bit-Inhalts-Digests (Transaktions-ID, Betrag, Zahlungsmethode,
+        Transaktionsart, Timestamp) des Index-Bereichs lo..hi (uint64, für
+        BaselineStore; über Prozesse hinweg stabil)
+        """
+        if self._digests is None:
+            self._digests = np.array(
+                [
+                    _transaction_digest(self.transactions[i], time_us)
+                    for i, time_us in zip(self._positions, self._times.astype(np.int64).tolist())
+                ],
+                dtype=np.uint64
+            )
+        return self._digests[lo:hi]
+
+    def sorted_slice(self, lo: int, hi: int) -> List[Transaction]:
+        """Transaktionen des Index-Bereichs lo..hi, nach Timestamp sortiert"""
+        return [self.transactions[i] for i in self._positions[lo:hi]]
+
+    def sorted_between(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Transaction]:
+        """
+        Transaktionen mit start <= timestamp < end (und timestamp <= until)
+
+        Returns:
+            Liste nach Timestamp sortiert (stabil)
+        """
+        lo, hi = self._range(start, end, until)
+        return [self.transactions[i] for i in self._positions[lo:hi]]
@@ -238,10 +238,43 @@ class PredictabilityDetector:
         
         return predictability
     
+    def calculate_historical_predictability(
+        self,
+        historical_transactions: List[Transaction]
+    ) -> float:
+        """
+        Predictability innerhalb der Historie (letzte 30 Transaktionen gegen
+        die davor) als Baseline für den Z-Score
+        
+        Args:
+            historical_transactions: Historische Transaktionen (mind. 10)
+            
+        Returns:
+            Historische Predictability (0.0-1.0)
+        """
+        hist_temporal = self.calculate_temporal_stability(
+            historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
+            historical_transactions[:-30] if len(historical_transactions) >= 30 else []
+        )
+        hist_amount = self.calculate_amount_consistency(
+            historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
+            historical_transactions[:-30] if len(historical_transactions) >= 30 else []
+        )
+        hist_channel = self.calculate_channel_continuity(
+            historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
+            historical_transactions[:-30] if len(historical_transactions) >= 30 else []
+        )
+        return self.calculate_overall_predictability(
+            hist_temporal,
+            hist_amount,
+            hist_channel
+        )
+    
     def analyze(
         self,
         recent_transactions: List[Transaction],
-        historical_transactions: List[Transaction]
+        historical_transactions: List[Transaction],
+        historical_predictability: Optional[float] = None
     ) -> PredictabilityAnalysis:
         """
         Vollständige Predictability-Analyse
@@ -249,6 +282,8 @@ class PredictabilityDetector:
         Args:
             recent_transactions: Aktuelle Transaktionen (30 Tage)
             historical_transactions: Historische Transaktionen (Baseline)
+            historical_predictability: Gespeicherte historische Predictability
+                                       (statt Berechnung aus historical_transactions)
             
         Returns:
             PredictabilityAnalysis Objekt
@@ -281,24 +316,12 @@ class PredictabilityDetector:
         # 5. Z-Score (Abweichung von historischer Baseline)
         z_score = 0.0
         if historical_transactions and len(historical_transactions) >= 10:
-            # Berechne historische Predictability als Baseline
-            hist_temporal = self.calculate_temporal_stability(
-                historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
-                historical_transactions[:-30] if len(historical_transactions) >= 30 else []
-            )
-            hist_amount = self.calculate_amount_consistency(
-                historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
-                historical_transactions[:-30] if len(historical_transactions) >= 30 else []
-            )
-            hist_channel = self.calculate_channel_continuity(
-                historical_transactions[-30:] if len(historical_transactions) >= 30 else historical_transactions,
-                historical_transactions[:-30] if len(historical_transactions) >= 30 else []
-            )
-            hist_predictability = self.calculate_overall_predictability(
-                hist_temporal,
-                hist_amount,
-                hist_channel
-            )
+            # Historische Predictability als Baseline
+            if historical_predictability is None:
+                historical_predictability = self.calculate_historical_predictability(
+                    historical_transactions
+                )
+            hist_predictability = historical_predictability
             
             # Berechne Z-Score (wie stark weicht aktuelle Predictability ab?)
             # Annahme: Standardabweichung von Predictability ist ~0.15
@@ -0,0 +1,619 @@
+"""
+Vektorisierte Vorprüfung (Pre-Screen) vor den vollständigen Detektoren
+
+Berechnet günstige, absolute Indikatoren für die gesamte Population in einem
+Durchgang (pandas/numpy) und leitet daraus eine beweisbare obere Schranke für
+den TP/SP-Suspicion-Score jedes Kunden ab:
+- Threshold-Avoidance (Anteil und kumulative Summe nah unter 10.000€)
+- Temporale Dichte (Transaktionen/Woche)
+- Entropien des aktuellen Fensters (exakt, ohne historische Baseline)
+- Bar-/Elektronik-Anteile für Layering
+- Maximales Volumen benachbarter Zeit-Buckets für Velocity
+
+Kunden, deren obere Schranke unter der GREEN-Grenze liegt, können das
+Risiko-Level GREEN nicht verlassen und müssen nicht voll analysiert werden.
+
+Herleitung der Schranke (TP/SP-System, siehe TransactionAnalyzer):
+- Weight-SP: Dichte-Punkte exakt; is_suspicious-abhängige Punkte nur, wenn
+  eine absolute Smurfing-Bedingung erfüllt ist oder der Weight-Z-Score
+  (mindestens 2 historische Transaktionen) sie auslösen kann
+- Entropie-SP: exakt (hängt nur vom aktuellen Fenster ab)
+- Predictability: untere Schranke der Gesamt-Predictability; Historien-
+  Vergleiche (Betrags-CV, dominante Zahlungsmethode) exakt aus dem
+  historischen Fenster, daraus SP-Obergrenze und TP-Untergrenze;
+  Z-Score-SP nur ab 10 historischen Tx und Predictability unter 0.7
+  (historische Predictability ist höchstens 1)
+- Statistik-SP: Benford exakt, Velocity/Zeitanomalie/Layering über obere
+  Schranken der Teil-Scores
+- Verstärkung: monoton in den Modul-SP, daher mit den Schranken ausgewertet
+- Relative Komponente: Z-Scores sind auf 5 begrenzt; Weight-Z braucht
+  mindestens 2 historische Transaktionen, Entropie-Z ein historisches
+  30-Tage-Fenster mit mehr als 5 Transaktionen
+- Nichtlineare Skalierung ist monoton steigend
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models import Transaction, CustomerInfo
+from weight_detector import WeightDetector
+from entropy_detector import EntropyDetector
+
+
+# Toleranz für Schwellenwert-Vergleiche (Rundungsunterschiede zur Einzelberechnung)
+_EPS = 1e-9
+
+
+class PreScreener:
+    """
+    Berechnet Vorprüfungs-Indikatoren und Score-Obergrenzen für alle Kunden
+    """
+
+    def __init__(
+        self,
+        weight_detector: WeightDetector,
+        entropy_detector: EntropyDetector
+    ):
+        """
+        Args:
+            weight_detector: Weight-Detektor (liefert Schwellenwerte)
+            entropy_detector: Entropie-Detektor (liefert Bins und Gewichte)
+        """
+        self.weight_detector = weight_detector
+        self.entropy_detector = entropy_detector
+
+    def compute_indicators(
+        self,
+        transaction_history: Dict[str, List[Transaction]],
+        reference_time: datetime,
+        recent_days: int,
+        historical_days: int,
+        customer_info: Dict[str, CustomerInfo] = None,
+        alpha: float = 0.6,
+        beta: float = 0.4
+    ) -> pd.DataFrame:
+        """
+        Berechnet Indikatoren und Score-Obergrenze für alle Kunden
+
+        Die Fensterwahl entspricht TransactionAnalyzer.analyze_customer
+        (inkl. Halbierung bei recent_days >= historical_days).
+
+        Args:
+            transaction_history: Kunden-ID → Transaktionen
+            reference_time: Referenzzeitpunkt ("jetzt" oder Datenende)
+            recent_days: Zeitfenster für aktuelle Analyse
+            historical_days: Zeitfenster für historische Baseline
+            customer_info: Kunden-ID → CustomerInfo (SoF, Einkommen)
+            alpha: Gewicht Weight-Z-Score (relative Komponente)
+            beta: Gewicht Entropy-Z-Score (relative Komponente)
+
+        Returns:
+            DataFrame (Index: customer_id) mit Indikatoren und 'score_upper_bound';
+            Kunden ohne Transaktionen im aktuellen Fenster fehlen
+        """
+        customer_info = customer_info or {}
+
+        df, historical = self._recent_window(
+            transaction_history, reference_time, recent_days, historical_days
+        )
+
+        if df.empty:
+            return pd.DataFrame()
+
+        wd = self.weight_detector
+        grouped = df.groupby('customer_id', sort=False)
+
+        ind = pd.DataFrame({
+            'customer_name': grouped['customer_name'].first(),
+            'recent_count': grouped.size(),
+            'total_amount': grouped['amount'].sum(),
+            'first_timestamp': grouped['timestamp'].min(),
+            'last_timestamp': grouped['timestamp'].max(),
+        })
+        ind['historical_count'] = historical.groupby('customer_id', sort=False).size().reindex(
+            ind.index
+        ).fillna(0).astype(int)
+
+        # ==========================================
+        # WEIGHT-INDIKATOREN
+        # ==========================================
+        is_bar = df['payment_method'] == "Bar"
+        is_investment = df['transaction_type'] == "investment"
+        is_withdrawal = df['transaction_type'] == "auszahlung"
+        is_electronic = df['payment_method'].isin(["SEPA", "Kreditkarte"])
+        bar_investment = is_bar & is_investment
+        near_threshold = bar_investment & (df['amount'] >= wd.threshold_avoidance_min) & (
+            df['amount'] < wd.threshold_avoidance_max
+        )
+
+        ind['bar_investment_count'] = self._sum_by_customer(df, bar_investment)
+        ind['threshold_count'] = self._sum_by_customer(df, near_threshold)
+        ind['cumulative_large_amount'] = self._sum_by_customer(df, near_threshold, df['amount'])
+        ind['threshold_avoidance_ratio'] = np.where(
+            ind['bar_investment_count'] > 0,
+            ind['threshold_count'] / ind['bar_investment_count'].clip(lower=1),
+            0.0
+        )
+        ind['cumulative_investments'] = self._sum_by_customer(df, is_investment, df['amount'])
+
+        # Temporale Dichte (wie WeightDetector.calculate_temporal_density_weeks)
+        span_days = (ind['last_timestamp'] - ind['first_timestamp']).dt.days + 1
+        ind['temporal_density_weeks'] = ind['recent_count'] / (span_days.clip(lower=1) / 7.0)
+
+        # ==========================================
+        # ENTROPIE (aktuelles Fenster, exakt)
+        # ==========================================
+        ed = self.entropy_detector
+        amount_bin = np.searchsorted(np.asarray(ed.amount_bins[1:-1]), df['amount'].values, side='right')
+        entropy_amount = self._entropy_by_customer(df['customer_id'], amount_bin)
+        entropy_payment = self._entropy_by_customer(df['customer_id'], df['payment_method'].values)
+        entropy_type = self._entropy_by_customer(df['customer_id'], df['transaction_type'].values)
+        entropy_time = (
+            self._entropy_by_customer(df['customer_id'], df['timestamp'].dt.weekday.values) +
+            self._entropy_by_customer(df['customer_id'], (df['timestamp'].dt.hour // 4).values)
+        ) / 2.0
+
+        ind['entropy_payment_method'] = entropy_payment.reindex(ind.index).fillna(0.0)
+        ind['entropy_aggregate'] = (
+            ed.weights['amount'] * entropy_amount.reindex(ind.index).fillna(0.0) +
+            ed.weights['payment_method'] * ind['entropy_payment_method'] +
+            ed.weights['transaction_type'] * entropy_type.reindex(ind.index).fillna(0.0) +
+            ed.weights['time'] * entropy_time.reindex(ind.index).fillna(0.0)
+        )
+
+        # ==========================================
+        # PREDICTABILITY (untere Schranke)
+        # ==========================================
+        ind['predictability_lower_bound'] = self._predictability_lower_bound(df, historical, ind)
+        ind['historical_max_window_count'] = self._max_window_count(historical, 30).reindex(
+            ind.index
+        ).fillna(0).astype(int)
+
+        # ==========================================
+        # STATISTIK-INDIKATOREN
+        # ==========================================
+        ind['benford_score'] = self._benford_scores(df).reindex(ind.index).fillna(0.0)
+        ind['velocity_upper_bound'] = self._velocity_upper_bound(df, ind)
+        ind['time_anomaly_upper_bound'] = self._time_anomaly_upper_bound(df, ind)
+
+        ind['investment_count'] = self._sum_by_customer(df, is_investment)
+        ind['withdrawal_count'] = self._sum_by_customer(df, is_withdrawal)
+        ind['electronic_withdrawal_count'] = self._sum_by_customer(df, is_withdrawal & is_electronic)
+        ind['bar_investment_volume'] = self._sum_by_customer(df, bar_investment, df['amount'])
+        ind['electronic_withdrawal_volume'] = self._sum_by_customer(
+            df, is_withdrawal & is_electronic, df['amount']
+        )
+        ind['bar_investment_ratio'] = ind['bar_investment_count'] / ind['investment_count'].clip(lower=1)
+        ind['electronic_withdrawal_ratio'] = (
+            ind['electronic_withdrawal_count'] / ind['withdrawal_count'].clip(lower=1)
+        )
+        ind['layering_upper_bound'] = self._layering_upper_bound(ind)
+
+        # ==========================================
+        # SCORE-OBERGRENZE
+        # ==========================================
+        ind['score_upper_bound'] = self._score_upper_bound(ind, customer_info, alpha, beta)
+
+        # ==========================================
+        # RISIKO-PRIOR (Reihenfolge für zeitbegrenzte Analyse)
+        # ==========================================
+        # Bar-Volumen nah unter 10.000€ (in Vielfachen der Grenze) + aktuelle Aktivität
+        days_since_last = (reference_time - ind['last_timestamp']).dt.total_seconds() / 86400.0
+        ind['risk_prior'] = (
+            ind['cumulative_large_amount'] / wd.threshold_avoidance_max +
+            ind['temporal_density_weeks'] +
+            1.0 / (1.0 + days_since_last.clip(lower=0.0))
+        )
+
+        return ind
+
+    def _recent_window(
+        self,
+        transaction_history: Dict[str, List[Transaction]],
+        reference_time: datetime,
+        recent_days: int,
+        historical_days: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Baut DataFrames mit den Transaktionen des aktuellen und des historischen
+        Fensters aller Kunden
+        
+        Returns:
+            Tuple (DataFrame aktuelles Fenster, DataFrame historisches Fenster)
+        """
+        rows = [
+            (
+                t.customer_id, t.customer_name, t.transaction_amount,
+                t.payment_method.value, t.transaction_type.value, t.timestamp
+            )
+            for txns in transaction_history.values()
+            for t in txns
+            if t.timestamp
+        ]
+
+        df = pd.DataFrame(rows, columns=[
+            'customer_id', 'customer_name', 'amount',
+            'payment_method', 'transaction_type', 'timestamp'
+        ])
+
+        if df.empty:
+            return df, df
+
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        recent_cutoff = reference_time - timedelta(days=recent_days)
+        historical_cutoff = reference_time - timedelta(days=historical_days)
+        recent_mask = df['timestamp'] >= recent_cutoff
+
+        if recent_days < historical_days:
+            historical_mask = (df['timestamp'] >= historical_cutoff) & ~recent_mask
+            return df[recent_mask], df[historical_mask]
+
+        # recent_days >= historical_days: zweite Hälfte des historischen Fensters
+        in_history = df[df['timestamp'] >= historical_cutoff]
+        in_history = in_history.sort_values('timestamp', kind='stable')
+        rank = in_history.groupby('customer_id', sort=False).cumcount()
+        size = in_history.groupby('customer_id', sort=False)['timestamp'].transform('size')
+        second_half = in_history[(size > 1) & (rank >= size // 2)]
+        first_half = in_history[(size > 1) & (rank < size // 2)]
+
+        # Kunden mit höchstens einer Transaktion behalten das normale Fenster
+        history_counts = in_history.groupby('customer_id', sort=False).size()
+        split_customers = history_counts[history_counts > 1].index
+        fallback = df[recent_mask & ~df['customer_id'].isin(split_customers)]
+        return pd.concat([second_half, fallback]), first_half
+
+    @staticmethod
+    def _sum_by_customer(
+        df: pd.DataFrame,
+        mask: pd.Series,
+        values: Optional[pd.Series] = None
+    ) -> pd.Series:
+        """Summiert (maskierte) Werte bzw. Anzahlen pro Kunde"""
+        if values is None:
+            values = pd.Series(1, index=df.index)
+        masked = values.where(mask, 0)
+        return masked.groupby(df['customer_id'], sort=False).sum()
+
+    @staticmethod
+    def _entropy_by_customer(customer_ids: pd.Series, keys) -> pd.Series:
+        """Shannon-Entropie (log2) der Kategorie-Verteilung pro Kunde"""
+        counts = pd.DataFrame({'customer_id': customer_ids.values, 'key': keys}).groupby(
+            ['customer_id', 'key'], sort=False
+        ).size()
+        totals = counts.groupby(level=0, sort=False).transform('sum')
+        p = counts / totals
+        return (-(p * np.log2(p))).groupby(level=0, sort=False).sum()
+
+    @staticmethod
+    def _benford_scores(df: pd.DataFrame) -> pd.Series:
+        """Exakter Benford-Score pro Kunde (wie StatisticalAnalyzer.benford_analysis)"""
+        expected = np.array([0.301, 0.176, 0.125, 0.097, 0.079, 0.067, 0.058, 0.051, 0.046])
+
+        counts = df.groupby('customer_id', sort=False).size()
+        candidates = counts[counts >= 20].index
+        if len(candidates) == 0:
+            return pd.Series(dtype=float)
+
+        sub = df[df['customer_id'].isin(candidates)]
+        first = pd.Series(
+            [str(int(a))[0] for a in sub['amount'].values],
+            index=sub.index
+        )
+        valid = first != '0'
+        digits = pd.DataFrame({
+            'customer_id': sub['customer_id'][valid],
+            'digit': first[valid].astype(int)
+        })
+        table = digits.groupby(['customer_id', 'digit']).size().unstack(fill_value=0)
+        table = table.reindex(columns=range(1, 10), fill_value=0)
+        totals = table.sum(axis=1)
+        observed = table.div(totals.clip(lower=1), axis=0)
+        chi_squared = (((observed - expected) ** 2) / expected).sum(axis=1)
+        scores = (chi_squared / 15.5).clip(upper=1.0)
+        return scores.where(totals >= 20, 0.0)
+
+    @staticmethod
+    def _velocity_upper_bound(df: pd.DataFrame, ind: pd.DataFrame) -> pd.Series:
+        """
+        Obere Schranke für StatisticalAnalyzer.velocity_analysis
+
+        Jedes gleitende Fenster der Länge w liegt in zwei benachbarten
+        festen Buckets der Länge w → Maximum über Nachbar-Bucket-Summen.
+        """
+        seconds = df['timestamp'].astype('int64') // 10**9
+        bounds = []
+        for window_hours in [1, 24, 168]:
+            bucket = seconds // (window_hours * 3600)
+            per_bucket = pd.DataFrame({
+                'customer_id': df['customer_id'].values,
+                'bucket': bucket.values,
+                'amount': df['amount'].values
+            }).groupby(['customer_id', 'bucket']).agg(
+                count=('amount', 'size'), amount=('amount', 'sum')
+            ).reset_index()
+
+            # Summe mit dem direkt folgenden Bucket desselben Kunden
+            following = per_bucket.copy()
+            following['bucket'] -= 1
+            pair = per_bucket.merge(
+                following, on=['customer_id', 'bucket'], how='left', suffixes=('', '_next')
+            ).fillna({'count_next': 0, 'amount_next': 0.0})
+            pair['count'] += pair['count_next']
+            pair['amount'] += pair['amount_next']
+            max_pair = pair.groupby('customer_id').agg(count=('count', 'max'), amount=('amount', 'max'))
+
+            count_score = (max_pair['count'] / (window_hours / 2.4)).clip(upper=1.0)
+            amount_score = (max_pair['amount'] / ((window_hours / 24.0) * 50000)).clip(upper=1.0)
+            bounds.append(((count_score + amount_score) / 2.0).reindex(ind.index).fillna(0.0))
+
+        velocity = sum(bounds) / len(bounds)
+        return velocity.where(ind['recent_count'] >= 3, 0.0)
+
+    @staticmethod
+    def _time_anomaly_upper_bound(df: pd.DataFrame, ind: pd.DataFrame) -> pd.Series:
+        """Obere Schranke für time_anomaly_detection (Burst-Anteil als 1 angenommen)"""
+        hour = df['timestamp'].dt.hour
+        off_hours = (hour < 6) | (hour >= 22)
+        weekend = df['timestamp'].dt.weekday >= 5
+        n = ind['recent_count'].clip(lower=1)
+        off_ratio = PreScreener._sum_by_customer(df, off_hours) / n
+        weekend_ratio = PreScreener._sum_by_customer(df, weekend) / n
+        bound = (off_ratio + (weekend_ratio / 0.4).clip(upper=1.0) + 1.0) / 3.0
+        return bound.where(ind['recent_count'] >= 5, 0.0)
+
+    @staticmethod
+    def _max_window_count(historical: pd.DataFrame, window_days: int) -> pd.Series:
+        """
+        Maximale Anzahl Transaktionen in einem Zeitfenster [t, t + window_days)
+        pro Kunde (obere Schranke für die Belegung jedes rollierenden Fensters)
+        """
+        if historical.empty:
+            return pd.Series(dtype=int)
+        ordered = historical.sort_values(['customer_id', 'timestamp'], kind='stable')
+        codes = pd.factorize(ordered['customer_id'])[0].astype(np.int64)
+        seconds = ordered['timestamp'].astype('int64').values // 10**9
+        # Zusammengesetzter Schlüssel (Kunde, Sekunde) → eine Binärsuche für alle Kunden
+        keys = (codes << 32) + (seconds - seconds.min())
+        ends = np.searchsorted(keys, keys + window_days * 86400, side='left')
+        counts = pd.Series(ends - np.arange(len(keys)), index=ordered['customer_id'].values)
+        return counts.groupby(level=0, sort=False).max()
+
+    @staticmethod
+    def _predictability_lower_bound(
+        df: pd.DataFrame,
+        historical: pd.DataFrame,
+        ind: pd.DataFrame
+    ) -> pd.Series:
+        """
+        Untere Schranke für PredictabilityAnalysis.overall_predictability
+
+        Zeitliche Stabilität und Betrags-Konsistenz sind exakt; bei der
+        Kanal-Kontinuität wird der Bonus für die historisch dominante
+        Zahlungsmethode nur angerechnet, wenn er bei jeder gleich häufigen
+        dominanten Methode greift.
+        """
+        ordered = df.sort_values(['customer_id', 'timestamp'], kind='stable')
+        intervals = ordered.groupby('customer_id', sort=False)['timestamp'].diff().dt.total_seconds() / 86400.0
+        interval_stats = intervals.groupby(ordered['customer_id'], sort=False).agg(['mean', 'std', 'count'])
+        interval_std = intervals.groupby(ordered['customer_id'], sort=False).std(ddof=0)
+        mean_interval = interval_stats['mean'].reindex(ind.index)
+        cv = (interval_std.reindex(ind.index) / mean_interval.where(mean_interval > 0)).fillna(1.0)
+        temporal = pd.Series(np.select(
+            [cv < 0.3, cv < 0.6, cv < 1.0],
+            [0.8 + 0.2 * (0.3 - cv) / 0.3, 0.5 + 0.3 * (0.6 - cv) / 0.3, 0.3 + 0.2 * (1.0 - cv) / 0.4],
+            default=np.maximum(0.0, 0.3 - 0.3 * (cv - 1.0) / 2.0)
+        ), index=ind.index)
+        temporal = temporal.where(mean_interval != 0, 0.0)
+        temporal = temporal.where(interval_stats['count'].reindex(ind.index).fillna(0) > 0, 0.5)
+
+        amounts = df.groupby('customer_id', sort=False)['amount']
+        mean_amount = amounts.mean().reindex(ind.index)
+        cv = (amounts.std(ddof=0).reindex(ind.index) / mean_amount.where(mean_amount > 0)).fillna(1.0)
+        amount = pd.Series(np.select(
+            [cv < 0.2, cv < 0.5, cv < 1.0, cv < 2.0],
+            [0.9 + 0.1 * (0.2 - cv) / 0.2, 0.7 + 0.2 * (0.5 - cv) / 0.3,
+             0.5 + 0.2 * (1.0 - cv) / 0.5, 0.3 + 0.2 * (2.0 - cv) / 1.0],
+            default=np.maximum(0.0, 0.3 - 0.3 * (cv - 2.0) / 3.0)
+        ), index=ind.index)
+        amount = amount.where(mean_amount != 0, 0.0)
+        amount = amount.where(ind['recent_count'] >= 2, 0.5)
+
+        has_history = ind['historical_count'] >= 5
+        historical_amounts = historical.groupby('customer_id', sort=False)['amount']
+        historical_mean = historical_amounts.mean().reindex(ind.index)
+        historical_cv = (
+            historical_amounts.std(ddof=0).reindex(ind.index) / historical_mean.where(historical_mean > 0)
+        ).fillna(1.0)
+        amount_reduced = has_history & (ind['recent_count'] >= 2) & (mean_amount != 0) & (
+            cv > historical_cv * 1.5 - _EPS
+        )
+        amount = amount.where(~amount_reduced, amount * 0.7)
+
+        method_counts = df.groupby(['customer_id', 'payment_method'], sort=False).size()
+        dominant = method_counts.groupby(level=0, sort=False).max().reindex(ind.index) / ind['recent_count']
+        n_methods = method_counts.groupby(level=0, sort=False).size().reindex(ind.index)
+        channel = pd.Series(np.select(
+            [dominant >= 0.9, dominant >= 0.7, dominant >= 0.5, n_methods == 1, n_methods == 2],
+            [1.0, 0.8 + 0.2 * (dominant - 0.7) / 0.2, 0.6 + 0.2 * (dominant - 0.5) / 0.2, 0.6, 0.4],
+            default=np.maximum(0.0, 0.4 - 0.1 * (n_methods - 2))
+        ), index=ind.index)
+
+        # Historisch dominante Methode(n) und deren Anteil im aktuellen Fenster
+        historical_methods = historical.groupby(['customer_id', 'payment_method'], sort=False).size()
+        historical_max = historical_methods.groupby(level=0, sort=False).transform('max')
+        historical_dominant = (
+            historical_max.groupby(level=0, sort=False).first().reindex(ind.index) /
+            ind['historical_count'].clip(lower=1)
+        )
+        tied = historical_methods[historical_methods == historical_max].index
+        recent_share = method_counts.reindex(tied, fill_value=0) / ind['recent_count'].reindex(
+            tied.get_level_values(0)
+        ).values
+        bonus = (recent_share >= 0.5).groupby(level=0, sort=False).all().reindex(ind.index, fill_value=False)
+        switched = dominant < historical_dominant * 0.5 + _EPS
+        channel = channel.where(
+            ~has_history,
+            np.where(bonus, np.minimum(1.0, channel + 0.2), np.where(switched, channel * 0.7, channel))
+        )
+
+        return 0.40 * temporal + 0.35 * amount + 0.25 * channel
+
+    @staticmethod
+    def _layering_upper_bound(ind: pd.DataFrame) -> pd.Series:
+        """Obere Schranke für cash_to_bank_layering_detection (Zeitliche Nähe als 1 angenommen)"""
+        has_both = (ind['bar_investment_count'] > 0) & (ind['electronic_withdrawal_count'] > 0)
+
+        volume_ratio = ind['electronic_withdrawal_volume'] / ind['bar_investment_volume'].where(
+            ind['bar_investment_volume'] > 0
+        )
+        volume_match = (1.0 - (1.0 - volume_ratio).abs()).where(
+            has_both & (volume_ratio > 0.5) & (volume_ratio < 1.5), 0.0
+        ).fillna(0.0)
+
+        indicators = (
+            ((ind['bar_investment_count'] >= 3) & (ind['electronic_withdrawal_count'] >= 2)).astype(int) +
+            (ind['bar_investment_ratio'] >= 0.5).astype(int) +
+            (ind['electronic_withdrawal_ratio'] >= 0.4).astype(int) +
+            (has_both & (ind['bar_investment_volume'] >= 5000)).astype(int) +
+            has_both.astype(int)
+        )
+
+        base = (
+            0.35 * ind['bar_investment_ratio'] +
+            0.35 * ind['electronic_withdrawal_ratio'] +
+            0.15 * volume_match +
+            0.15 * has_both.astype(float)
+        )
+        boosted = (base + (0.1 * indicators).clip(upper=0.3)).clip(upper=1.0)
+        bound = boosted.where(indicators >= 2, base * 0.3)
+
+        # Keine Auszahlungen: exakter Wert (Geldhortung)
+        hoarding = (ind['bar_investment_ratio'] * 0.7).clip(upper=0.5).where(
+            ind['bar_investment_count'] >= 5, 0.0
+        )
+        bound = bound.where(ind['withdrawal_count'] > 0, hoarding)
+
+        bound = bound.where(ind['investment_count'] > 0, 0.0)
+        return bound.where(ind['recent_count'] >= 3, 0.0)
+
+    def _score_upper_bound(
+        self,
+        ind: pd.DataFrame,
+        customer_info: Dict[str, CustomerInfo],
+        alpha: float,
+        beta: float
+    ) -> pd.Series:
+        """Obere Schranke des TP/SP-Suspicion-Scores pro Kunde"""
+        wd = self.weight_detector
+
+        # Weight-SP: Dichte exakt, Rest nur wenn is_suspicious möglich ist
+        density = ind['temporal_density_weeks']
+        weight_sp = np.select(
+            [density > 5.0, density > 2.0, density > 1.0, density > 0.5],
+            [400.0, 300.0, 200.0, 100.0],
+            default=0.0
+        )
+        income = pd.Series(
+            {cid: info.monthly_income for cid, info in customer_info.items() if info.monthly_income is not None},
+            dtype=float
+        ).reindex(ind.index)
+        sof = pd.Series(
+            {cid: info.source_of_funds for cid, info in customer_info.items() if info.source_of_funds is not None},
+            dtype=float
+        ).reindex(ind.index)
+        economic_issue = income.notna() & (ind['threshold_count'] >= 3) & (
+            ind['cumulative_large_amount'] > income * 6
+        )
+        sof_exceeded = sof.notna() & (ind['cumulative_investments'] > sof)
+
+        # is_suspicious (wie WeightDetector.analyze): absolute Bedingungen exakt,
+        # Z-Score-Bedingungen möglich, sobald eine Weight-Baseline existiert
+        ratio = ind['threshold_avoidance_ratio']
+        cumulative = ind['cumulative_large_amount']
+        may_be_suspicious = (
+            ((ratio >= 0.3 - _EPS) & (cumulative >= 30000 - _EPS) & (density > wd.normal_saver_density_weeks - _EPS)) |
+            ((ratio >= 0.5 - _EPS) & (density > wd.smurfer_density_weeks - _EPS)) |
+            economic_issue |
+            (sof.isna() & (ind['recent_count'] >= 12) & (ratio >= 0.3 - _EPS) & (cumulative >= 30000 - _EPS)) |
+            (ind['historical_count'] >= 2)
+        )
+        # SoF angegeben und nicht überschritten: Weight-System greift nicht
+        may_be_suspicious = (may_be_suspicious & (sof.isna() | sof_exceeded)) | sof_exceeded
+        weight_sp = weight_sp + np.where(may_be_suspicious, (
+            np.where(ratio >= 0.5 - _EPS, 300.0, 0.0) +
+            np.where(cumulative >= wd.smurfing_cumulative_min - _EPS, 150.0, 0.0) +
+            np.where(economic_issue, 150.0, 0.0) +
+            np.where(sof_exceeded, 200.0, 0.0)
+        ), 0.0)
+
+        # Entropie-SP: exakt
+        agg = ind['entropy_aggregate']
+        entropy_sp = np.where((agg < 0.3 + _EPS) | (agg > 2.0 - _EPS), 150.0, 0.0)
+        entropy_sp = entropy_sp + np.where(ind['entropy_payment_method'] < 0.1 + _EPS, 50.0, 0.0)
+
+        # Predictability: SP über untere Schranke der Predictability, TP als Abzug
+        predictability = ind['predictability_lower_bound']
+        predictability_sp = np.select(
+            [predictability < 0.3 + _EPS, predictability < 0.5 + _EPS],
+            [150.0, 75.0],
+            default=0.0
+        )
+        # Z-Score < -2 nur mit mindestens 10 historischen Transaktionen und
+        # Predictability mehr als 0.3 unter der (höchstens 1.0) historischen
+        predictability_sp = predictability_sp + np.where(
+            (ind['historical_count'] >= 10) & (predictability < 0.7 + _EPS), 50.0, 0.0
+        )
+        predictability_tp = np.select(
+            [predictability >= 0.8 + _EPS, predictability >= 0.6 + _EPS],
+            [150.0, 80.0],
+            default=0.0
+        )
+
+        # Statistik-SP
+        layering = ind['layering_upper_bound']
+        stats_sp = (
+            np.where(ind['benford_score'] > 0.6 - _EPS, 200.0, 0.0) +
+            np.where(ind['velocity_upper_bound'] > 0.7 - _EPS, 150.0, 0.0) +
+            np.where(ind['time_anomaly_upper_bound'] > 0.6 - _EPS, 100.0, 0.0) +
+            np.select(
+                [layering > 0.9 - _EPS, layering > 0.7 - _EPS, layering > 0.5 - _EPS],
+                [500.0, 300.0, 150.0],
+                default=0.0
+            )
+        )
+
+        weighted = (
+            0.40 * 2.0 * weight_sp +
+            0.25 * 1.2 * entropy_sp +
+            0.25 * 1.0 * (predictability_sp - predictability_tp) +
+            0.10 * 1.5 * stats_sp
+        )
+
+        # Verstärkung (monoton in den Modul-SP; nur bei positiver Summe relevant)
+        n_modules = (
+            (weight_sp > 0).astype(int) + (entropy_sp > 0).astype(int) +
+            (predictability_sp > 0).astype(int) + (stats_sp > 0).astype(int)
+        )
+        amplification = np.minimum(1.0 + 0.1 * (n_modules - 1), 1.3)
+        amplification = amplification * np.where((weight_sp > 0) & (stats_sp > 100), 1.2, 1.0)
+        amplification = amplification * np.where((entropy_sp > 0) & (stats_sp > 300), 1.3, 1.0)
+
+        amplification = np.where(weighted > 0, amplification, 1.0)
+
+        # Relative Komponente: Z-Scores auf 5 begrenzt; ohne Historie immer 0
+        # (Weight-Z braucht >= 2 historische Fenster, Entropie-Z Fenster mit > 5 Transaktionen)
+        z_weight = np.where(ind['historical_count'] >= 2, 5.0, 0.0)
+        z_entropy = np.where(ind['historical_max_window_count'] > 5, 5.0, 0.0)
+        relative = (max(alpha, 0.0) * z_weight * 30.0 + max(beta, 0.0) * z_entropy * 30.0) * 0.3
+        total = weighted * amplification * 0.7 + relative
+
+        # Nichtlineare Skalierung (monoton, wie TransactionAnalyzer.apply_nonlinear_scaling)
+        scaled = np.select(
+            [total <= 150, total <= 300, total <= 500],
+            [total, 150 + (total - 150) * 1.2, 150 + 150 * 1.2 + (total - 300) * 1.5],
+            default=150 + 150 * 1.2 + 200 * 1.5 + (total - 500) * 0.8
+        )
+
+        # Suspicion Score ist nach unten auf 0 begrenzt
+        return pd.Series(np.maximum(scaled, 0.0), index=ind.index)
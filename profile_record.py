@@ -0,0 +1,259 @@
+"""
+Kompakter Analyse-Datensatz pro Kunde
+
+Für Massenanalysen werden nicht für jeden Kunden vollständige
+CustomerRiskProfile-Objekte inklusive Flag- und Empfehlungstexten erzeugt.
+Stattdessen hält der Analyzer pro Kunde einen kompakten numerischen
+Datensatz (Score, Risiko-Level, Flag-Bitmaske, Kennzahlen). Vollständige
+Profile und deutsche Texte entstehen erst, wenn ein Kunde tatsächlich
+ausgegeben oder exportiert wird (TransactionAnalyzer.materialize_profile).
+"""
+
+from datetime import datetime
+from enum import IntFlag
+from typing import List, Optional, Tuple
+from models import (
+    RiskLevel, WeightAnalysis, EntropyAnalysis, PredictabilityAnalysis,
+    TrustScoreAnalysis, StatisticalAnalysis
+)
+
+
+class ProfileFlag(IntFlag):
+    """Ein Bit pro Warnmeldung (Reihenfolge wie TransactionAnalyzer.generate_flags)"""
+    SMURFING_THRESHOLD = 1 << 0
+    LARGE_CUMULATIVE_AMOUNT = 1 << 1
+    SMURFING_SMALL = 1 << 2
+    HIGH_ACTIVITY = 1 << 3
+    SMALL_AMOUNT_PATTERN = 1 << 4
+    THRESHOLD_AVOIDANCE = 1 << 5
+    HIGH_TEMPORAL_DENSITY = 1 << 6
+    SOURCE_OF_FUNDS_EXCEEDED = 1 << 7
+    ECONOMIC_PLAUSIBILITY = 1 << 8
+    ENTROPY_CHANNELING = 1 << 9
+    ENTROPY_OBFUSCATION = 1 << 10
+    UNUSUAL_SPREAD = 1 << 11
+    CHANNELING_VS_HISTORY = 1 << 12
+    UNSTABLE_BEHAVIOR = 1 << 13
+    UNPREDICTABLE_BEHAVIOR = 1 << 14
+    PREDICTABILITY_DEVIATION = 1 << 15
+    LOW_TRUST_SCORE = 1 << 16
+    BEHAVIOR_CHANGE = 1 << 17
+    BENFORD_DEVIATION = 1 << 18
+    HIGH_VELOCITY = 1 << 19
+    TIME_ANOMALY = 1 << 20
+    PEER_DEVIATION = 1 << 21
+    MONEY_LAUNDERING = 1 << 22
+    LAYERING_PATTERN = 1 << 23
+
+
+# Texte der Warnmeldungen (Platzhalter werden aus dem Datensatz befüllt)
+FLAG_TEXTS: List[Tuple[ProfileFlag, str]] = [
+    (ProfileFlag.SMURFING_THRESHOLD, "🚨 SMURFING-VERDACHT: Bar-Investments nah unter 10.000€ Grenze"),
+    (ProfileFlag.LARGE_CUMULATIVE_AMOUNT, "💰 GROSSE KUMULATIVE SUMME: {cumulative_large_amount:,.0f}€ nah unter Grenze"),
+    (ProfileFlag.SMURFING_SMALL, "⚠️ SMURFING-VERDACHT: Viele kleine Transaktionen"),
+    (ProfileFlag.HIGH_ACTIVITY, "🔴 HOHE TRANSAKTIONSAKTIVITÄT: Z-Score >= 3"),
+    (ProfileFlag.SMALL_AMOUNT_PATTERN, "💰 KLEINBETRAGS-MUSTER: >80% Transaktionen <2000 EUR"),
+    (ProfileFlag.THRESHOLD_AVOIDANCE, "🎯 THRESHOLD-AVOIDANCE: {threshold_avoidance_percent:.0f}% der Bar-Investments nah unter Grenze"),
+    (ProfileFlag.HIGH_TEMPORAL_DENSITY, "⏱️ HOHE TEMPORALE DICHTE: {temporal_density_weeks:.2f} Transaktionen/Woche"),
+    (ProfileFlag.SOURCE_OF_FUNDS_EXCEEDED, "🚨 SOURCE OF FUNDS ÜBERSCHRITTEN: Kumulative Summe > angegebener SoF"),
+    (ProfileFlag.ECONOMIC_PLAUSIBILITY, "⚠️ ECONOMIC PLAUSIBILITY: Unrealistisch hohe Beträge im Verhältnis zum Einkommen"),
+    (ProfileFlag.ENTROPY_CHANNELING, "📍 ENTROPIE-KANALISATION: Extreme Konzentration auf wenige Muster"),
+    (ProfileFlag.ENTROPY_OBFUSCATION, "🔀 ENTROPIE-VERSCHLEIERUNG: Extreme Streuung (jeder Betrag unterschiedlich)"),
+    (ProfileFlag.UNUSUAL_SPREAD, "🔀 UNGEWÖHNLICHE STREUUNG: Erhöhte Komplexität vs. Historie"),
+    (ProfileFlag.CHANNELING_VS_HISTORY, "📍 KANALISATION: Konzentration auf wenige Muster vs. Historie"),
+    (ProfileFlag.UNSTABLE_BEHAVIOR, "⚠️ INSTABILES VERHALTEN: Sehr niedrige Predictability (< 0.3)"),
+    (ProfileFlag.UNPREDICTABLE_BEHAVIOR, "📊 UNVORHERSAGBARES VERHALTEN: Niedrige Predictability (< 0.5)"),
+    (ProfileFlag.PREDICTABILITY_DEVIATION, "📉 PREDICTABILITY-ABWEICHUNG: Starke negative Abweichung von historischer Baseline"),
+    (ProfileFlag.LOW_TRUST_SCORE, "📉 NIEDRIGER TRUST SCORE: Unvorhersagbares Verhalten"),
+    (ProfileFlag.BEHAVIOR_CHANGE, "⚡ VERHALTENSÄNDERUNG: Starke Abweichung vom eigenen Profil"),
+    (ProfileFlag.BENFORD_DEVIATION, "📊 BENFORD-ABWEICHUNG: Unnatürliche Zahlenverteilung"),
+    (ProfileFlag.HIGH_VELOCITY, "⏱️ HOHE VELOCITY: Ungewöhnliche Transaktionsgeschwindigkeit"),
+    (ProfileFlag.TIME_ANOMALY, "🕐 ZEITANOMALIEN: Ungewöhnliche Uhrzeiten/Tage"),
+    (ProfileFlag.PEER_DEVIATION, "👥 PEER-ABWEICHUNG: Untypisch für Kundengruppe"),
+    (ProfileFlag.MONEY_LAUNDERING, "🚨 GELDWÄSCHE-VERDACHT: Bar-Einzahlung → SEPA-Auszahlung"),
+    (ProfileFlag.LAYERING_PATTERN, "⚠️ LAYERING-MUSTER: Auffällige Bar/SEPA-Kombination"),
+]
+
+
+def compute_flag_mask(
+    weight_analysis: WeightAnalysis,
+    entropy_analysis: EntropyAnalysis,
+    predictability_analysis: PredictabilityAnalysis,
+    trust_analysis: TrustScoreAnalysis,
+    statistical_analysis: StatisticalAnalysis
+) -> int:
+    """
+    Bestimmt die Warnmeldungen eines Kunden als Bitmaske
+
+    Returns:
+        Kombination von ProfileFlag-Bits
+    """
+    mask = 0
+
+    # Weight/Smurfing
+    if weight_analysis.is_suspicious:
+        if weight_analysis.threshold_avoidance_ratio >= 0.5:
+            mask |= ProfileFlag.SMURFING_THRESHOLD
+            if weight_analysis.cumulative_large_amount >= 50000.0:
+                mask |= ProfileFlag.LARGE_CUMULATIVE_AMOUNT
+        else:
+            mask |= ProfileFlag.SMURFING_SMALL
+
+    if weight_analysis.z_score_30d >= 3.0:
+        mask |= ProfileFlag.HIGH_ACTIVITY
+    if weight_analysis.small_transaction_ratio >= 0.8:
+        mask |= ProfileFlag.SMALL_AMOUNT_PATTERN
+    if weight_analysis.threshold_avoidance_ratio >= 0.7:
+        mask |= ProfileFlag.THRESHOLD_AVOIDANCE
+    if weight_analysis.temporal_density_weeks > 0.5:
+        mask |= ProfileFlag.HIGH_TEMPORAL_DENSITY
+    if weight_analysis.source_of_funds_exceeded:
+        mask |= ProfileFlag.SOURCE_OF_FUNDS_EXCEEDED
+    if weight_analysis.economic_plausibility_issue:
+        mask |= ProfileFlag.ECONOMIC_PLAUSIBILITY
+
+    # Entropie (absolute und relative Schwellenwerte)
+    if entropy_analysis.entropy_aggregate < 0.3:
+        mask |= ProfileFlag.ENTROPY_CHANNELING
+    elif entropy_analysis.entropy_aggregate > 2.0:
+        mask |= ProfileFlag.ENTROPY_OBFUSCATION
+
+    if entropy_analysis.is_complex and entropy_analysis.z_score != 0:
+        if entropy_analysis.z_score > 2.0:
+            mask |= ProfileFlag.UNUSUAL_SPREAD
+        elif entropy_analysis.z_score < -2.0:
+            mask |= ProfileFlag.CHANNELING_VS_HISTORY
+
+    # Predictability
+    if not predictability_analysis.is_stable:
+        if predictability_analysis.overall_predictability < 0.3:
+            mask |= ProfileFlag.UNSTABLE_BEHAVIOR
+        elif predictability_analysis.overall_predictability < 0.5:
+            mask |= ProfileFlag.UNPREDICTABLE_BEHAVIOR
+    if predictability_analysis.z_score < -2.0:
+        mask |= ProfileFlag.PREDICTABILITY_DEVIATION
+
+    # Trust Score
+    if trust_analysis.current_score < 0.3:
+        mask |= ProfileFlag.LOW_TRUST_SCORE
+    if trust_analysis.self_deviation > 0.7:
+        mask |= ProfileFlag.BEHAVIOR_CHANGE
+
+    # Statistik
+    if statistical_analysis.benford_score > 0.6:
+        mask |= ProfileFlag.BENFORD_DEVIATION
+    if statistical_analysis.velocity_score > 0.7:
+        mask |= ProfileFlag.HIGH_VELOCITY
+    if statistical_analysis.time_anomaly_score > 0.6:
+        mask |= ProfileFlag.TIME_ANOMALY
+    if statistical_analysis.clustering_score > 0.7:
+        mask |= ProfileFlag.PEER_DEVIATION
+
+    # Geldwäsche-Muster (Layering)
+    if statistical_analysis.layering_score > 0.5:
+        mask |= ProfileFlag.MONEY_LAUNDERING
+    elif statistical_analysis.layering_score > 0.3:
+        mask |= ProfileFlag.LAYERING_PATTERN
+
+    return int(mask)
+
+
+def format_flags(
+    flag_mask: int,
+    cumulative_large_amount: float,
+    threshold_avoidance_ratio: float,
+    temporal_density_weeks: float
+) -> List[str]:
+    """
+    Erzeugt die deutschen Warnmeldungen aus einer Bitmaske
+
+    Returns:
+        Liste von Warnmeldungen (Reihenfolge wie generate_flags)
+    """
+    if not flag_mask:
+        return []
+    return [
+        text.format(
+            cumulative_large_amount=cumulative_large_amount,
+            threshold_avoidance_percent=threshold_avoidance_ratio * 100,
+            temporal_density_weeks=temporal_density_weeks
+        )
+        for flag, text in FLAG_TEXTS
+        if flag_mask & flag
+    ]
+
+
+class CustomerScoreRecord:
+    """
+    Kompakter Analyse-Datensatz eines Kunden
+
+    Die Detektor-Ergebnisse (analyses) werden nur gehalten, wenn ein
+    vollständiges Profil absehbar benötigt wird (auffällige Kunden oder
+    explizit angefordert).
+    """
+
+    __slots__ = (
+        'customer_id', 'customer_name', 'total_transactions', 'total_amount',
+        'suspicion_score', 'risk_level', 'flag_mask',
+        'threshold_avoidance_ratio', 'cumulative_large_amount',
+        'temporal_density_weeks', 'layering_score', 'entropy_complex',
+        'prescreened', 'score_upper_bound', 'approximated', 'analyses', 'analysis_timestamp'
+    )
+
+    def __init__(
+        self,
+        customer_id: str,
+        suspicion_score: Optional[float],
+        risk_level: RiskLevel,
+        customer_name: str = "",
+        total_transactions: int = 0,
+        total_amount: float = 0.0,
+        flag_mask: int = 0,
+        threshold_avoidance_ratio: float = 0.0,
+        cumulative_large_amount: float = 0.0,
+        temporal_density_weeks: float = 0.0,
+        layering_score: float = 0.0,
+        entropy_complex: bool = False,
+        prescreened: bool = False,
+        score_upper_bound: Optional[float] = None,
+        approximated: bool = False,
+        analyses: Optional[Tuple[WeightAnalysis, EntropyAnalysis, TrustScoreAnalysis, StatisticalAnalysis]] = None,
+        analysis_timestamp: Optional[datetime] = None
+    ):
+        self.customer_id = customer_id
+        self.customer_name = customer_name
+        self.total_transactions = total_transactions
+        self.total_amount = total_amount
+        self.suspicion_score = suspicion_score
+        self.risk_level = risk_level
+        self.flag_mask = flag_mask
+        self.threshold_avoidance_ratio = threshold_avoidance_ratio
+        self.cumulative_large_amount = cumulative_large_amount
+        self.temporal_density_weeks = temporal_density_weeks
+        self.layering_score = layering_score
+        self.entropy_complex = entropy_complex
+        self.prescreened = prescreened
+        self.score_upper_bound = score_upper_bound
+        self.approximated = approximated
+        self.analyses = analyses
+        self.analysis_timestamp = analysis_timestamp or datetime.now()
+
+    def flags(self) -> List[str]:
+        """Deutsche Warnmeldungen (erst bei Bedarf erzeugt)"""
+        return format_flags(
+            self.flag_mask,
+            self.cumulative_large_amount,
+            self.threshold_avoidance_ratio,
+            self.temporal_density_weeks
+        )
+
+    def sort_key(self) -> Tuple[bool, float]:
+        """Sortierschlüssel nach Suspicion Score (vorgeprüfte Kunden ohne Score zuletzt)"""
+        return (self.suspicion_score is not None, self.suspicion_score or 0.0)
+
+    def __repr__(self) -> str:
+        score = "-" if self.suspicion_score is None else f"{self.suspicion_score:.1f}"
+        return (
+            f"CustomerScoreRecord({self.customer_id!r}, score={score}, "
+            f"risk_level={self.risk_level.value}, flags=0x{self.flag_mask:x})"
+        )
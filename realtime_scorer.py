@@ -0,0 +1,178 @@
+"""
+Echtzeit-Bewertung einzelner Transaktionen
+
+Eine neue Transaktion ändert nur die Daten ihres Kunden. Die inkrementellen
+Zustände (History-Log und laufende Kennzahlen, Weight-Tagesterme,
+Entropie-Zähler, Velocity-/Layering-Fenster, Zeitrad) werden beim Einfügen in
+TransactionAnalyzer.add_transactions fortgeschrieben; anschließend wird nur
+dieser Kunde aus diesen Zuständen neu bewertet
+(TransactionAnalyzer.analyze_customer_live). Predictability, Benford,
+Zeit-Anomalie, Clustering und Trust Score werden dabei über die
+Fenster-Transaktionen des Kunden berechnet, ohne Zeitleiste und
+Tages-Aggregate neu aufzubauen.
+
+Die Baselines (Z-Scores) stammen aus einer Vollanalyse des Kunden gegen den
+aktuellen Populations-Kontext. Sie wird nur beim ersten Auftreten des Kunden
+und nach jedem neuen Populations-Kontext einmal durchgeführt.
+
+Der Populations-Kontext (Peer-Statistik, Clustering-Fit über alle Kunden)
+wird dabei nicht pro Transaktion neu aufgebaut, sondern zwischengespeichert
+und erst erneuert, wenn er zu alt ist oder sich der Datenbestand seit dem
+Aufbau merklich verändert hat. Eine einzelne Transaktion verschiebt die
+Populations-Statistik praktisch nicht; die periodische Aktualisierung
+(tick) bewertet den Kunden ohnehin mit aktuellem Kontext nach.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from models import Transaction
+from analyzer import TransactionAnalyzer
+from population_context import PopulationContext
+from profile_record import CustomerScoreRecord
+
+
+class RealtimeScorer:
+    """
+    Bewertet den Kunden einer neuen Transaktion gegen einen zwischengespeicherten
+    Populations-Kontext
+    """
+
+    def __init__(
+        self,
+        analyzer: TransactionAnalyzer,
+        population_max_age_seconds: float = 60.0,
+        population_max_growth: float = 0.05,
+        lock: Optional[threading.Lock] = None
+    ):
+        """
+        Args:
+            analyzer: Analyse-Engine (History-Store, Detektoren, Streaming-Zustand)
+            population_max_age_seconds: Höchstalter des Populations-Kontexts
+            population_max_growth: Anteil neuer Transaktionen seit dem Aufbau,
+                                   ab dem der Kontext neu aufgebaut wird
+            lock: Exklusive Sperre des Analyzers für Einfügen und
+                  Neubewertung (der Populations-Kontext wird außerhalb der
+                  Sperre aufgebaut)
+        """
+        self.analyzer = analyzer
+        self.population_max_age_seconds = population_max_age_seconds
+        self.population_max_growth = population_max_growth
+        self._population: Optional[PopulationContext] = None
+        self._population_built_at = 0.0
+        self._population_transactions = 0
+        self._lock = threading.Lock()
+        self.lock = lock
+
+    def _is_stale(self) -> bool:
+        if self._population is None:
+            return True
+        if time.monotonic() - self._population_built_at > self.population_max_age_seconds:
+            return True
+        n_transactions = self.analyzer.transaction_history.n_transactions
+        growth = abs(n_transactions - self._population_transactions)
+        return growth > self.population_max_growth * max(self._population_transactions, 1)
+
+    def refresh_population(self) -> PopulationContext:
+        """
+        Baut den Populations-Kontext für den aktuellen Datenstand neu auf
+        (z.B. aus der periodischen Aktualisierung)
+
+        Returns:
+            PopulationContext
+        """
+        # Datenstand ist eine unveränderliche Snapshot-Version: Peer-Statistik
+        # und KMeans-Fit ohne Sperre des Analyzers
+        population = self.analyzer.get_population_context().prepare()
+        with self._lock:
+            self._population = population
+            self._population_built_at = time.monotonic()
+            self._population_transactions = population.n_transactions
+        return population
+
+    def population(self) -> PopulationContext:
+        """
+        Zwischengespeicherter Populations-Kontext (bei Bedarf erneuert)
+
+        Returns:
+            PopulationContext
+        """
+        if self._is_stale():
+            return self.refresh_population()
+        return self._population
+
+    def score(self, transaction: Transaction) -> CustomerScoreRecord:
+        """
+        Nimmt eine Transaktion auf und bewertet ihren Kunden neu
+
+        Wiederholte Zustellung (gleiche transaction_id) ändert nichts; es wird
+        der laufende Datensatz des Kunden geliefert.
+
+        Args:
+            transaction: Neue Transaktion
+
+        Returns:
+            CustomerScoreRecord des Kunden (mit Detektor-Ergebnissen; Basis-
+            Datensatz, wenn im aktuellen Zeitfenster keine Transaktionen liegen)
+        """
+        return self.score_batch([transaction])[transaction.customer_id]
+
+    def score_batch(self, transactions: List[Transaction]) -> Dict[str, CustomerScoreRecord]:
+        """
+        Nimmt mehrere Transaktionen in einem Schreibvorgang auf und bewertet
+        jeden betroffenen Kunden genau einmal neu
+
+        Args:
+            transactions: Neue Transaktionen (auch mehrere pro Kunde)
+
+        Returns:
+            Dict Kunden-ID → CustomerScoreRecord (siehe score)
+        """
+        added = self._locked(self.analyzer.add_transactions, transactions)
+        changed = {t.customer_id for t in added}
+
+        # Ggf. Neuaufbau (Peer-Statistik, KMeans) ohne Schreibsperre
+        population = self.population()
+        return self._locked(self._score_customers, transactions, changed, population)
+
+    def _locked(self, fn, *args):
+        if self.lock is None:
+            return fn(*args)
+        with self.lock:
+            return fn(*args)
+
+    def _score_customers(
+        self,
+        transactions: List[Transaction],
+        changed: Set[str],
+        population: PopulationContext
+    ) -> Dict[str, CustomerScoreRecord]:
+        analyzer = self.analyzer
+
+        records: Dict[str, CustomerScoreRecord] = {}
+        for customer_id in dict.fromkeys(t.customer_id for t in transactions):
+            if customer_id not in changed:
+                # Nur wiederholte Zustellungen: laufender Datensatz
+                record = analyzer.current_records.get(customer_id)
+                if record is not None and record.analyses is not None:
+                    records[customer_id] = record
+                    continue
+
+            record = analyzer.analyze_customer_live(customer_id, population)
+            if record is None:
+                # Keine Basis für diesen Populations-Kontext: Vollanalyse
+                try:
+                    record = analyzer.analyze_customer_record(
+                        customer_id,
+                        recent_days=analyzer.REFRESH_RECENT_DAYS,
+                        keep_analyses=True,
+                        population=population,
+                        live_base=True
+                    )
+                except ValueError:
+                    # Transaktionen außerhalb des aktuellen Zeitfensters
+                    record = analyzer._default_record(customer_id)
+            analyzer.set_current_record(customer_id, record)
+            records[customer_id] = record
+
+        return records
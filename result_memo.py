@@ -0,0 +1,151 @@
+"""
+Inhaltsadressierter Ergebnis-Cache pro Kunde
+
+Wiederholte Uploads überlappender CSV-Auszüge analysieren viele Kunden mit
+identischen Transaktionen erneut. Die zustandslose Detektor-Stufe der Analyse
+(Weight, Entropie, Predictability, Statistik, Trust-Score-Komponenten ohne
+Peers) hängt nur ab von:
+- Inhalt der Transaktionen im aktuellen und historischen Fenster
+  (ID, Betrag, Timestamp, Zahlungsmethode, Art; in Reihenfolge)
+- Kundeninformationen (Source of Funds, Einkommen)
+- Analysetag (Decay der Weights relativ zu "heute")
+- Konfiguration (Kostenmodell, Cache-Version)
+
+Der Hash dieser Eingaben ist der Schlüssel. Was vom Populations-Modell
+abhängt (Peer-Abweichung aus der Peer-Statistik, Clustering-Score) sowie
+Trust-Score-Glättung, Penalty, Suspicion Score, Risiko-Level und Flags werden
+bei einem Treffer weiterhin berechnet (günstig). Kunden bleiben damit auch
+bei veränderter Population (überlappende Auszüge) Treffer.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, Optional, Tuple
+from models import (
+    Transaction, CustomerInfo, WeightAnalysis, EntropyAnalysis,
+    PredictabilityAnalysis, StatisticalAnalysis
+)
+
+
+class DetectorResults:
+    """
+    Ergebnisse der zustandslosen Detektor-Stufe eines Kunden
+
+    Die Analyse-Objekte werden zwischen Treffern geteilt und dürfen nicht
+    verändert werden. Nicht benötigte Stufen (evaluation_plan) fehlen als
+    None und werden von späteren Läufen mit mehr Ausgaben nachgetragen.
+    """
+
+    __slots__ = (
+        'weight_analysis', 'entropy_analysis', 'predictability_analysis',
+        'statistical_analysis', 'trust_components', 'approximated'
+    )
+
+    def __init__(
+        self,
+        weight_analysis: WeightAnalysis,
+        entropy_analysis: EntropyAnalysis,
+        predictability_analysis: Optional[PredictabilityAnalysis],
+        statistical_analysis: StatisticalAnalysis,
+        trust_components: Optional[Tuple[float, float]],
+        approximated: bool = False
+    ):
+        """
+        Args:
+            weight_analysis: Weight-Analyse
+            entropy_analysis: Entropie-Analyse
+            predictability_analysis: Predictability-Analyse (None, falls im
+                                     berechnenden Lauf nicht benötigt)
+            statistical_analysis: Statistische Analyse (Clustering-Score wird
+                                  pro Lauf ersetzt)
+            trust_components: (Predictability, Selbst-Abweichung) oder None
+                              (wird bei Bedarf nachgetragen)
+            approximated: Entropie-Baseline aus Stichprobe (Kostenmodell)
+        """
+        self.weight_analysis = weight_analysis
+        self.entropy_analysis = entropy_analysis
+        self.predictability_analysis = predictability_analysis
+        self.statistical_analysis = statistical_analysis
+        self.trust_components = trust_components
+        self.approximated = approximated
+
+
+class ResultMemo:
+    """
+    LRU-Cache Inhalts-Hash → DetectorResults (geteilt über Analyzer/Uploads)
+    """
+
+    # Bei Änderungen an Detektoren erhöhen (alte Einträge werden ungültig)
+    VERSION = 1
+
+    def __init__(self, max_entries: int = 200000):
+        """
+        Args:
+            max_entries: Maximale Anzahl Einträge im Arbeitsspeicher (LRU)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, DetectorResults]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Zähler
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def key(
+        cls,
+        recent_transactions: Iterable[Transaction],
+        historical_transactions: Iterable[Transaction],
+        customer_info: Optional[CustomerInfo],
+        config: Tuple
+    ) -> str:
+        """
+        Inhalts-Hash der Eingaben der Detektor-Stufe
+
+        Args:
+            recent_transactions: Transaktionen im aktuellen Fenster
+            historical_transactions: Transaktionen im historischen Fenster
+            customer_info: Kundeninformationen (oder None)
+            config: Weitere Parameter, die die Detektoren beeinflussen
+
+        Returns:
+            Hex-Digest
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((cls.VERSION, date.today().toordinal(), config)).encode())
+        h.update(customer_info.model_dump_json().encode() if customer_info is not None else b'-')
+        for section in (recent_transactions, historical_transactions):
+            h.update(b'|')
+            for t in section:
+                h.update(
+                    f"{t.transaction_id}\x1f{t.transaction_amount!r}\x1f"
+                    f"{t.timestamp.isoformat() if t.timestamp else ''}\x1f"
+                    f"{t.payment_method.value}\x1f{t.transaction_type.value}\x1e".encode()
+                )
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[DetectorResults]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: DetectorResults):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
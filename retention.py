@@ -0,0 +1,179 @@
+"""
+Retention: Speicherbegrenzung der Transaktionshistorie
+
+Die Analyse schaut nie weiter zurück als das längste Zeitfenster
+(historical_days bzw. ein längeres recent_days). Ältere Transaktionen werden
+aus dem Speicher entfernt und - falls ein Spill-Verzeichnis konfiguriert ist -
+als CSV im Upload-Format archiviert (erneut hochladbar).
+
+Zusätzlich kann ein Speicherbudget (maximale Anzahl residenter Transaktionen)
+gesetzt werden. Wird es überschritten, werden die ältesten Transaktionen
+(über alle Kunden) auch innerhalb des Fensters ausgelagert; betroffene Kunden
+werden danach nur auf Basis der residenten Daten bewertet.
+"""
+
+import csv
+import numpy as np
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Union
+from models import Transaction, RetentionMetrics
+from history_store import TransactionStore, HistorySnapshot
+
+
+class RetentionPolicy:
+    """
+    Konfiguration und Durchführung der Retention
+    """
+
+    # Spalten wie beim CSV-Upload
+    CSV_COLUMNS = [
+        'customer_id', 'transaction_id', 'customer_name', 'transaction_amount',
+        'payment_method', 'transaction_type', 'timestamp'
+    ]
+
+    def __init__(
+        self,
+        retention_days: int,
+        max_resident_transactions: Optional[int] = None,
+        spill_dir: Optional[Union[str, Path]] = None
+    ):
+        """
+        Args:
+            retention_days: Ältere Transaktionen (relativ zum Referenzzeitpunkt)
+                            werden entfernt; mindestens das längste Analysefenster
+            max_resident_transactions: Speicherbudget (None = unbegrenzt)
+            spill_dir: Verzeichnis für ausgelagerte Transaktionen (None = verwerfen)
+        """
+        self.retention_days = retention_days
+        self.max_resident_transactions = max_resident_transactions
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        # Laufende Zähler
+        self.evicted_total = 0
+        self.spilled_total = 0
+        self.budget_evictions = 0
+        self.last_cutoff: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+
+    def apply(
+        self,
+        store: TransactionStore,
+        reference_time: datetime,
+        on_evict: Optional[Callable[[List[Transaction], datetime], None]] = None
+    ) -> Set[str]:
+        """
+        Entfernt alte Transaktionen und setzt das Speicherbudget durch
+
+        Args:
+            store: Transaktionsspeicher
+            reference_time: Referenzzeitpunkt der Analyse
+            on_evict: Wird mit (entfernte Transaktionen, Cutoff) aufgerufen
+
+        Returns:
+            Kunden-IDs, deren residente Transaktionen sich geändert haben
+        """
+        affected: Set[str] = set()
+
+        # 1. Alters-Retention
+        cutoff = reference_time - timedelta(days=self.retention_days)
+        affected |= self._evict(store, cutoff, on_evict)
+        self.last_cutoff = cutoff
+
+        # 2. Speicherbudget: älteste Transaktionen über alle Kunden auslagern
+        budget = self.max_resident_transactions
+        if budget is not None and store.current.n_transactions > budget:
+            excess = store.current.n_transactions - budget
+            budget_cutoff = self._budget_cutoff(store.current, excess)
+            if budget_cutoff is not None:
+                before = self.evicted_total
+                affected |= self._evict(store, budget_cutoff, on_evict)
+                self.budget_evictions += self.evicted_total - before
+                self.last_cutoff = max(cutoff, budget_cutoff)
+
+        self.last_run = datetime.now()
+        return affected
+
+    def _evict(
+        self,
+        store: TransactionStore,
+        cutoff: datetime,
+        on_evict: Optional[Callable[[List[Transaction], datetime], None]] = None
+    ) -> Set[str]:
+        """Entfernt Transaktionen vor cutoff und archiviert sie (falls konfiguriert)"""
+        _, removed, _ = store.evict(cutoff)
+        if not removed:
+            return set()
+
+        if on_evict is not None:
+            on_evict(removed, cutoff)
+        self.evicted_total += len(removed)
+        if self.spill_dir is not None:
+            self._spill(removed)
+        return {t.customer_id for t in removed}
+
+    def _budget_cutoff(self, snapshot: HistorySnapshot, excess: int) -> Optional[datetime]:
+        """
+        Zeitpunkt, vor dem mindestens `excess` Transaktionen liegen
+
+        Returns:
+            Cutoff (exklusiv) oder None ohne Timestamps
+        """
+        timestamps = np.array(
+            [t.timestamp for txns in snapshot.values() for t in txns if t.timestamp],
+            dtype='datetime64[us]'
+        )
+        if len(timestamps) == 0:
+            return None
+        k = min(excess, len(timestamps)) - 1
+        kth = np.partition(timestamps, k)[k]
+        # Alle Transaktionen bis einschließlich des k-ten Zeitpunkts entfernen
+        return (kth + np.timedelta64(1, 'us')).astype(datetime)
+
+    def _spill(self, transactions: List[Transaction]):
+        """Schreibt ausgelagerte Transaktionen als CSV (eine Datei pro Tag)"""
+        path = self.spill_dir / f"evicted_{datetime.now().strftime('%Y%m%d')}.csv"
+        write_header = not path.exists()
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(self.CSV_COLUMNS)
+            for t in transactions:
+                writer.writerow([
+                    t.customer_id, t.transaction_id, t.customer_name, t.transaction_amount,
+                    t.payment_method.value, t.transaction_type.value,
+                    t.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f') if t.timestamp else ''
+                ])
+        self.spilled_total += len(transactions)
+
+    def metrics(self, snapshot: HistorySnapshot) -> RetentionMetrics:
+        """
+        Kennzahlen zu residenten Transaktionen
+
+        Args:
+            snapshot: Aktueller Datenstand
+
+        Returns:
+            RetentionMetrics
+        """
+        counts: Dict[str, int] = {cid: len(txns) for cid, txns in snapshot.items()}
+        values = np.array(list(counts.values()), dtype=float)
+        top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:10]
+
+        return RetentionMetrics(
+            resident_transactions=snapshot.n_transactions,
+            resident_customers=len(counts),
+            max_resident_transactions=self.max_resident_transactions,
+            retention_days=self.retention_days,
+            transactions_per_customer_mean=float(values.mean()) if len(values) else 0.0,
+            transactions_per_customer_p95=float(np.percentile(values, 95)) if len(values) else 0.0,
+            transactions_per_customer_max=int(values.max()) if len(values) else 0,
+            top_customers=dict(top),
+            evicted_total=self.evicted_total,
+            spilled_total=self.spilled_total,
+            budget_evictions=self.budget_evictions,
+            last_cutoff=self.last_cutoff,
+            last_run=self.last_run
+        )
@@ -0,0 +1,242 @@
+"""
+Persistenter Score-State-Store für den Trust Score
+
+Speichert pro Kunde den zuletzt geglätteten Trust Score und den Zeitpunkt
+der letzten Aktualisierung, damit die exponentielle Glättung
+T(t) = β × T(t-1) + (1-β) × T_neu über Analyse-Läufe und Prozess-Neustarts
+hinweg erhalten bleibt:
+- SQLite-Datei als lokale Persistenz
+- Gebündelte Lese- (prefetch) und Schreibzugriffe (flush) pro Lauf
+- LRU-Begrenzung des Arbeitsspeichers
+- TTL: veraltete Scores werden nicht mehr zur Glättung verwendet
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+
+class ScoreStateStore:
+    """
+    Kompakter Speicher Kunden-ID → (letzter Score, letzte Aktualisierung)
+
+    Verhält sich für den TrustScoreCalculator wie das bisherige
+    `previous_scores`-Dict (`in`, `[]`, `[]=`, `get`).
+    """
+
+    # SQLite erlaubt max. 999 Parameter pro Statement
+    _BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        max_entries: int = 100000,
+        ttl_days: int = 180,
+        autoflush_threshold: int = 5000
+    ):
+        """
+        Args:
+            db_path: Pfad zur SQLite-Datei (None = nur In-Memory, nicht persistent)
+            max_entries: Maximale Anzahl Scores im Arbeitsspeicher (LRU)
+            ttl_days: Scores älter als N Tage werden ignoriert (keine Glättung)
+            autoflush_threshold: Schreibe automatisch, sobald so viele Änderungen offen sind
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_entries = max_entries
+        self.ttl = timedelta(days=ttl_days)
+        self.autoflush_threshold = autoflush_threshold
+
+        self._cache: "OrderedDict[str, Tuple[float, datetime]]" = OrderedDict()
+        self._dirty: Dict[str, Tuple[float, datetime]] = {}
+        self._absent: set = set()  # IDs, die bekanntermaßen nicht in der DB sind
+        self._lock = threading.RLock()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS trust_scores ("
+                " customer_id TEXT PRIMARY KEY,"
+                " score REAL NOT NULL,"
+                " updated_at TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Dict-Interface (kompatibel zu previous_scores)
+    # ------------------------------------------------------------------
+
+    def __contains__(self, customer_id: str) -> bool:
+        return self.get(customer_id) is not None
+
+    def __getitem__(self, customer_id: str) -> float:
+        score = self.get(customer_id)
+        if score is None:
+            raise KeyError(customer_id)
+        return score
+
+    def __setitem__(self, customer_id: str, score: float):
+        self.set(customer_id, score)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, customer_id: str, default: Optional[float] = None) -> Optional[float]:
+        """
+        Holt den letzten Score eines Kunden (LRU-Cache, sonst SQLite)
+
+        Returns:
+            Score oder default, wenn unbekannt oder älter als TTL
+        """
+        with self._lock:
+            entry = self._cache.get(customer_id) or self._dirty.get(customer_id)
+            if entry is None and customer_id not in self._absent:
+                entry = self._load_one(customer_id)
+            if entry is None:
+                return default
+
+            score, updated_at = entry
+            if datetime.now() - updated_at > self.ttl:
+                # Veraltet: nicht mehr zur Glättung verwenden
+                self._cache.pop(customer_id, None)
+                self._mark_absent((customer_id,))
+                return default
+
+            self._cache[customer_id] = entry
+            self._cache.move_to_end(customer_id)
+            self._evict()
+            return score
+
+    def set(self, customer_id: str, score: float, updated_at: Optional[datetime] = None):
+        """
+        Speichert einen neuen Score (wird beim nächsten flush() geschrieben)
+        """
+        entry = (float(score), updated_at or datetime.now())
+        with self._lock:
+            self._cache[customer_id] = entry
+            self._cache.move_to_end(customer_id)
+            self._absent.discard(customer_id)
+            if self._conn is not None:
+                self._dirty[customer_id] = entry
+            self._evict()
+            if len(self._dirty) >= self.autoflush_threshold:
+                self.flush()
+
+    # ------------------------------------------------------------------
+    # Gebündelte Zugriffe
+    # ------------------------------------------------------------------
+
+    def prefetch(self, customer_ids: Iterable[str]):
+        """
+        Lädt die Scores mehrerer Kunden in einem Durchgang aus der DB
+
+        Args:
+            customer_ids: Kunden-IDs des anstehenden Analyse-Laufs
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            missing = [
+                cid for cid in customer_ids
+                if cid not in self._cache and cid not in self._absent
+            ]
+            # Nicht mehr laden als in den Cache passt
+            missing = missing[:self.max_entries]
+
+            for start in range(0, len(missing), self._BATCH_SIZE):
+                batch = missing[start:start + self._BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT customer_id, score, updated_at FROM trust_scores "
+                    f"WHERE customer_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+
+                found = set()
+                for customer_id, score, updated_at in rows:
+                    self._cache[customer_id] = (score, datetime.fromisoformat(updated_at))
+                    found.add(customer_id)
+                self._mark_absent(cid for cid in batch if cid not in found)
+
+            self._evict()
+
+    def flush(self):
+        """
+        Schreibt alle geänderten Scores gebündelt in die DB
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [
+                (customer_id, score, updated_at.isoformat())
+                for customer_id, (score, updated_at) in self._dirty.items()
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO trust_scores (customer_id, score, updated_at) "
+                "VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._dirty.clear()
+
+    def clear(self):
+        """
+        Löscht alle gespeicherten Scores (Arbeitsspeicher und DB)
+        """
+        with self._lock:
+            self._cache.clear()
+            self._dirty.clear()
+            self._absent.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM trust_scores")
+                self._conn.commit()
+
+    def close(self):
+        """Schreibt offene Änderungen und schließt die DB-Verbindung"""
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Interne Helfer
+    # ------------------------------------------------------------------
+
+    def _load_one(self, customer_id: str) -> Optional[Tuple[float, datetime]]:
+        """Einzelabfrage für Kunden außerhalb eines prefetch()"""
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute(
+            "SELECT score, updated_at FROM trust_scores WHERE customer_id = ?",
+            (customer_id,)
+        ).fetchone()
+
+        if row is None:
+            self._mark_absent((customer_id,))
+            return None
+
+        entry = (row[0], datetime.fromisoformat(row[1]))
+        self._cache[customer_id] = entry
+        self._evict()
+        return entry
+
+    def _mark_absent(self, customer_ids: Iterable[str]):
+        """Vermerkt Kunden ohne (gültigen) Score in der DB (höchstens max_entries)"""
+        self._absent.update(customer_ids)
+        if len(self._absent) > self.max_entries:
+            self._absent.clear()
+
+    def _evict(self):
+        """LRU-Verdrängung; noch nicht geschriebene Scores bleiben in _dirty erhalten"""
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
@@ -0,0 +1,101 @@
+"""
+Single-Flight und Kurzzeit-Cache für teure Lese-Endpunkte
+
+Mehrere Dashboards fragen dieselben Auswertungen (/api/statistics,
+/api/flagged-customers) über denselben Datenstand ab. SingleFlightCache
+führt pro Schlüssel (Endpunkt, Parameter, Datenversion) höchstens eine
+Berechnung gleichzeitig aus:
+- Gleichzeitige Anfragen mit gleichem Schlüssel warten auf dieselbe
+  laufende Berechnung.
+- Das Ergebnis wird für kurze Zeit (ttl_seconds) wiederverwendet; eine neue
+  Datenversion ergibt einen neuen Schlüssel, ältere Einträge verfallen.
+- Fehler werden nicht zwischengespeichert.
+
+Die Zeitbegrenzung deckt ab, dass sich Zeitfenster (Referenz = jetzt) auch
+ohne neue Transaktionen verschieben.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlightCache:
+    """
+    Teilt laufende Berechnungen und hält deren Ergebnisse kurzzeitig vor
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 256):
+        """
+        Args:
+            ttl_seconds: Gültigkeit eines Ergebnisses
+            max_entries: Maximale Anzahl vorgehaltener Ergebnisse
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Schlüssel → (Ablaufzeit, Ergebnis)
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        # Schlüssel → laufende Berechnung
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Erhöht durch clear(): Ergebnisse früher gestarteter Berechnungen verwerfen
+        self._generation = 0
+        # Kennzahlen
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Liefert das Ergebnis für key (vorgehalten, laufend oder neu berechnet)
+
+        Args:
+            key: Schlüssel aus Endpunkt, Parametern und Datenversion
+            compute: Startet die Berechnung (Coroutine-Funktion)
+
+        Returns:
+            Ergebnis der Berechnung
+        """
+        now = time.monotonic()
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > now:
+            self.hits += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._run(key, compute, self._generation))
+            self._inflight[key] = task
+
+        # shield: Abbruch einer wartenden Anfrage bricht die geteilte Berechnung nicht ab
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, compute: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            result = await compute()
+            if generation == self._generation:
+                self._store(key, result)
+            return result
+        finally:
+            if generation == self._generation:
+                self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, result: Any):
+        now = time.monotonic()
+        # Abgelaufene Einträge entfernen, dann ggf. die ältesten
+        for stale in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[stale]
+        while len(self._results) >= self.max_entries:
+            del self._results[next(iter(self._results))]
+        self._results[key] = (now + self.ttl_seconds, result)
+
+    def clear(self):
+        """Verwirft alle vorgehaltenen Ergebnisse (z.B. nach Reset)"""
+        self._generation += 1
+        self._results.clear()
+        self._inflight.clear()
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -12,7 +12,7 @@ Implementiert:
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from collections import Counter
 from models import Transaction, StatisticalAnalysis
 from scipy import stats
@@ -113,33 +113,37 @@ class StatisticalAnalyzer:
         if len(txns) < 3:
             return 0.0
         
-        velocity_scores = []
+        # Sortierte Zeitstempel und Präfixsummen der Beträge: Fenster [t_i, t_i + w)
+        # per Binärsuche statt eines Durchlaufs pro Fensterstart
+        times = np.array([t.timestamp for t in txns], dtype='datetime64[us]')
+        amount_prefix = np.concatenate(([0.0], np.cumsum([t.transaction_amount for t in txns])))
+        window_starts = np.searchsorted(times, times, side='left')
         
+        window_maxima = []
         for window_hours in time_windows:
-            window_td = timedelta(hours=window_hours)
+            window_td = np.timedelta64(window_hours, 'h')
             
             # Finde maximale Transaktionsdichte
-            max_count = 0
-            max_amount = 0.0
-            
-            for i, txn in enumerate(txns):
-                window_start = txn.timestamp
-                window_end = window_start + window_td
-                
-                # Zähle Transaktionen im Fenster
-                count = sum(
-                    1 for t in txns
-                    if window_start <= t.timestamp < window_end
-                )
-                
-                amount = sum(
-                    t.transaction_amount for t in txns
-                    if window_start <= t.timestamp < window_end
-                )
-                
-                max_count = max(max_count, count)
-                max_amount = max(max_amount, amount)
+            window_ends = np.searchsorted(times, times + window_td, side='left')
+            max_count = int(np.max(window_ends - window_starts))
+            max_amount = float(np.max(amount_prefix[window_ends] - amount_prefix[window_starts]))
+            window_maxima.append((window_hours, max_count, max_amount))
+        
+        return self.velocity_score(window_maxima)
+    
+    def velocity_score(self, window_maxima: List[Tuple[int, int, float]]) -> float:
+        """
+        Velocity Score aus den Maxima je Zeitfenster (siehe velocity_analysis)
+        
+        Args:
+            window_maxima: (Fenster in Stunden, max. Anzahl, max. Summe) pro Fenster
             
+        Returns:
+            Velocity Score (0-1)
+        """
+        velocity_scores = []
+        
+        for window_hours, max_count, max_amount in window_maxima:
             # ==========================================
             # ABSOLUTE SCHWELLENWERTE (ohne historische Daten)
             # ==========================================
@@ -333,45 +337,88 @@ class StatisticalAnalyzer:
         # Trenne nach Transaktionstyp
         investments = [t for t in transactions if t.transaction_type.value == "investment"]
         auszahlungen = [t for t in transactions if t.transaction_type.value == "auszahlung"]
+        bar_investments = [
+            t for t in investments 
+            if t.payment_method.value == "Bar"
+        ]
+        electronic_withdrawals = [
+            t for t in auszahlungen
+            if t.payment_method.value in ["SEPA", "Kreditkarte"]
+        ]
+        
+        # Zeitliche Nähe: Werden Auszahlungen kurz nach Einzahlungen gemacht?
+        # (90-Tage-Fenster für allgemeine Berechnung, aber 30-Tage für Schwellenwert)
+        if bar_investments and electronic_withdrawals:
+            time_proximity_score = self._withdrawal_proximity(bar_investments, electronic_withdrawals)
+        else:
+            time_proximity_score = 0.0
+        
+        return self.layering_score(
+            len(transactions),
+            len(investments),
+            len(auszahlungen),
+            len(bar_investments),
+            len(electronic_withdrawals),
+            sum(t.transaction_amount for t in bar_investments),
+            sum(t.transaction_amount for t in electronic_withdrawals),
+            time_proximity_score
+        )
+    
+    def layering_score(
+        self,
+        n_transactions: int,
+        n_investments: int,
+        n_withdrawals: int,
+        n_bar_investments: int,
+        n_electronic_withdrawals: int,
+        bar_in_volume: float,
+        electronic_out_volume: float,
+        time_proximity_score: float
+    ) -> float:
+        """
+        Layering Score aus den Kennzahlen der Transaktionen (siehe
+        cash_to_bank_layering_detection)
+        
+        Args:
+            n_transactions: Anzahl Transaktionen
+            n_investments: Anzahl Investments
+            n_withdrawals: Anzahl Auszahlungen
+            n_bar_investments: Anzahl Bar-Investments
+            n_electronic_withdrawals: Anzahl SEPA-/Kreditkarten-Auszahlungen
+            bar_in_volume: Summe der Bar-Investments
+            electronic_out_volume: Summe der elektronischen Auszahlungen
+            time_proximity_score: Anteil der elektronischen Auszahlungen mit
+                                  Bar-Einzahlung in den 90 Tagen davor
+                                  (0, wenn eine der beiden Gruppen leer ist)
+            
+        Returns:
+            Layering Score (0-1)
+        """
+        if n_transactions < 3:
+            return 0.0
         
-
         # WICHTIG: Auch wenn keine Auszahlungen vorhanden sind, kann es Layering sein
         # (wenn viele Bar-Investments vorhanden sind, aber keine Auszahlungen = verdächtig)
-        if not investments:
+        if not n_investments:
             return 0.0  # Brauchen mindestens Investments
         
         # Wenn keine Auszahlungen, aber viele Bar-Investments, ist es auch verdächtig
-        if not auszahlungen:
+        if not n_withdrawals:
             # Prüfe ob viele Bar-Investments vorhanden sind
-            bar_investments = [
-                t for t in investments 
-                if t.payment_method.value == "Bar"
-            ]
-            if len(bar_investments) >= 5:
+            if n_bar_investments >= 5:
                 # Viele Bar-Investments ohne Auszahlungen = verdächtig (Geld wird "gehortet")
-                bar_investment_ratio = len(bar_investments) / len(investments)
+                bar_investment_ratio = n_bar_investments / n_investments
                 return min(0.5, bar_investment_ratio * 0.7)  # Score 0-0.5 für "Geldhortung"
             return 0.0
         
         # 1. Bar-Ratio bei Investments
-        bar_investments = [
-            t for t in investments 
-            if t.payment_method.value == "Bar"
-        ]
-        bar_investment_ratio = len(bar_investments) / len(investments)
+        bar_investment_ratio = n_bar_investments / n_investments
         
         # 2. SEPA/Kreditkarte-Ratio bei Auszahlungen
-        electronic_withdrawals = [
-            t for t in auszahlungen
-            if t.payment_method.value in ["SEPA", "Kreditkarte"]
-        ]
-        electronic_withdrawal_ratio = len(electronic_withdrawals) / len(auszahlungen)
+        electronic_withdrawal_ratio = n_electronic_withdrawals / n_withdrawals
         
         # 3. Volumen-Analyse: Sind die Beträge ähnlich?
-        if bar_investments and electronic_withdrawals:
-            bar_in_volume = sum(t.transaction_amount for t in bar_investments)
-            electronic_out_volume = sum(t.transaction_amount for t in electronic_withdrawals)
-            
+        if n_bar_investments and n_electronic_withdrawals:
             # Verhältnis sollte ähnlich sein (0.7 - 1.3)
             if bar_in_volume > 0:
                 volume_ratio = electronic_out_volume / bar_in_volume
@@ -382,27 +429,6 @@ class StatisticalAnalyzer:
         else:
             volume_match_score = 0.0
         
-        # 4. Zeitliche Nähe: Werden Auszahlungen kurz nach Einzahlungen gemacht?
-        # Verwende 90-Tage-Fenster für allgemeine Berechnung, aber 30-Tage für Schwellenwert
-        if bar_investments and electronic_withdrawals:
-            time_proximity_score = 0.0
-            for withdrawal in electronic_withdrawals:
-                if withdrawal.timestamp:
-                    # Finde Bar-Einzahlungen in den letzten 90 Tagen vor dieser Auszahlung
-                    recent_bar_investments = [
-                        t for t in bar_investments
-                        if t.timestamp and 
-                        (withdrawal.timestamp - t.timestamp).days <= 90 and
-                        (withdrawal.timestamp - t.timestamp).days >= 0
-                    ]
-                    if recent_bar_investments:
-                        time_proximity_score += 1.0
-            
-            if len(electronic_withdrawals) > 0:
-                time_proximity_score /= len(electronic_withdrawals)
-        else:
-            time_proximity_score = 0.0
-        
         # ==========================================
         # ABSOLUTE SCHWELLENWERTE (Primär-Erkennung)
         # ==========================================
@@ -412,7 +438,7 @@ class StatisticalAnalyzer:
         absolute_layering_indicators = 0
         
         # 1. Mindestens 3 Bar-Investments UND 2 SEPA-Auszahlungen (GELOCKERT: 5/3 -> 3/2)
-        if len(bar_investments) >= 3 and len(electronic_withdrawals) >= 2:
+        if n_bar_investments >= 3 and n_electronic_withdrawals >= 2:
             absolute_layering_indicators += 1
         
         # 2. Bar-Investment Ratio >= 50% (GELOCKERT: 70% -> 50%)
@@ -424,29 +450,15 @@ class StatisticalAnalyzer:
             absolute_layering_indicators += 1
         
         # 4. Mindestvolumen >= 5.000€ (GELOCKERT: 10.000€ -> 5.000€)
-        if bar_investments and electronic_withdrawals:
-            bar_in_volume = sum(t.transaction_amount for t in bar_investments)
+        if n_bar_investments and n_electronic_withdrawals:
             if bar_in_volume >= 5000:
                 absolute_layering_indicators += 1
         
         # 5. Zeitliche Nähe: Mindestens 30% der Auszahlungen haben Bar-Investments in den letzten 90 Tagen (GELOCKERT: 50% -> 30%, 30 Tage -> 90 Tage)
         # Für historische Daten: längeres Zeitfenster
-        if bar_investments and electronic_withdrawals:
-            rapid_time_proximity = 0.0
-            for withdrawal in electronic_withdrawals:
-                if withdrawal.timestamp:
-                    # Prüfe 90-Tage-Fenster (für historische Daten)
-                    recent_bar_investments = [
-                        t for t in bar_investments
-                        if t.timestamp and 
-                        (withdrawal.timestamp - t.timestamp).days <= 90 and
-                        (withdrawal.timestamp - t.timestamp).days >= 0
-                    ]
-                    if recent_bar_investments:
-                        rapid_time_proximity += 1.0
-            
-            if len(electronic_withdrawals) > 0:
-                rapid_time_proximity /= len(electronic_withdrawals)
+        if n_bar_investments and n_electronic_withdrawals:
+            # Prüfe 90-Tage-Fenster (für historische Daten) - identisch zu Punkt 4
+            rapid_time_proximity = time_proximity_score
             
             if rapid_time_proximity >= 0.3:  # GELOCKERT: 0.5 -> 0.3
                 absolute_layering_indicators += 1
@@ -478,6 +490,37 @@ class StatisticalAnalyzer:
         
         return min(layering_score, 1.0)
     
+    def _withdrawal_proximity(
+        self,
+        bar_investments: List[Transaction],
+        electronic_withdrawals: List[Transaction]
+    ) -> float:
+        """
+        Anteil der elektronischen Auszahlungen mit mindestens einer Bar-Einzahlung
+        in den 90 Tagen davor (0 <= (Auszahlung - Einzahlung).days <= 90)
+        
+        Binärsuche über die sortierten Einzahlungszeitpunkte statt eines
+        Vergleichs jeder Auszahlung mit jeder Einzahlung.
+        
+        Returns:
+            Anteil (0-1)
+        """
+        investment_times = np.sort(np.array(
+            [t.timestamp for t in bar_investments if t.timestamp], dtype='datetime64[us]'
+        ))
+        withdrawal_times = np.array(
+            [t.timestamp for t in electronic_withdrawals if t.timestamp], dtype='datetime64[us]'
+        )
+        if len(investment_times) == 0 or len(withdrawal_times) == 0:
+            return 0.0
+        
+        # .days <= 90 bedeutet Abstand < 91 Tage; .days >= 0 bedeutet Einzahlung <= Auszahlung
+        upper = np.searchsorted(investment_times, withdrawal_times, side='right')
+        lower = np.searchsorted(investment_times, withdrawal_times - np.timedelta64(91, 'D'), side='right')
+        matched = int(np.count_nonzero(upper > lower))
+        
+        return matched / len(electronic_withdrawals)
+    
     def _extract_features(self, transactions: List[Transaction]) -> List[float]:
         """
         Extrahiert Feature-Vektor aus Transaktionen
@@ -518,7 +561,8 @@ class StatisticalAnalyzer:
     def analyze(
         self,
         customer_transactions: List[Transaction],
-        all_transactions: List[Transaction] = None
+        all_transactions: List[Transaction] = None,
+        clustering_score: Optional[float] = None
     ) -> StatisticalAnalysis:
         """
         Vollständige statistische Analyse
@@ -526,6 +570,8 @@ class StatisticalAnalyzer:
         Args:
             customer_transactions: Transaktionen des Kunden
             all_transactions: Alle Transaktionen (für Vergleiche)
+            clustering_score: Vorberechneter Clustering-Score (z.B. aus
+                              PopulationContext); ersetzt clustering_analysis
             
         Returns:
             StatisticalAnalysis Objekt
@@ -535,13 +581,14 @@ class StatisticalAnalyzer:
         time_anomaly_score = self.time_anomaly_detection(customer_transactions)
         layering_score = self.cash_to_bank_layering_detection(customer_transactions)
         
-        if all_transactions:
-            clustering_score = self.clustering_analysis(
-                customer_transactions,
-                all_transactions
-            )
-        else:
-            clustering_score = 0.0
+        if clustering_score is None:
+            if all_transactions:
+                clustering_score = self.clustering_analysis(
+                    customer_transactions,
+                    all_transactions
+                )
+            else:
+                clustering_score = 0.0
         
         return StatisticalAnalysis(
             benford_score=benford_score,
@@ -0,0 +1,418 @@
+"""
+Laufende Aktivitäts-Kennzahlen pro Kunde (aktuelles Fenster)
+
+Neben Weight (streaming_weight) und Entropie-Häufigkeiten (streaming_entropy)
+braucht die Echtzeit-Bewertung weitere Kennzahlen des aktuellen Fensters.
+StreamingActivityTracker hält pro Kunde die Transaktionen des Fensters
+[Referenz - window_days, ∞) nach Timestamp sortiert und führt beim Einfügen
+bzw. beim Herausfallen aus dem Fenster mit:
+- Weight-Indikatoren: Anzahl, Kleinbeträge, Bar-Investments (gesamt und nah
+  unter der Grenze, Anzahl/Summe), Investments (Summe)
+- Entropie: Anzahl verschiedener Beträge
+- Velocity: maximale Anzahl und Summe je Zeitfenster (1h, 24h, 168h). Eine
+  Transaktion am Ende des Fensters kann nur die Fenster verlängern, die sie
+  enthalten; deren größtes beginnt beim ersten Timestamp > t - Fenster
+  (Binärsuche). Neu berechnet wird nur, wenn der Fensterstart eines Maximums
+  herausfällt oder eine Transaktion verspätet (vor dem letzten Timestamp)
+  eintrifft.
+- Layering: Investments/Auszahlungen, Bar-Investments und elektronische
+  Auszahlungen (Anzahl, Volumen) und Anzahl der Auszahlungen mit Bar-
+  Einzahlung in den 91 Tagen davor (beim Anhängen fortgeschrieben, sonst
+  über die sortierten Zeitpunkte beider Arten neu gezählt)
+
+Zeitpunkte werden als ganzzahlige Mikrosekunden geführt (Binärsuche und
+Neuberechnung ohne Umwandlung der datetime-Objekte).
+
+Die Kennzahlen entsprechen WeightDetector.analyze, EntropyDetector.analyze,
+StatisticalAnalyzer.velocity_analysis und cash_to_bank_layering_detection
+über die aktuellen Transaktionen der Vollanalyse (Summen bis auf Rundung).
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from models import Transaction
+from statistical_methods import StatisticalAnalyzer
+from weight_detector import WeightDetector
+
+
+# Zeitfenster der Velocity in Stunden (wie StatisticalAnalyzer.velocity_analysis)
+VELOCITY_WINDOWS = (1, 24, 168)
+
+# Abstand Auszahlung → vorherige Bar-Einzahlung (wie _withdrawal_proximity)
+PROXIMITY_WINDOW = timedelta(days=91)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_HOUR_TICKS = 3_600_000_000
+_PROXIMITY_TICKS = PROXIMITY_WINDOW // _MICROSECOND
+
+
+def _ticks(timestamp: datetime) -> int:
+    """Zeitpunkt in Mikrosekunden seit 1970"""
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+class ActivitySummary:
+    """
+    Kennzahlen eines Kunden im aktuellen Fenster (Momentaufnahme)
+    """
+
+    __slots__ = (
+        'customer_name', 'count', 'amount_sum', 'small_count',
+        'bar_investment_count', 'near_count', 'near_sum', 'investment_sum',
+        'first_timestamp', 'last_timestamp', 'unique_amounts',
+        'velocity_score', 'layering_score'
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+
+class ActivityState:
+    """
+    Aktivitäts-Zustand eines Kunden: Transaktionen im Fenster und Zähler
+    """
+
+    __slots__ = (
+        'times', 'entries', 'cumulative', 'cutoff', 'sequence',
+        'count', 'amount_sum', 'small_count', 'investment_count', 'investment_sum',
+        'withdrawal_count', 'bar_investment_count', 'bar_investment_sum',
+        'near_count', 'near_sum', 'electronic_count', 'electronic_sum',
+        'amounts', 'bar_times', 'electronic_times', 'velocity', 'matched'
+    )
+
+    def __init__(self):
+        # Nach Timestamp sortiert (bei gleichem Timestamp in Einfügereihenfolge)
+        self.times: List[int] = []
+        self.entries: List[Tuple[int, Transaction]] = []
+        # Laufende Summe der Beträge bis einschließlich Eintrag i
+        self.cumulative: List[float] = []
+        # Fensteranfang; ältere Transaktionen sind entfernt
+        self.cutoff: Optional[int] = None
+        self.sequence = 0
+
+        self.count = 0
+        self.amount_sum = 0.0
+        self.small_count = 0
+        self.investment_count = 0
+        self.investment_sum = 0.0
+        self.withdrawal_count = 0
+        self.bar_investment_count = 0
+        self.bar_investment_sum = 0.0
+        self.near_count = 0
+        self.near_sum = 0.0
+        self.electronic_count = 0
+        self.electronic_sum = 0.0
+        # Betrag → Anzahl
+        self.amounts: Dict[float, int] = {}
+        # Sortierte Zeitpunkte der Bar-Investments bzw. elektronischen Auszahlungen
+        self.bar_times: List[int] = []
+        self.electronic_times: List[int] = []
+        # Fenster (Stunden) → [max. Anzahl, deren Start, max. Summe, deren Start];
+        # None = neu berechnen
+        self.velocity: Optional[Dict[int, list]] = self.empty_velocity()
+        # Elektronische Auszahlungen mit vorheriger Bar-Einzahlung; None = neu zählen
+        self.matched: Optional[int] = 0
+
+    @staticmethod
+    def empty_velocity() -> Dict[int, list]:
+        return {window_hours: [0, None, 0.0, None] for window_hours in VELOCITY_WINDOWS}
+
+
+class StreamingActivityTracker:
+    """
+    Aktivitäts-Kennzahlen aller Kunden für ein festes Fenster (z.B. 30 Tage)
+    """
+
+    def __init__(
+        self,
+        weight_detector: WeightDetector,
+        statistical_analyzer: StatisticalAnalyzer,
+        window_days: int = 30
+    ):
+        """
+        Args:
+            weight_detector: Weight-Detektor (Schwellenwerte)
+            statistical_analyzer: Liefert Velocity- und Layering-Score
+            window_days: Fensterlänge in Tagen (aktuelles Fenster)
+        """
+        self.weight_detector = weight_detector
+        self.statistical_analyzer = statistical_analyzer
+        self.window_days = window_days
+        self._states: Dict[str, ActivityState] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, state: ActivityState, t: Transaction, delta: int):
+        """Zählt eine Transaktion hinzu (delta=1) bzw. heraus (delta=-1)"""
+        detector = self.weight_detector
+        amount = t.transaction_amount
+        method = t.payment_method.value
+        state.count += delta
+        state.amount_sum += delta * amount
+        if amount < detector.small_transaction_threshold:
+            state.small_count += delta
+        value = state.amounts.get(amount, 0) + delta
+        if value:
+            state.amounts[amount] = value
+        else:
+            del state.amounts[amount]
+
+        if t.transaction_type.value == "investment":
+            state.investment_count += delta
+            state.investment_sum += delta * amount
+            if method == "Bar":
+                state.bar_investment_count += delta
+                state.bar_investment_sum += delta * amount
+                if detector.threshold_avoidance_min <= amount < detector.threshold_avoidance_max:
+                    state.near_count += delta
+                    state.near_sum += delta * amount
+        elif t.transaction_type.value == "auszahlung":
+            state.withdrawal_count += delta
+            if method in ("SEPA", "Kreditkarte"):
+                state.electronic_count += delta
+                state.electronic_sum += delta * amount
+
+    @staticmethod
+    def _is_bar_investment(t: Transaction) -> bool:
+        return t.transaction_type.value == "investment" and t.payment_method.value == "Bar"
+
+    @staticmethod
+    def _is_electronic_withdrawal(t: Transaction) -> bool:
+        return t.transaction_type.value == "auszahlung" and t.payment_method.value in ("SEPA", "Kreditkarte")
+
+    def _append(self, state: ActivityState, t: Transaction, time: int, sequence: int):
+        """Fügt eine Transaktion am Ende des Fensters an (time >= letzter Zeitpunkt)"""
+        state.times.append(time)
+        state.entries.append((sequence, t))
+        previous = state.cumulative[-1] if state.cumulative else 0.0
+        state.cumulative.append(previous + t.transaction_amount)
+
+        # Velocity: größtes Fenster, das die neue Transaktion enthält
+        if state.velocity is not None:
+            n = len(state.times)
+            for window_hours, maxima in state.velocity.items():
+                first = bisect_right(state.times, time - window_hours * _HOUR_TICKS)
+                count = n - first
+                before = state.cumulative[first - 1] if first else self._prefix_before(state)
+                amount = state.cumulative[-1] - before
+                if count >= maxima[0]:
+                    maxima[0], maxima[1] = count, state.times[first]
+                if amount >= maxima[2]:
+                    maxima[2], maxima[3] = amount, state.times[first]
+
+        # Layering: Nähe der Auszahlung zur letzten Bar-Einzahlung
+        if self._is_bar_investment(t):
+            if state.electronic_times and state.electronic_times[-1] >= time:
+                state.matched = None  # Auszahlung mit gleichem Timestamp
+            state.bar_times.append(time)
+        elif self._is_electronic_withdrawal(t):
+            if state.matched is not None and state.bar_times and state.bar_times[-1] > time - _PROXIMITY_TICKS:
+                state.matched += 1
+            state.electronic_times.append(time)
+
+    @staticmethod
+    def _prefix_before(state: ActivityState) -> float:
+        """Laufende Summe vor dem ersten Eintrag des Fensters"""
+        return state.cumulative[0] - state.entries[0][1].transaction_amount
+
+    def _insert(self, state: ActivityState, t: Transaction, time: int, sequence: int):
+        """Fügt eine verspätete Transaktion ein (Velocity neu berechnen)"""
+        position = bisect_right(state.times, time)
+        # (nur bei nicht leerem Fenster aufgerufen)
+        total = state.cumulative[position - 1] if position else self._prefix_before(state)
+        state.times.insert(position, time)
+        state.entries.insert(position, (sequence, t))
+        del state.cumulative[position:]
+        for _, entry in state.entries[position:]:
+            total += entry.transaction_amount
+            state.cumulative.append(total)
+        state.velocity = None
+
+        if self._is_bar_investment(t):
+            # Kann weitere Auszahlungen zuordnen: neu zählen
+            insort(state.bar_times, time)
+            state.matched = None
+        elif self._is_electronic_withdrawal(t):
+            if state.matched is not None and self._has_bar_investment_before(state, time):
+                state.matched += 1
+            insort(state.electronic_times, time)
+
+    @staticmethod
+    def _has_bar_investment_before(state: ActivityState, time: int) -> bool:
+        """Bar-Einzahlung in den 91 Tagen bis einschließlich time?"""
+        return bisect_right(state.bar_times, time) > bisect_right(state.bar_times, time - _PROXIMITY_TICKS)
+
+    def _evict(self, state: ActivityState, cutoff: int):
+        """Entfernt Transaktionen vor cutoff"""
+        if state.cutoff is not None and cutoff <= state.cutoff:
+            return
+        state.cutoff = cutoff
+        end = bisect_left(state.times, cutoff)
+        if not end:
+            return
+
+        for _, t in state.entries[:end]:
+            self._count(state, t, -1)
+        last_evicted = state.times[end - 1]
+        base = state.cumulative[end - 1]
+        del state.times[:end]
+        del state.entries[:end]
+        state.cumulative = [value - base for value in state.cumulative[end:]]
+
+        if state.velocity is not None:
+            # Fenster, die bei entfernten Transaktionen beginnen, entfallen
+            for maxima in state.velocity.values():
+                if any(start is not None and start <= last_evicted for start in (maxima[1], maxima[3])):
+                    state.velocity = None
+                    break
+        bar_end = bisect_left(state.bar_times, cutoff)
+        electronic_end = bisect_left(state.electronic_times, cutoff)
+        if bar_end or electronic_end:
+            del state.bar_times[:bar_end]
+            del state.electronic_times[:electronic_end]
+            state.matched = None
+        if not state.entries:
+            state.amount_sum = state.investment_sum = state.bar_investment_sum = 0.0
+            state.near_sum = state.electronic_sum = 0.0  # Keine Rundungsreste
+            state.velocity = ActivityState.empty_velocity()
+            state.matched = 0
+
+    def _velocity_maxima(self, state: ActivityState) -> Dict[int, list]:
+        """Maxima je Velocity-Fenster über alle Fensterstarts (wie velocity_analysis)"""
+        times = np.array(state.times, dtype=np.int64)
+        prefix = np.array([self._prefix_before(state)] + state.cumulative)
+        starts = np.searchsorted(times, times, side='left')
+        maxima = {}
+        for window_hours in VELOCITY_WINDOWS:
+            ends = np.searchsorted(times, times + window_hours * _HOUR_TICKS, side='left')
+            counts = ends - starts
+            amounts = prefix[ends] - prefix[starts]
+            # Letzter Start mit Maximum (früher beginnende fallen zuerst heraus)
+            i_count = len(counts) - 1 - int(np.argmax(counts[::-1]))
+            i_amount = len(amounts) - 1 - int(np.argmax(amounts[::-1]))
+            maxima[window_hours] = [
+                int(counts[i_count]), state.times[starts[i_count]],
+                float(amounts[i_amount]), state.times[starts[i_amount]]
+            ]
+        return maxima
+
+    def _matched(self, state: ActivityState) -> int:
+        """Elektronische Auszahlungen mit Bar-Einzahlung in den 91 Tagen davor"""
+        return sum(self._has_bar_investment_before(state, time) for time in state.electronic_times)
+
+    def add(self, transactions: Iterable[Transaction], reference_time: Optional[datetime] = None):
+        """
+        Schreibt die Kennzahlen der betroffenen Kunden fort
+
+        Args:
+            transactions: Neu aufgenommene Transaktionen (ohne Duplikate)
+            reference_time: Referenzzeitpunkt; Transaktionen vor dem
+                            Fensteranfang werden entfernt bzw. ignoriert
+        """
+        cutoff = _ticks(reference_time - timedelta(days=self.window_days)) if reference_time is not None else None
+
+        by_customer: Dict[str, List[Transaction]] = defaultdict(list)
+        for t in transactions:
+            if t.timestamp:
+                by_customer[t.customer_id].append(t)
+
+        with self._lock:
+            for customer_id, txns in by_customer.items():
+                state = self._states.get(customer_id)
+                if state is None:
+                    state = ActivityState()
+                    self._states[customer_id] = state
+                if cutoff is not None:
+                    self._evict(state, cutoff)
+                # Nach Timestamp anhängen (z.B. ganze Historie nach Retention);
+                # die Einfügereihenfolge bleibt in der laufenden Nummer erhalten
+                first = state.sequence
+                state.sequence += len(txns)
+                for offset, t in sorted(enumerate(txns), key=lambda item: item[1].timestamp):
+                    time = _ticks(t.timestamp)
+                    if state.cutoff is not None and time < state.cutoff:
+                        continue  # Außerhalb des Fensters
+                    self._count(state, t, 1)
+                    if not state.times or time >= state.times[-1]:
+                        self._append(state, t, time, first + offset)
+                    else:
+                        self._insert(state, t, time, first + offset)
+
+    def summary(self, customer_id: str, reference_time: datetime) -> Optional[ActivitySummary]:
+        """
+        Kennzahlen des Kunden im Fenster [reference_time - window_days, ∞)
+
+        Args:
+            customer_id: Kunden-ID
+            reference_time: Referenzzeitpunkt (wie get_reference_time)
+
+        Returns:
+            ActivitySummary oder None, wenn der Kunde unbekannt ist oder das
+            Fenster vor bereits entfernten Transaktionen beginnt
+        """
+        cutoff = _ticks(reference_time - timedelta(days=self.window_days))
+        with self._lock:
+            state = self._states.get(customer_id)
+            if state is None or (state.cutoff is not None and cutoff < state.cutoff):
+                return None
+            self._evict(state, cutoff)
+
+            analyzer = self.statistical_analyzer
+            velocity_score = 0.0
+            if state.count >= 3:
+                if state.velocity is None:
+                    state.velocity = self._velocity_maxima(state)
+                velocity_score = analyzer.velocity_score([
+                    (window_hours, state.velocity[window_hours][0], state.velocity[window_hours][2])
+                    for window_hours in VELOCITY_WINDOWS
+                ])
+
+            if state.matched is None:
+                state.matched = self._matched(state)
+            time_proximity_score = 0.0
+            if state.bar_investment_count and state.electronic_count:
+                time_proximity_score = state.matched / state.electronic_count
+            layering_score = analyzer.layering_score(
+                state.count,
+                state.investment_count,
+                state.withdrawal_count,
+                state.bar_investment_count,
+                state.electronic_count,
+                state.bar_investment_sum,
+                state.electronic_sum,
+                time_proximity_score
+            )
+
+            return ActivitySummary(
+                # Name der zuerst eingefügten Transaktion im Fenster (wie recent_txns[0])
+                customer_name=min(state.entries)[1].customer_name if state.entries else "",
+                count=state.count,
+                amount_sum=state.amount_sum,
+                small_count=state.small_count,
+                bar_investment_count=state.bar_investment_count,
+                near_count=state.near_count,
+                near_sum=state.near_sum,
+                investment_sum=state.investment_sum,
+                first_timestamp=state.entries[0][1].timestamp if state.entries else None,
+                last_timestamp=state.entries[-1][1].timestamp if state.entries else None,
+                unique_amounts=len(state.amounts),
+                velocity_score=velocity_score,
+                layering_score=layering_score
+            )
+
+    def discard(self, customer_id: str):
+        """Entfernt den Zustand eines Kunden (z.B. nach Retention)"""
+        with self._lock:
+            self._states.pop(customer_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
@@ -0,0 +1,223 @@
+"""
+Laufend aktualisierte Entropie pro Kunde (aktuelles Fenster)
+
+Die Entropien von EntropyDetector hängen nur von Häufigkeiten ab:
+- Betrags-Bins (amount_bins)
+- Zahlungsmethode
+- Transaktionsart
+- Wochentag und Tageszeit-Block (4 Stunden)
+
+EntropyCounts hält diese Zähler und unterstützt Hinzufügen und Entfernen
+einzelner Transaktionen in O(1); die Entropien ergeben sich in O(Anzahl Bins).
+StreamingEntropyTracker führt die Zähler pro Kunde für das Fenster
+[Referenz - window_days, ∞) und entfernt aus dem Fenster fallende
+Transaktionen (Min-Heap nach Timestamp). Ergebnis entspricht den Entropien
+der Vollanalyse (bis auf Rundung).
+
+Verwendet von der Echtzeit-Bewertung einzelner Transaktionen
+(TransactionAnalyzer.analyze_customer_live) und GET /api/customer/{id}/entropy.
+"""
+
+import heapq
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Transaction
+from entropy_detector import EntropyDetector
+
+
+class EntropyCounts:
+    """
+    Häufigkeiten der Entropie-Dimensionen einer Transaktionsmenge
+    """
+
+    __slots__ = ('amount_bins', 'methods', 'types', 'weekdays', 'hour_blocks', 'count', 'timed_count')
+
+    def __init__(self):
+        self.amount_bins: Dict[int, int] = {}
+        self.methods: Dict[str, int] = {}
+        self.types: Dict[str, int] = {}
+        self.weekdays: Dict[int, int] = {}
+        self.hour_blocks: Dict[int, int] = {}
+        self.count = 0
+        self.timed_count = 0
+
+    @staticmethod
+    def _change(counts: Dict, key, delta: int):
+        value = counts.get(key, 0) + delta
+        if value:
+            counts[key] = value
+        else:
+            del counts[key]
+
+    def update(self, transaction: Transaction, amount_bin: Optional[int], delta: int = 1):
+        """
+        Zählt eine Transaktion hinzu (delta=1) bzw. heraus (delta=-1)
+
+        Args:
+            transaction: Transaktion
+            amount_bin: Betrags-Bin (None = außerhalb aller Bins, wie np.histogram)
+            delta: +1 oder -1
+        """
+        self.count += delta
+        if amount_bin is not None:
+            self._change(self.amount_bins, amount_bin, delta)
+        self._change(self.methods, transaction.payment_method.value, delta)
+        self._change(self.types, transaction.transaction_type.value, delta)
+        if transaction.timestamp:
+            self.timed_count += delta
+            self._change(self.weekdays, transaction.timestamp.weekday(), delta)
+            self._change(self.hour_blocks, transaction.timestamp.hour // 4, delta)
+
+    def entropies(self, detector: EntropyDetector) -> Dict[str, float]:
+        """
+        Entropien wie EntropyDetector.analyze (ohne Z-Score)
+
+        Returns:
+            Dict mit entropy_amount, entropy_payment_method,
+            entropy_transaction_type, entropy_time, entropy_aggregate
+        """
+        shannon = detector.calculate_shannon_entropy
+
+        def distribution(counts: Dict, total: int) -> float:
+            if total <= 0:
+                return 0.0
+            return float(shannon([c / total for c in counts.values()]))
+
+        entropy_amount = distribution(self.amount_bins, sum(self.amount_bins.values()))
+        entropy_payment = distribution(self.methods, self.count)
+        entropy_type = distribution(self.types, self.count)
+        entropy_time = 0.0
+        if self.timed_count > 0:
+            entropy_time = (
+                distribution(self.weekdays, self.timed_count) +
+                distribution(self.hour_blocks, self.timed_count)
+            ) / 2.0
+
+        return {
+            'entropy_amount': entropy_amount,
+            'entropy_payment_method': entropy_payment,
+            'entropy_transaction_type': entropy_type,
+            'entropy_time': entropy_time,
+            'entropy_aggregate': detector.calculate_aggregate_entropy(
+                entropy_amount, entropy_payment, entropy_type, entropy_time
+            )
+        }
+
+
+class StreamingEntropyState:
+    """
+    Entropie-Zustand eines Kunden: Zähler und Transaktionen im Fenster
+    """
+
+    __slots__ = ('counts', 'heap', 'cutoff', 'sequence')
+
+    def __init__(self):
+        self.counts = EntropyCounts()
+        # (Timestamp, Einfügenummer, Transaktion, Betrags-Bin) - ältester zuerst
+        self.heap: List[Tuple[datetime, int, Transaction, Optional[int]]] = []
+        # Fensteranfang; ältere Transaktionen sind entfernt
+        self.cutoff: Optional[datetime] = None
+        self.sequence = 0
+
+
+class StreamingEntropyTracker:
+    """
+    Streaming-Entropie aller Kunden für ein festes Fenster (z.B. 30 Tage)
+    """
+
+    def __init__(self, detector: EntropyDetector, window_days: int = 30):
+        """
+        Args:
+            detector: Entropie-Detektor (Bins, Gewichte)
+            window_days: Fensterlänge in Tagen (aktuelles Fenster)
+        """
+        self.detector = detector
+        self.window_days = window_days
+        self._states: Dict[str, StreamingEntropyState] = {}
+        self._lock = threading.Lock()
+
+    def amount_bin(self, amount: float) -> Optional[int]:
+        """Bin-Index wie np.histogram (letzter Bin rechts geschlossen)"""
+        edges = self.detector.amount_bins
+        if amount < edges[0] or amount > edges[-1]:
+            return None
+        return min(bisect_right(edges, amount) - 1, len(edges) - 2)
+
+    def _evict(self, state: StreamingEntropyState, cutoff: datetime):
+        """Entfernt Transaktionen vor cutoff aus den Zählern"""
+        if state.cutoff is not None and cutoff <= state.cutoff:
+            return
+        state.cutoff = cutoff
+        heap = state.heap
+        while heap and heap[0][0] < cutoff:
+            _, _, transaction, amount_bin = heapq.heappop(heap)
+            state.counts.update(transaction, amount_bin, -1)
+
+    def add(self, transactions: Iterable[Transaction], reference_time: Optional[datetime] = None):
+        """
+        Zählt neu aufgenommene Transaktionen in die Fenster der Kunden
+
+        Args:
+            transactions: Neu aufgenommene Transaktionen (ohne Duplikate)
+            reference_time: Referenzzeitpunkt; Transaktionen vor dem
+                            Fensteranfang werden entfernt bzw. ignoriert
+        """
+        cutoff = reference_time - timedelta(days=self.window_days) if reference_time is not None else None
+
+        by_customer: Dict[str, List[Transaction]] = defaultdict(list)
+        for t in transactions:
+            if t.timestamp:
+                by_customer[t.customer_id].append(t)
+
+        with self._lock:
+            for customer_id, txns in by_customer.items():
+                state = self._states.get(customer_id)
+                if state is None:
+                    state = StreamingEntropyState()
+                    self._states[customer_id] = state
+                if cutoff is not None:
+                    self._evict(state, cutoff)
+                for t in txns:
+                    if state.cutoff is not None and t.timestamp < state.cutoff:
+                        continue  # Außerhalb des Fensters
+                    amount_bin = self.amount_bin(t.transaction_amount)
+                    state.counts.update(t, amount_bin, 1)
+                    heapq.heappush(state.heap, (t.timestamp, state.sequence, t, amount_bin))
+                    state.sequence += 1
+
+    def entropies(self, customer_id: str, reference_time: datetime) -> Optional[Dict[str, float]]:
+        """
+        Entropien des Kunden im Fenster [reference_time - window_days, ∞)
+
+        Args:
+            customer_id: Kunden-ID
+            reference_time: Referenzzeitpunkt (wie get_reference_time)
+
+        Returns:
+            Entropien (siehe EntropyCounts.entropies) oder None, wenn das
+            Fenster vor bereits entfernten Transaktionen beginnt
+        """
+        cutoff = reference_time - timedelta(days=self.window_days)
+        with self._lock:
+            state = self._states.get(customer_id)
+            if state is None:
+                return EntropyCounts().entropies(self.detector)
+            if state.cutoff is not None and cutoff < state.cutoff:
+                return None
+            self._evict(state, cutoff)
+            return state.counts.entropies(self.detector)
+
+    def discard(self, customer_id: str):
+        """Entfernt den Zustand eines Kunden (z.B. nach Retention)"""
+        with self._lock:
+            self._states.pop(customer_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
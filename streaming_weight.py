@@ -0,0 +1,203 @@
+"""
+Laufend aktualisiertes Weight pro Kunde (Echtzeit-Smurfing-Monitor)
+
+Das Weight (WeightDetector.calculate_weight) ist eine Summe von Tagestermen
+mit exponentiellem Decay:
+
+    Weight = Σ_tag term_tag × exp(-λ × (heute - tag))
+    term_tag = log(1 + Summe_tag) × log(1 + Anzahl_tag) × Threshold-Faktor_tag
+
+Damit lässt es sich rekursiv fortschreiben: die Summe wird auf einen
+Ankertag bezogen gehalten und beim Weiterrücken des Ankers mit
+exp(-λ × Δtage) skaliert. Eine neue Transaktion ändert nur den Term ihres
+Tages; die Summe wird um (neuer Term - alter Term) korrigiert. Fällt ein Tag
+(bzw. der Anfang des Randtags) aus dem Fenster, wird sein Beitrag abgezogen.
+
+Gehalten werden nur die Transaktionen im Fenster (Betrag, Zeitpunkt, Bar-/
+Schwellen-Kennzeichen) - die Transaktionshistorie wird für das Weight nicht
+gelesen. Ergebnis entspricht weight_30d der Vollanalyse (bis auf Rundung).
+"""
+
+import math
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Transaction
+from weight_detector import WeightDetector
+
+
+class StreamingWeightState:
+    """
+    Weight-Zustand eines Kunden: Tages-Aggregate im Fenster und decayte Summe
+    """
+
+    __slots__ = ('anchor', 'total', 'days', 'terms', 'cutoff')
+
+    def __init__(self, anchor: int):
+        """
+        Args:
+            anchor: Ankertag (Ordinal), auf den total bezogen ist
+        """
+        self.anchor = anchor
+        self.total = 0.0
+        # Tag (Ordinal) → [(Zeitpunkt, Betrag, Bar-Investment, nah unter Grenze)]
+        self.days: Dict[int, List[Tuple[datetime, float, bool, bool]]] = {}
+        # Tag (Ordinal) → Tagesterm ohne Decay
+        self.terms: Dict[int, float] = {}
+        # Fensteranfang; ältere Transaktionen sind entfernt
+        self.cutoff: Optional[datetime] = None
+
+
+class StreamingWeightTracker:
+    """
+    Streaming-Weight aller Kunden für ein festes Fenster (z.B. 30 Tage)
+    """
+
+    def __init__(self, detector: WeightDetector, window_days: int = 30):
+        """
+        Args:
+            detector: Weight-Detektor (Decay, Schwellenwerte)
+            window_days: Fensterlänge in Tagen (aktuelles Fenster)
+        """
+        self.detector = detector
+        self.window_days = window_days
+        self._states: Dict[str, StreamingWeightState] = {}
+        self._lock = threading.Lock()
+
+    def _day_term(self, entries: List[Tuple[datetime, float, bool, bool]]) -> float:
+        """Tagesterm ohne Decay (wie DailyWeightIndex._term)"""
+        if not entries:
+            return 0.0
+        amount_sum = sum(e[1] for e in entries)
+        bar_count = sum(1 for e in entries if e[2])
+        near_count = sum(1 for e in entries if e[3])
+        factor = 1.0
+        if bar_count > 0 and near_count > 0:
+            factor = 1.0 + (near_count / bar_count) * 1.5
+        return math.log1p(amount_sum) * math.log1p(len(entries)) * factor
+
+    def _set_day(self, state: StreamingWeightState, day: int):
+        """Korrigiert die Summe nach Änderung der Transaktionen eines Tages"""
+        entries = state.days.get(day)
+        new_term = self._day_term(entries) if entries else 0.0
+        old_term = state.terms.get(day, 0.0)
+        state.total += (new_term - old_term) * math.exp(-self.detector.lambda_decay * (state.anchor - day))
+        if entries:
+            state.terms[day] = new_term
+        else:
+            state.days.pop(day, None)
+            state.terms.pop(day, None)
+            if not state.days:
+                state.total = 0.0  # Keine Rundungsreste ohne Transaktionen
+
+    def _rescale(self, state: StreamingWeightState, today: int):
+        """Bezieht die Summe auf einen neuen Ankertag"""
+        if today != state.anchor:
+            state.total *= math.exp(-self.detector.lambda_decay * (today - state.anchor))
+            state.anchor = today
+
+    def _evict(self, state: StreamingWeightState, cutoff: datetime):
+        """Entfernt Transaktionen vor cutoff (ganze Tage bzw. Anfang des Randtags)"""
+        if state.cutoff is not None and cutoff <= state.cutoff:
+            return
+        state.cutoff = cutoff
+        cutoff_day = cutoff.date().toordinal()
+        for day in [d for d in state.days if d <= cutoff_day]:
+            if day < cutoff_day:
+                state.days[day] = []
+            else:
+                state.days[day] = [e for e in state.days[day] if e[0] >= cutoff]
+            self._set_day(state, day)
+
+    def add(
+        self,
+        transactions: Iterable[Transaction],
+        reference_time: Optional[datetime] = None,
+        today: Optional[date] = None
+    ):
+        """
+        Schreibt das Weight der betroffenen Kunden fort
+
+        Args:
+            transactions: Neu aufgenommene Transaktionen (ohne Duplikate)
+            reference_time: Referenzzeitpunkt; Transaktionen vor dem
+                            Fensteranfang werden entfernt bzw. ignoriert
+            today: Bezugstag des Decays (Standard: heute)
+        """
+        today_ordinal = (today or datetime.now().date()).toordinal()
+        cutoff = reference_time - timedelta(days=self.window_days) if reference_time is not None else None
+        detector = self.detector
+
+        by_customer: Dict[str, List[Transaction]] = defaultdict(list)
+        for t in transactions:
+            if t.timestamp:
+                by_customer[t.customer_id].append(t)
+
+        with self._lock:
+            for customer_id, txns in by_customer.items():
+                state = self._states.get(customer_id)
+                if state is None:
+                    state = StreamingWeightState(today_ordinal)
+                    self._states[customer_id] = state
+                self._rescale(state, today_ordinal)
+                if cutoff is not None:
+                    self._evict(state, cutoff)
+
+                changed = set()
+                for t in txns:
+                    if state.cutoff is not None and t.timestamp < state.cutoff:
+                        continue  # Außerhalb des Fensters
+                    is_bar = t.payment_method == "Bar" and t.transaction_type == "investment"
+                    is_near = is_bar and (
+                        detector.threshold_avoidance_min <= t.transaction_amount < detector.threshold_avoidance_max
+                    )
+                    day = t.timestamp.date().toordinal()
+                    state.days.setdefault(day, []).append(
+                        (t.timestamp, t.transaction_amount, is_bar, is_near)
+                    )
+                    changed.add(day)
+                for day in changed:
+                    self._set_day(state, day)
+
+    def weight(
+        self,
+        customer_id: str,
+        reference_time: datetime,
+        today: Optional[date] = None
+    ) -> Optional[float]:
+        """
+        Weight des Kunden im Fenster [reference_time - window_days, ∞)
+
+        Args:
+            customer_id: Kunden-ID
+            reference_time: Referenzzeitpunkt (wie get_reference_time)
+            today: Bezugstag des Decays (Standard: heute)
+
+        Returns:
+            Weight (0.0 für unbekannte Kunden) oder None, wenn das Fenster vor
+            bereits entfernten Transaktionen beginnt (Vollanalyse nötig)
+        """
+        today_ordinal = (today or datetime.now().date()).toordinal()
+        cutoff = reference_time - timedelta(days=self.window_days)
+        with self._lock:
+            state = self._states.get(customer_id)
+            if state is None:
+                return 0.0
+            if state.cutoff is not None and cutoff < state.cutoff:
+                return None
+            self._rescale(state, today_ordinal)
+            self._evict(state, cutoff)
+            return max(0.0, state.total)
+
+    def discard(self, customer_id: str):
+        """Entfernt den Zustand eines Kunden (z.B. nach Retention)"""
+        with self._lock:
+            self._states.pop(customer_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
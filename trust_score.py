@@ -9,10 +9,11 @@ Misst die Vorhersagbarkeit und Vertrauenswürdigkeit des Kundenverhaltens:
 """
 
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+from collections import Counter
 from models import Transaction, TrustScoreAnalysis
+from score_store import ScoreStateStore
 from scipy import stats
 
 
@@ -21,13 +22,16 @@ class TrustScoreCalculator:
     Berechnet dynamischen Trust Score basierend auf Verhaltensstabilität
     """
     
-    def __init__(self, beta: float = 0.7):
+    def __init__(self, beta: float = 0.7, score_store: Optional[ScoreStateStore] = None):
         """
         Args:
             beta: Glättungsfaktor für Score-Updates (höher = träger)
+            score_store: Optionaler persistenter Store für vorherige Scores
+                         (None = prozesslokales Dict wie bisher)
         """
         self.beta = beta  # Glättungsfaktor
-        self.previous_scores: Dict[str, float] = {}  # Cache für vorherige Scores
+        # Cache für vorherige Scores (Dict oder persistenter ScoreStateStore)
+        self.previous_scores = score_store if score_store is not None else {}
     
     def calculate_predictability(
         self,
@@ -57,44 +61,31 @@ class TrustScoreCalculator:
         if not txns:
             return 0.5
         
-        # Nach Datum sortieren
-        txns = sorted(txns, key=lambda t: t.timestamp)
+        # Tägliche Aggregate (Tage aufsteigend)
+        days = np.array([t.timestamp for t in txns], dtype='datetime64[us]').astype('datetime64[D]').astype(np.int64)
+        amounts = np.array([t.transaction_amount for t in txns], dtype=float)
+        unique_days, day_index = np.unique(days, return_inverse=True)
+        daily_amounts = np.bincount(day_index, weights=amounts)
         
-        # Tägliche Aggregate
-        df = pd.DataFrame([
-            {
-                'date': t.timestamp.date(),
-                'amount': t.transaction_amount
-            }
-            for t in txns
-        ])
-        
-        daily = df.groupby('date').agg({
-            'amount': ['sum', 'count']
-        }).reset_index()
-        
-        daily.columns = ['date', 'amount_sum', 'count']
-        
-        if len(daily) < 3:
+        if len(unique_days) < 3:
             return 0.5
         
         # 1. Variationskoeffizient der Beträge (niedriger = stabiler)
-        cv_amount = daily['amount_sum'].std() / (daily['amount_sum'].mean() + 1e-6)
+        cv_amount = np.std(daily_amounts, ddof=1) / (np.mean(daily_amounts) + 1e-6)
         cv_score = 1.0 / (1.0 + cv_amount)  # Normalisiert zu 0-1
         
         # 2. Regelmäßigkeit der Intervalle
-        daily['date'] = pd.to_datetime(daily['date'])
-        intervals = daily['date'].diff().dt.days.dropna()
+        intervals = np.diff(unique_days).astype(float)
         
         if len(intervals) > 1:
-            cv_intervals = intervals.std() / (intervals.mean() + 1e-6)
+            cv_intervals = np.std(intervals, ddof=1) / (np.mean(intervals) + 1e-6)
             interval_score = 1.0 / (1.0 + cv_intervals)
         else:
             interval_score = 0.5
         
         # 3. Trend-Stabilität (niedrige Autokorrelation = stabil)
-        if len(daily) > 10:
-            amounts = daily['amount_sum'].values
+        if len(daily_amounts) > 10:
+            amounts = daily_amounts
             # Detrend
             z = np.polyfit(range(len(amounts)), amounts, 1)
             p = np.poly1d(z)
@@ -141,15 +132,13 @@ class TrustScoreCalculator:
         hist_mean = np.mean(hist_amounts)
         hist_std = np.std(hist_amounts)
         
-        hist_payment_methods = [t.payment_method.value for t in historical_transactions]
-        hist_method_dist = pd.Series(hist_payment_methods).value_counts(normalize=True)
+        hist_method_dist = self._method_distribution(historical_transactions)
         
         # Aktuelle Statistiken
         recent_amounts = [t.transaction_amount for t in recent_transactions]
         recent_mean = np.mean(recent_amounts)
         
-        recent_payment_methods = [t.payment_method.value for t in recent_transactions]
-        recent_method_dist = pd.Series(recent_payment_methods).value_counts(normalize=True)
+        recent_method_dist = self._method_distribution(recent_transactions)
         
         # 1. Abweichung der durchschnittlichen Beträge (Z-Score)
         # ANPASSUNG: Stärkere Bestrafung von Abweichungen
@@ -163,7 +152,7 @@ class TrustScoreCalculator:
         
         # 2. Abweichung der Zahlungsmethoden-Verteilung (KL-Divergenz)
         # Stelle sicher, dass beide Verteilungen die gleichen Kategorien haben
-        all_methods = set(hist_method_dist.index) | set(recent_method_dist.index)
+        all_methods = set(hist_method_dist) | set(recent_method_dist)
         
         hist_probs = [hist_method_dist.get(m, 0.01) for m in all_methods]
         recent_probs = [recent_method_dist.get(m, 0.01) for m in all_methods]
@@ -182,10 +171,17 @@ class TrustScoreCalculator:
         
         return max(0.0, min(1.0, deviation))
     
+    def _method_distribution(self, transactions: List[Transaction]) -> Dict[str, float]:
+        """Anteile der Zahlungsmethoden (wie value_counts(normalize=True))"""
+        counts = Counter(t.payment_method.value for t in transactions)
+        total = len(transactions)
+        return {method: count / total for method, count in counts.items()}
+    
     def calculate_peer_deviation(
         self,
         customer_transactions: List[Transaction],
-        peer_transactions: List[Transaction]
+        peer_transactions: List[Transaction] = None,
+        peer_stats: Optional[Tuple[float, float]] = None
     ) -> float:
         """
         Misst Abweichung von der Peer-Gruppe
@@ -195,17 +191,21 @@ class TrustScoreCalculator:
         Args:
             customer_transactions: Transaktionen des Kunden
             peer_transactions: Transaktionen der Peer-Gruppe
+            peer_stats: Alternativ vorberechnete (Mittelwert, Std) der Peer-Beträge
             
         Returns:
             Peer Deviation Score (0-1, höher = stärkere Abweichung)
         """
-        if not peer_transactions or not customer_transactions:
+        if (not peer_transactions and peer_stats is None) or not customer_transactions:
             return 0.0
         
         # Peer-Statistiken
-        peer_amounts = [t.transaction_amount for t in peer_transactions]
-        peer_mean = np.mean(peer_amounts)
-        peer_std = np.std(peer_amounts)
+        if peer_stats is not None:
+            peer_mean, peer_std = peer_stats
+        else:
+            peer_amounts = [t.transaction_amount for t in peer_transactions]
+            peer_mean = np.mean(peer_amounts)
+            peer_std = np.std(peer_amounts)
         
         # Kunden-Statistiken
         customer_amounts = [t.transaction_amount for t in customer_transactions]
@@ -318,7 +318,8 @@ class TrustScoreCalculator:
         customer_id: str,
         recent_transactions: List[Transaction],
         historical_transactions: List[Transaction],
-        peer_transactions: List[Transaction] = None
+        peer_transactions: List[Transaction] = None,
+        peer_stats: Optional[Tuple[float, float]] = None
     ) -> TrustScoreAnalysis:
         """
         Vollständige Trust Score Analyse
@@ -328,11 +329,35 @@ class TrustScoreCalculator:
             recent_transactions: Aktuelle Transaktionen
             historical_transactions: Historische Transaktionen
             peer_transactions: Peer-Transaktionen (optional)
+            peer_stats: Vorberechnete (Mittelwert, Std) der Peer-Beträge (optional,
+                        statt peer_transactions)
             
         Returns:
             TrustScoreAnalysis Objekt
         """
         # Berechne Komponenten
+        predictability, self_deviation, peer_deviation = self.calculate_components(
+            recent_transactions,
+            historical_transactions,
+            peer_transactions=peer_transactions,
+            peer_stats=peer_stats
+        )
+        
+        return self.analyze_components(customer_id, predictability, self_deviation, peer_deviation)
+    
+    def calculate_components(
+        self,
+        recent_transactions: List[Transaction],
+        historical_transactions: List[Transaction],
+        peer_transactions: List[Transaction] = None,
+        peer_stats: Optional[Tuple[float, float]] = None
+    ) -> Tuple[float, float, float]:
+        """
+        Berechnet die Komponenten des Trust Scores (ohne Glättung, zustandslos)
+        
+        Returns:
+            Tuple (Predictability, Selbst-Abweichung, Peer-Abweichung)
+        """
         predictability = self.calculate_predictability(
             historical_transactions + recent_transactions
         )
@@ -342,14 +367,37 @@ class TrustScoreCalculator:
             historical_transactions
         )
         
-        if peer_transactions:
+        if peer_transactions or peer_stats is not None:
             peer_deviation = self.calculate_peer_deviation(
                 recent_transactions,
-                peer_transactions
+                peer_transactions,
+                peer_stats=peer_stats
             )
         else:
             peer_deviation = 0.0
         
+        return predictability, self_deviation, peer_deviation
+    
+    def analyze_components(
+        self,
+        customer_id: str,
+        predictability: float,
+        self_deviation: float,
+        peer_deviation: float
+    ) -> TrustScoreAnalysis:
+        """
+        Trust Score Analyse aus vorberechneten Komponenten (mit Glättung
+        gegen den vorherigen Score des Kunden)
+        
+        Args:
+            customer_id: Kunden-ID
+            predictability: Vorhersagbarkeits-Score (0-1)
+            self_deviation: Selbst-Abweichung (0-1)
+            peer_deviation: Peer-Abweichung (0-1)
+            
+        Returns:
+            TrustScoreAnalysis Objekt
+        """
         # Finaler Score
         current_score = self.calculate_trust_score(
             predictability,
@@ -77,32 +77,30 @@ class WeightDetector:
         
         # Erkenne Transaktionen nah unter der Bar-Grenze und gewichte sie stärker
         # Für jeden Tag: prüfe ob Transaktionen nah unter 10.000€ liegen
-        daily['threshold_avoidance_factor'] = 1.0  # Standard-Faktor
+        # (Standard-Faktor 1.0)
+        # Gruppiere Bar-Investments einmal nach Tag für detaillierte Analyse
+        # (Tag → [Anzahl Bar-Investments, davon nah unter der Grenze])
+        bar_by_day: Dict = {}
+        for t in transactions:
+            if t.timestamp and t.payment_method == "Bar" and t.transaction_type == "investment":
+                counts = bar_by_day.setdefault(t.timestamp.date(), [0, 0])
+                counts[0] += 1
+                if self.threshold_avoidance_min <= t.transaction_amount < self.threshold_avoidance_max:
+                    counts[1] += 1
         
-        # Gruppiere Transaktionen nach Tag für detaillierte Analyse
+        factors = []
         for date in daily['date']:
-            day_txns = [
-                t for t in transactions
-                if t.timestamp and t.timestamp.date() == date
-            ]
-            
             # Prüfe ob Bar-Investments nah unter der Grenze liegen
-            bar_investments = [
-                t for t in day_txns
-                if t.payment_method == "Bar" and t.transaction_type == "investment"
-            ]
+            bar_count, threshold_avoidance_count = bar_by_day.get(date, (0, 0))
             
-            if bar_investments:
-                threshold_avoidance_count = sum(
-                    1 for t in bar_investments
-                    if self.threshold_avoidance_min <= t.transaction_amount < self.threshold_avoidance_max
-                )
-                
-                # Wenn viele Transaktionen nah unter der Grenze: stärker gewichten
-                if threshold_avoidance_count > 0:
-                    ratio = threshold_avoidance_count / len(bar_investments)
-                    # Faktor: 1.0 (normal) bis 2.5 (alle nah unter Grenze)
-                    daily.loc[daily['date'] == date, 'threshold_avoidance_factor'] = 1.0 + (ratio * 1.5)
+            # Wenn viele Transaktionen nah unter der Grenze: stärker gewichten
+            if threshold_avoidance_count > 0:
+                ratio = threshold_avoidance_count / bar_count
+                # Faktor: 1.0 (normal) bis 2.5 (alle nah unter Grenze)
+                factors.append(1.0 + (ratio * 1.5))
+            else:
+                factors.append(1.0)
+        daily['threshold_avoidance_factor'] = factors
         
         # Weight pro Tag mit Threshold-Avoidance-Faktor
         daily['weight'] = daily['A_tilde'] * daily['F_tilde'] * daily['threshold_avoidance_factor']
@@ -172,16 +170,26 @@ class WeightDetector:
                     historical_weights.append(weight)
         else:
             # Viele Transaktionen: Rollierende Fenster
+            # (Fenstergrenzen per Binärsuche über die sortierten Zeitstempel,
+            # Transaktionen in ursprünglicher Reihenfolge)
+            positions = np.array(
+                [i for i, t in enumerate(historical_transactions) if t.timestamp], dtype=int
+            )
+            times = np.array(
+                [historical_transactions[i].timestamp for i in positions], dtype='datetime64[us]'
+            )
+            order = np.argsort(times, kind='stable')
+            positions, times = positions[order], times[order]
+            
             current_date = min_date + timedelta(days=window_days)
             
             while current_date <= max_date:
                 window_start = current_date - timedelta(days=window_days)
                 window_end = current_date
                 
-                window_txns = [
-                    t for t in historical_transactions
-                    if t.timestamp and window_start <= t.timestamp < window_end
-                ]
+                lo = int(np.searchsorted(times, np.datetime64(window_start, 'us'), side='left'))
+                hi = int(np.searchsorted(times, np.datetime64(window_end, 'us'), side='left'))
+                window_txns = [historical_transactions[i] for i in np.sort(positions[lo:hi])]
                 
                 if len(window_txns) >= 2:
                     weight = self.calculate_weight(window_txns, window_days)
@@ -297,9 +305,21 @@ class WeightDetector:
         
         # Berechne tatsächliche Zeitspanne
         timestamps = [t.timestamp for t in txns_with_time]
-        min_time = min(timestamps)
-        max_time = max(timestamps)
+        return self.density_weeks(len(txns_with_time), min(timestamps), max(timestamps))
+    
+    def density_weeks(self, count: int, min_time: datetime, max_time: datetime) -> float:
+        """
+        Transaktionen pro Woche über die Spanne erster bis letzter Timestamp
+        (siehe calculate_temporal_density_weeks)
         
+        Args:
+            count: Anzahl Transaktionen mit Timestamp
+            min_time: Erster Timestamp
+            max_time: Letzter Timestamp
+            
+        Returns:
+            Transaktionen pro Woche
+        """
         actual_days = (max_time - min_time).days + 1  # +1 um Division durch 0 zu vermeiden
         actual_days = max(actual_days, 1)  # Mindestens 1 Tag
         
@@ -307,7 +327,7 @@ class WeightDetector:
         actual_weeks = actual_days / 7.0
         
         # Transaktionen pro Woche
-        density_weeks = len(txns_with_time) / actual_weeks
+        density_weeks = count / actual_weeks
         
         return density_weeks
     
@@ -385,11 +405,35 @@ class WeightDetector:
             if self.threshold_avoidance_min <= t.transaction_amount < self.threshold_avoidance_max
         ]
         
-        if len(threshold_avoidance_txns) < 3:
-            return False  # Zu wenige Transaktionen
+        return self.economic_plausibility_issue(
+            len(threshold_avoidance_txns),
+            sum(t.transaction_amount for t in threshold_avoidance_txns),
+            customer_info
+        )
+    
+    def economic_plausibility_issue(
+        self,
+        threshold_count: int,
+        cumulative_threshold_amount: float,
+        customer_info: Optional[CustomerInfo] = None
+    ) -> bool:
+        """
+        Economic Plausibility aus Anzahl und Summe der Bar-Investments nah
+        unter der Grenze (siehe check_economic_plausibility)
         
-        # Kumulative Summe der Transaktionen nah unter Grenze
-        cumulative_threshold_amount = sum(t.transaction_amount for t in threshold_avoidance_txns)
+        Args:
+            threshold_count: Anzahl Bar-Investments nah unter der Grenze
+            cumulative_threshold_amount: Summe dieser Transaktionen
+            customer_info: Kunden-Informationen (Monthly Income)
+            
+        Returns:
+            True wenn Economic Plausibility Problem erkannt
+        """
+        if not customer_info or customer_info.monthly_income is None:
+            return False
+        
+        if threshold_count < 3:
+            return False  # Zu wenige Transaktionen
         
         # Prüfe: Ist das realistisch durch Ersparnisse erklärbar?
         # Regel: Mehr als 6 Monatsgehälter ohne SoF = unrealistisch
@@ -406,7 +450,11 @@ class WeightDetector:
         self,
         recent_transactions: List[Transaction],
         historical_transactions: List[Transaction],
-        customer_info: Optional[CustomerInfo] = None
+        customer_info: Optional[CustomerInfo] = None,
+        daily_index: Optional["DailyWeightIndex"] = None,
+        recent_range: Optional[Tuple[int, int]] = None,
+        historical_range: Optional[Tuple[int, int]] = None,
+        baselines: Optional[Dict[int, List[float]]] = None
     ) -> WeightAnalysis:
         """
         Vollständige Weight-Analyse mit verbesserter Smurfing-Erkennung
@@ -414,19 +462,35 @@ class WeightDetector:
         Args:
             recent_transactions: Aktuelle Transaktionen
             historical_transactions: Historische Transaktionen für Baseline
+            customer_info: Optionale Kundeninformationen (SoF, Einkommen)
+            daily_index: Optional Tages-Aggregate des Kunden; dann werden
+                         Weights und Z-Scores über recent_range/historical_range
+                         (Index-Bereiche im Index) berechnet
+            recent_range: Index-Bereich der aktuellen Transaktionen
+            historical_range: Index-Bereich der historischen Transaktionen
+            baselines: Gespeicherte Baseline-Weights pro Fenstergröße (7, 30, 90)
             
         Returns:
             WeightAnalysis Objekt
         """
-        # Berechne Weights für verschiedene Zeitfenster
-        weight_7d = self.calculate_weight(recent_transactions, 7)
-        weight_30d = self.calculate_weight(recent_transactions, 30)
-        weight_90d = self.calculate_weight(recent_transactions, 90)
-        
-        # Berechne Z-Scores
-        z_score_7d = self.calculate_z_score(weight_7d, historical_transactions, 7)
-        z_score_30d = self.calculate_z_score(weight_30d, historical_transactions, 30)
-        z_score_90d = self.calculate_z_score(weight_90d, historical_transactions, 90)
+        if daily_index is not None and recent_range is not None and historical_range is not None:
+            # Tages-Aggregate (Präfixsummen) statt DataFrame pro Fenster
+            # (calculate_weight hängt nicht von window_days ab)
+            weight_7d = weight_30d = weight_90d = daily_index.weight(*recent_range)
+            baselines = baselines or {}
+            z_score_7d = daily_index.z_score(weight_7d, *historical_range, 7, baseline=baselines.get(7))
+            z_score_30d = daily_index.z_score(weight_30d, *historical_range, 30, baseline=baselines.get(30))
+            z_score_90d = daily_index.z_score(weight_90d, *historical_range, 90, baseline=baselines.get(90))
+        else:
+            # Berechne Weights für verschiedene Zeitfenster
+            weight_7d = self.calculate_weight(recent_transactions, 7)
+            weight_30d = self.calculate_weight(recent_transactions, 30)
+            weight_90d = self.calculate_weight(recent_transactions, 90)
+            
+            # Berechne Z-Scores
+            z_score_7d = self.calculate_z_score(weight_7d, historical_transactions, 7)
+            z_score_30d = self.calculate_z_score(weight_30d, historical_transactions, 30)
+            z_score_90d = self.calculate_z_score(weight_90d, historical_transactions, 90)
         
         # Berechne Kleinbetrags-Ratio
         small_ratio = self.calculate_small_transaction_ratio(recent_transactions)
@@ -443,6 +507,54 @@ class WeightDetector:
         # Economic Plausibility Prüfung
         economic_plausibility_issue = self.check_economic_plausibility(recent_transactions, customer_info)
         
+        return self.assess(
+            (weight_7d, weight_30d, weight_90d),
+            (z_score_7d, z_score_30d, z_score_90d),
+            len(recent_transactions),
+            small_ratio,
+            threshold_avoidance_ratio,
+            cumulative_large_amount,
+            temporal_density_weeks,
+            source_of_funds_exceeded,
+            economic_plausibility_issue,
+            customer_info
+        )
+    
+    def assess(
+        self,
+        weights: Tuple[float, float, float],
+        z_scores: Tuple[float, float, float],
+        recent_count: int,
+        small_ratio: float,
+        threshold_avoidance_ratio: float,
+        cumulative_large_amount: float,
+        temporal_density_weeks: float,
+        source_of_funds_exceeded: bool,
+        economic_plausibility_issue: bool,
+        customer_info: Optional[CustomerInfo] = None
+    ) -> WeightAnalysis:
+        """
+        Smurfing-Bewertung aus den Kennzahlen des aktuellen Fensters
+        (z.B. aus laufend geführten Zählern statt aus den Transaktionen)
+        
+        Args:
+            weights: Weights für 7, 30 und 90 Tage
+            z_scores: Z-Scores für 7, 30 und 90 Tage
+            recent_count: Anzahl aktueller Transaktionen
+            small_ratio: Kleinbetrags-Ratio
+            threshold_avoidance_ratio: Anteil Bar-Investments nah unter Grenze
+            cumulative_large_amount: Summe dieser Transaktionen
+            temporal_density_weeks: Transaktionen pro Woche
+            source_of_funds_exceeded: Source of Funds überschritten?
+            economic_plausibility_issue: Economic Plausibility Problem?
+            customer_info: Kundeninformationen (SoF)
+            
+        Returns:
+            WeightAnalysis Objekt
+        """
+        weight_7d, weight_30d, weight_90d = weights
+        z_score_7d, z_score_30d, z_score_90d = z_scores
+        
         # VERBESSERTE SMURFING-ERKENNUNG mit Source of Funds Integration:
         # 
         # WICHTIG: Source of Funds Logik
@@ -508,7 +620,7 @@ class WeightDetector:
             # GELOCKERT: threshold_avoidance_ratio von 0.5 auf 0.3, cumulative von 50k auf 30k
             if customer_info is None or customer_info.source_of_funds is None:
                 # Kein SoF abgegeben
-                if len(recent_transactions) >= 12:  # Über Jahr verteilt
+                if recent_count >= 12:  # Über Jahr verteilt
                     if threshold_avoidance_ratio >= 0.3 and cumulative_large_amount >= 30000:  # war 0.5 und 50k
                         # Mehrere Transaktionen nah unter Grenze über Jahr = verdächtig
                         is_suspicious = True
@@ -575,3 +687,186 @@ class WeightDetector:
         
         return df
 
+
+
+class DailyWeightIndex:
+    """
+    Tages-Aggregate eines Kunden für schnelle Weight-Berechnung
+
+    Arbeitet auf den nach Timestamp sortierten Transaktionen eines Kunden.
+    Jedes Analysefenster (aktuell, historisch, rollierende Baseline-Fenster)
+    ist ein zusammenhängender Index-Bereich dieser Sortierung; sein Weight
+    ergibt sich aus Präfixsummen über vollständige Tage plus den beiden
+    angeschnittenen Randtagen in O(log n) statt eines DataFrame-Durchlaufs.
+    Ergebnisse entsprechen WeightDetector.calculate_weight bzw.
+    calculate_z_score (bis auf Rundung).
+    """
+
+    def __init__(self, detector: WeightDetector, sorted_transactions: List[Transaction]):
+        """
+        Args:
+            detector: Weight-Detektor (Decay, Schwellenwerte)
+            sorted_transactions: Transaktionen mit Timestamp, nach Timestamp sortiert
+        """
+        self.detector = detector
+        n = len(sorted_transactions)
+
+        self.times = np.array([t.timestamp for t in sorted_transactions], dtype='datetime64[us]')
+        amounts = np.array([t.transaction_amount for t in sorted_transactions], dtype=float)
+        is_bar_investment = np.array([
+            t.payment_method == "Bar" and t.transaction_type == "investment"
+            for t in sorted_transactions
+        ], dtype=bool)
+        is_near = is_bar_investment & (amounts >= detector.threshold_avoidance_min) & (
+            amounts < detector.threshold_avoidance_max
+        )
+
+        # Präfixsummen pro Transaktion
+        self._amount_prefix = np.concatenate(([0.0], np.cumsum(amounts)))
+        self._bar_prefix = np.concatenate(([0], np.cumsum(is_bar_investment)))
+        self._near_prefix = np.concatenate(([0], np.cumsum(is_near)))
+
+        # Tage (Ordinal) und Monate pro Transaktion
+        dates = self.times.astype('datetime64[D]')
+        self._day_of = dates.astype(np.int64)
+        self._month_of = self.times.astype('datetime64[M]').astype(np.int64)
+
+        # Vollständige Tage: Start-/Endindex, Tagesterm und Präfixsumme der Terme
+        if n:
+            boundaries = np.flatnonzero(np.diff(self._day_of)) + 1
+            self._day_start = np.concatenate(([0], boundaries))
+            self._day_end = np.concatenate((boundaries, [n]))
+        else:
+            self._day_start = np.array([], dtype=int)
+            self._day_end = np.array([], dtype=int)
+        self._day_rank = np.repeat(np.arange(len(self._day_start)), self._day_end - self._day_start)
+
+        # Decay relativ zu "heute" (wie calculate_weight)
+        today = np.datetime64(datetime.now().date(), 'D').astype(np.int64)
+        self.today = int(today)
+        self._day_decay = np.exp(-detector.lambda_decay * (today - self._day_of[self._day_start])) if n else np.array([])
+        day_terms = np.array([
+            self._term(start, end, self._day_decay[i])
+            for i, (start, end) in enumerate(zip(self._day_start, self._day_end))
+        ], dtype=float)
+        self._term_prefix = np.concatenate(([0.0], np.cumsum(day_terms)))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _term(self, start: int, end: int, decay: float) -> float:
+        """Weight-Beitrag eines (ggf. angeschnittenen) Tages aus den Transaktionen start..end"""
+        amount_sum = self._amount_prefix[end] - self._amount_prefix[start]
+        count = end - start
+        factor = 1.0
+        bar_count = self._bar_prefix[end] - self._bar_prefix[start]
+        near_count = self._near_prefix[end] - self._near_prefix[start]
+        if bar_count > 0 and near_count > 0:
+            factor = 1.0 + (near_count / bar_count) * 1.5
+        return float(np.log1p(amount_sum) * np.log1p(count) * factor * decay)
+
+    def range_between(self, start: Optional[datetime], end: Optional[datetime], lo: int = 0, hi: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Index-Bereich der Transaktionen mit start <= timestamp < end innerhalb [lo, hi)
+        """
+        hi = len(self.times) if hi is None else hi
+        a = int(np.searchsorted(self.times[lo:hi], np.datetime64(start, 'us'), side='left')) + lo if start is not None else lo
+        b = int(np.searchsorted(self.times[lo:hi], np.datetime64(end, 'us'), side='left')) + lo if end is not None else hi
+        return a, max(a, b)
+
+    def weight(self, lo: int, hi: int) -> float:
+        """
+        Weight der Transaktionen lo..hi (wie WeightDetector.calculate_weight)
+        """
+        if hi <= lo:
+            return 0.0
+
+        first_day = self._day_rank[lo]
+        last_day = self._day_rank[hi - 1]
+
+        if first_day == last_day:
+            return self._term(lo, hi, self._day_decay[first_day])
+
+        total = self._term(lo, self._day_end[first_day], self._day_decay[first_day])
+        total += self._term_prefix[last_day] - self._term_prefix[first_day + 1]
+        total += self._term(self._day_start[last_day], hi, self._day_decay[last_day])
+        return float(total)
+
+    def baseline_weights(self, lo: int, hi: int, window_days: int) -> List[float]:
+        """
+        Weights der historischen Baseline lo..hi (wie WeightDetector.calculate_z_score)
+        """
+        if hi <= lo:
+            return []
+
+        if hi - lo < 20:
+            # Wenige Transaktionen: Gruppiere nach Monat als Baseline
+            months = self._month_of[lo:hi]
+            boundaries = np.flatnonzero(np.diff(months)) + 1 + lo
+            starts = np.concatenate(([lo], boundaries))
+            ends = np.concatenate((boundaries, [hi]))
+            return [self.weight(a, b) for a, b in zip(starts, ends)]
+
+        return self.rolling_weights(lo, hi, window_days)[0]
+
+    def rolling_weights(
+        self,
+        lo: int,
+        hi: int,
+        window_days: int,
+        start: Optional[np.datetime64] = None
+    ) -> Tuple[List[float], np.datetime64]:
+        """
+        Weights der rollierenden Fenster (7 Tage Schrittweite) über lo..hi
+
+        Args:
+            lo, hi: Index-Bereich der historischen Transaktionen
+            window_days: Fenstergröße in Tagen
+            start: Ende des ersten zu berechnenden Fensters (None = erstes Fenster)
+
+        Returns:
+            Tuple (Weights, Ende des nächsten Fensters)
+        """
+        min_date = self.times[lo]
+        max_date = self.times[hi - 1]
+        window = np.timedelta64(window_days, 'D')
+        step = np.timedelta64(7, 'D')
+        current_date = min_date + window if start is None else start
+
+        weights = []
+        while current_date <= max_date:
+            a = lo + int(np.searchsorted(self.times[lo:hi], current_date - window, side='left'))
+            b = lo + int(np.searchsorted(self.times[lo:hi], current_date, side='left'))
+            if b - a >= 2:
+                weights.append(self.weight(a, b))
+            current_date += step
+        return weights, current_date
+
+    def z_score(
+        self,
+        current_weight: float,
+        lo: int,
+        hi: int,
+        window_days: int,
+        baseline: Optional[List[float]] = None
+    ) -> float:
+        """
+        Z-Score gegen die historische Baseline lo..hi (wie WeightDetector.calculate_z_score)
+
+        Args:
+            baseline: Bereits bekannte Baseline-Weights (z.B. aus dem BaselineStore)
+        """
+        if hi <= lo:
+            return 0.0
+
+        historical_weights = baseline if baseline is not None else self.baseline_weights(lo, hi, window_days)
+
+        if len(historical_weights) < 2:
+            return 0.0
+
+        mu_baseline = np.mean(historical_weights)
+        sigma_baseline = np.std(historical_weights)
+        if sigma_baseline < 0.01:
+            sigma_baseline = 0.01
+
+        return (current_weight - mu_baseline) / sigma_baseline
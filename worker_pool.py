@@ -0,0 +1,51 @@
+"""
+Worker-Pool für die API
+
+Analyse und CSV-Parsing sind CPU-lastig und dürfen die Event-Loop nicht
+blockieren (sonst antworten auch /health und Einzel-Transaktionen nicht).
+WorkerPool führt solche Arbeit in Threads aus; alle Aufgaben brauchen den
+In-Memory-Zustand des Analyzers (Analysen, Einfügen, blockweises Parsen
+direkt in den Analyzer).
+
+Änderungen am globalen Analyzer (Einfügen, Zeitfenster-Aktualisierung,
+Retention, Reset) laufen unter einer exklusiven Sperre (threading.Lock in
+main.py), die nur in Worker-Threads genommen wird, nie in der Event-Loop.
+Lese-Endpunkte arbeiten auf Snapshots bzw. den veröffentlichten Datensätzen
+und brauchen keine Sperre.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+
+class WorkerPool:
+    """
+    Thread-Pool für CPU-lastige Arbeit außerhalb der Event-Loop
+    """
+
+    def __init__(self, max_threads: int = 8):
+        """
+        Args:
+            max_threads: Anzahl Worker-Threads
+        """
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="worker")
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Führt fn(*args, **kwargs) in einem Worker-Thread aus
+
+        Args:
+            fn: Auszuführende Funktion
+
+        Returns:
+            Rückgabewert von fn
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._threads, partial(fn, *args, **kwargs)
+        )
+
+    def shutdown(self):
+        """Beendet den Pool (beim Herunterfahren)"""
+        self._threads.shutdown(wait=False)